@@ -0,0 +1,138 @@
+"""
+PDF link extraction benchmark
+
+Generates a corpus of multi-page CVs with link annotations and text on every
+page, then reads their links with the pdfplumber path the ingestion used before
+(page.hyperlinks, which runs layout analysis on each page) and with
+utils.pdf_links, both serially and through the process pool.
+
+    python benchmarks/pdf_links.py --cvs 50
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import pdfplumber  # noqa: E402
+
+from utils.pdf_links import read_link_uris, read_link_uris_async, shutdown_executor  # noqa: E402
+
+LINK_TARGETS = [
+    "https://github.com/{user}",
+    "https://www.linkedin.com/in/{user}",
+    "mailto:{user}@example.com",
+    "https://{user}.dev/projects/{page}",
+    "https://medium.com/@{user}/post-{page}"
+]
+
+
+def write_cv(path: Path, pages: int, lines_per_page: int, links_per_page: int, user: str):
+    """Write a CV of text pages, each with links_per_page URI link annotations"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        lines = " ".join(
+            f"(Experience {page}.{line}: designed, built and operated backend services in Python) Tj T*"
+            for line in range(lines_per_page)
+        )
+        stream = f"BT /F1 9 Tf 40 800 Td 11 TL {lines} ET"
+        content = len(objects) + 1
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream.encode()))
+        annots = []
+        for link in range(links_per_page):
+            uri = LINK_TARGETS[(page + link) % len(LINK_TARGETS)].format(user=user, page=page)
+            objects.append((
+                f"<< /Type /Annot /Subtype /Link /Rect [40 {700 - 40 * link} 300 {712 - 40 * link}] "
+                f"/Border [0 0 0] /A << /S /URI /URI ({uri}) >> >>"
+            ).encode())
+            annots.append(f"{len(objects)} 0 R")
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {content} 0 R /Annots [{' '.join(annots)}] >>"
+        ).encode())
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(data)
+
+
+def previous_read_link_uris(file_path: Path) -> set:
+    """Link harvesting of extract_pdf_links before utils.pdf_links"""
+    links = set()
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages:
+            if page.hyperlinks:
+                for link in page.hyperlinks:
+                    if link.get("uri"):
+                        links.add(link["uri"])
+    return links
+
+
+def best_of(read, corpus: list, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in corpus:
+            read(path)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+async def pooled(corpus: list) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(read_link_uris_async(path) for path in corpus))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cvs", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = []
+        for i in range(args.cvs):
+            path = Path(directory) / f"cv_{i}.pdf"
+            write_cv(path, pages=rng.randint(2, 5), lines_per_page=60, links_per_page=3, user=f"candidate{i}")
+            corpus.append(path)
+
+        previous = [previous_read_link_uris(path) for path in corpus]
+        current = [read_link_uris(path) for path in corpus]
+        assert previous == current, "the two paths disagree on the links of the corpus"
+        print(f"{args.cvs} CVs, {sum(len(links) for links in current)} distinct links")
+
+        for label, read in (("previous (pdfplumber)", previous_read_link_uris), ("annotations only", read_link_uris)):
+            seconds = best_of(read, corpus, args.repeat)
+            print(f"{label:24} {seconds:.3f}s, {seconds / args.cvs * 1e3:.2f} ms/CV")
+
+        async def run_pooled():
+            await pooled(corpus[:1])  # start the worker processes outside the timing
+            return min([await pooled(corpus) for _ in range(args.repeat)])
+
+        try:
+            seconds = asyncio.run(run_pooled())
+        finally:
+            shutdown_executor()
+        print(f"{'process pool':24} {seconds:.3f}s, {seconds / args.cvs * 1e3:.2f} ms/CV off the event loop")
+
+
+if __name__ == "__main__":
+    main()
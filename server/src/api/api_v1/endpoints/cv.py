@@ -1,32 +1,34 @@
 from fastapi import FastAPI, APIRouter, Request, UploadFile, File, HTTPException, Form, Query, Body
 from pathlib import Path
 import shutil
+import asyncio
 import zipfile
 import os
 from utils.gemini import GeminiPDFExtractor
-from utils.github_extractor import GitHubExtractor
+from utils.cv_pipeline import cv_pipeline
 from bson.objectid import ObjectId
 from schemas.cv import Cv,cvBase,cvCreate
 from models.cv import CvModel
 from models.job import JobModel
-from typing import List, Union, Dict, Any, Optional
+from models.batch import BatchModel
+from schemas.batch import UploadBatchStatus, UPLOAD_STAGES
+from utils.upload_worker import upload_worker
+from utils.upload_storage import UploadTooLarge, check_upload, open_zip, pdf_members, store_upload, store_zip_member
+from typing import AsyncIterator, List, Union, Dict, Any, Optional
 from datetime import datetime, timezone
 from pydantic import BaseModel, EmailStr, Field
-from bs4 import BeautifulSoup
 from fastapi.responses import FileResponse, StreamingResponse
 from config.config import settings
 import logging
 import re
-from urllib.parse import urlparse
-import pdfplumber
-from utils.mailing.email_templates import send_cv_received_email
-from utils.excel_extraction import create_cv_excel
+from utils.excel_extraction import CvExcelWriter, iter_file, stream_cvs_csv, stream_cvs_ndjson, EXPORT_PROJECTION
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 cv_model = CvModel()
 job_model = JobModel()
+batch_model = BatchModel()
 
 base_dir = os.path.dirname(os.path.abspath(__file__)) 
 file_path = os.path.join(base_dir, f"../../../data")
@@ -34,122 +36,24 @@ file_path = os.path.join(base_dir, f"../../../data")
 UPLOAD_DIR = Path(file_path)
 UPLOAD_DIR.mkdir(exist_ok=True)
 
-async def enrich_cv_with_github(cv_id: str, resume_content: dict) -> Optional[dict]:
-    """
-    Automatically enrich CV with GitHub data if GitHub URL is present
-    
-    Args:
-        cv_id: MongoDB ObjectId of CV
-        resume_content: Extracted resume content
-        
-    Returns:
-        GitHub data dictionary or None
-    """
-    try:
-        # Extract GitHub URL from resume
-        personal_info = resume_content.get("personal_info", {})
-        github_url = personal_info.get("github", "")
-        
-        if not github_url:
-            logger.info(f"No GitHub URL found for CV {cv_id}")
-            return None
-        
-        # Extract username
-        extractor = GitHubExtractor(token=settings.GITHUB_API_TOKEN)
-        username = GitHubExtractor.extract_username_from_url(github_url)
-        
-        if not username:
-            logger.warning(f"Could not extract username from GitHub URL: {github_url}")
-            return None
-        
-        logger.info(f"Fetching GitHub data for username: {username}")
-        
-        # Fetch complete GitHub profile
-        github_data = await extractor.get_complete_profile(username)
-        
-        if github_data["fetch_status"] == "success":
-            logger.info(f"Successfully fetched GitHub data for {username}")
-        else:
-            logger.warning(f"GitHub enrichment failed for {username}: {github_data.get('error')}")
-        
-        return github_data
-        
-    except Exception as e:
-        logger.error(f"Error enriching CV {cv_id} with GitHub data: {str(e)}")
-        return None
-
-def clean_links(raw_links: set[str]) -> list[str]:
-    cleaned = set()
-    for link in raw_links:
-        link = link.strip().replace("\n", "").replace(" ", "")
-        cleaned.add(link)
-    return list(cleaned)
-
-def classify_links(links: list[str]) -> dict:
-    result = {
-        "profiles": {
-            "github": [],
-            "linkedin": [],
-            "medium": [],
-            "website": []
-        },
-        "github_repos": [],
-        "certificates": [],
-        "emails": [],
-        "others": []
-    }
-
-    for link in links:
-        if link.startswith("mailto:"):
-            result["emails"].append(link)
-            continue
-
-        parsed = urlparse(link)
-        domain = parsed.netloc.lower()
-        path_parts = parsed.path.strip("/").split("/")
-
-        # ---------- GitHub ----------
-        if domain == "github.com":
-            if len(path_parts) == 1:
-                # GitHub profile
-                result["profiles"]["github"].append(link)
-            elif len(path_parts) >= 2:
-                # GitHub repository
-                result["github_repos"].append(link)
-            continue
-
-        # ---------- LinkedIn ----------
-        if "linkedin.com" in domain:
-            if path_parts and path_parts[0] == "in":
-                result["profiles"]["linkedin"].append(link)
-            else:
-                result["others"].append(link)
-            continue
-
-        # ---------- Medium ----------
-        if "medium.com" in domain:
-            result["profiles"]["medium"].append(link)
-            continue
-
-        # ---------- Certificates ----------
-        if any(d in domain for d in ["hackerrank.com", "coursera.org", "udemy.com", "linkedin.com/learning"]):
-            result["certificates"].append(link)
-            continue
-
-        if "drive.google.com" in domain:
-            result["certificates"].append(link)
-            continue
-
-        # ---------- Personal website ----------
-        if domain and not domain.endswith(("github.com", "linkedin.com", "medium.com")):
-            result["profiles"]["website"].append(link)
-            continue
-
-        result["others"].append(link)
-
-    return result
-
-@router.post("/upload_cv")
+# Fields of the list view; the resume, marks and GitHub data come from /fetch_cv/{cv_id}
+CV_SUMMARY_PROJECTION = {
+    "cvName": 1,
+    "candidateName": 1,
+    "division": 1,
+    "jobName": 1,
+    "jobId": 1,
+    "finalMark": 1,
+    "markGenerated": 1,
+    "selectedForInterview": 1,
+    "mailStatus": 1,
+    "interviewEvent": 1,
+    "resumeContent.personal_info": 1,
+    "createdAt": 1,
+    "updatedAt": 1
+}
+
+@router.post("/upload_cv", status_code=202)
 async def upload_cv(
     request: Request,
     files: List[UploadFile] = File(...),
@@ -157,168 +61,107 @@ async def upload_cv(
     jobName: str = Form(...),
     id: str = Form(...)
 ):
-    gemini_extractor = GeminiPDFExtractor()
     if files is None or len(files) == 0:
         raise HTTPException(status_code=400, detail="No files uploaded")
     
-    successful_cvs = []
-    failed_cvs = []
-    
+    created_ids = []
+    target_paths = []
     try:
+        # Refuse the whole request on declared sizes and archive limits before any CV is created
         for file in files:
-            if file.filename.endswith(".pdf"):
-                try:
-                    new_pdf_id = cv_model.create_cv(request, {"cvName":file.filename, "division": division, "jobName": jobName, "jobId": id, "selectedForInterview": False, "isDeleted": False, "comparisonResults": {}, "markGenerated": False, "finalMark": 0.0, "createdAt": datetime.now(timezone.utc)})
-                    file_path = UPLOAD_DIR / f"{new_pdf_id}_{file.filename}"
-                    with open(file_path, "wb") as f:
-                        shutil.copyfileobj(file.file, f)
-
-
-                    links = set()
-                    with pdfplumber.open(file_path) as pdf:
-                        for page in pdf.pages:
-                            if page.hyperlinks:
-                                for link in page.hyperlinks:
-                                    if link.get("uri"):
-                                        links.add(link["uri"])
-
-                    cleaned_links = clean_links(links)
-                    classified_links = classify_links(cleaned_links)
-                    # Extract CV content
-                    extract = await gemini_extractor.extract_and_structure_pdf(f"{new_pdf_id}_{file.filename}", classified_links)
-
-                    # Automatically enrich with GitHub data
-                    github_data = await enrich_cv_with_github(str(new_pdf_id), extract)
-                    
-                    # Update CV with extracted content and GitHub data
-                    update_data = {
-                        "candidateName": extract.get("personal_info", {}).get("name") or "",
-                        "resumeContent": extract
-                    }
-                    if github_data:
-                        update_data["githubData"] = github_data
-                    
-                    # Send CV received email
-                    try:
-                        candidate_email = extract.get("personal_info", {}).get("email") or ""
-                        candidate_name = extract.get("personal_info", {}).get("name") or ""
-                        if candidate_email:
-                            await send_cv_received_email(
-                                recipient_email=candidate_email,
-                                candidate_name=candidate_name,
-                                position=jobName,
-                                cc_emails=[]
-                            )
-                            logger.info(f"CV received email sent to {candidate_email}")
-                            update_data["mailStatus"] = "received_email_sent"
-                    except Exception as email_error:
-                        logger.error(f"Failed to send CV received email: {email_error}")
-                        # Don't fail the CV processing if email fails
-
-                    update_pdf = cv_model.update(request, "_id", ObjectId(new_pdf_id), update_data)
-                    await generate_mark(request, [update_pdf])
-                    
-                    
-                    successful_cvs.append(file.filename)
-                except Exception as e:
-                    failed_cvs.append({"filename": file.filename, "error": str(e)})
-                    print(f"Error processing {file.filename}: {e}")
-
-            elif file.filename.endswith(".zip"):
-                # Save ZIP temporarily
-                count = 1
-                zip_path = UPLOAD_DIR / file.filename
-                with open(zip_path, "wb") as f:
-                    shutil.copyfileobj(file.file, f)
-
-
-                with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                    for member in zip_ref.namelist():
-                        if member.lower().endswith(".pdf"):
-                            try:
-                                original_name = Path(member).stem
-                                print(f"Processing {original_name}::{count}")
-                                count += 1
-                                new_pdf_id = cv_model.create_cv(request, {"cvName":f"{original_name}.pdf", "division": division, "jobName": jobName, "jobId": id, "isDeleted": False, "comparisonResults": {}, "markGenerated": False, "finalMark": 0.0,"createdAt": datetime.now(timezone.utc)})
-                                new_filename = f"{new_pdf_id}_{original_name}.pdf"
-                                new_file_path = UPLOAD_DIR / new_filename
-
-                                with zip_ref.open(member) as source, open(new_file_path, "wb") as target:
-                                    shutil.copyfileobj(source, target)
-
-                                links = set()
-                                with pdfplumber.open(new_file_path) as pdf:
-                                    for page in pdf.pages:
-                                        if page.hyperlinks:
-                                            for link in page.hyperlinks:
-                                                if link.get("uri"):
-                                                    links.add(link["uri"])
-
-                                cleaned_links = clean_links(links)
-                                classified_links = classify_links(cleaned_links)
-                                # Extract CV content
-                                extract = await gemini_extractor.extract_and_structure_pdf(new_filename, classified_links)
-                                
-                                # Automatically enrich with GitHub data
-                                github_data = await enrich_cv_with_github(str(new_pdf_id), extract)
-                                
-                                # Update CV with extracted content and GitHub data
-                                update_data = {
-                                    "candidateName": extract.get("personal_info", {}).get("name") or "",
-                                    "resumeContent": extract
-                                }
-                                if github_data:
-                                    update_data["githubData"] = github_data
-                                
-                                # Send CV received email
-                                try:
-                                    candidate_email = extract.get("personal_info", {}).get("email") or ""
-                                    candidate_name = extract.get("personal_info", {}).get("name") or ""
-                                    if candidate_email:
-                                        await send_cv_received_email(
-                                            recipient_email=candidate_email,
-                                            candidate_name=candidate_name,
-                                            position=jobName,
-                                            cc_emails=[]
-                                        )
-                                        logger.info(f"CV received email sent to {candidate_email}")
-                                        update_data["mailStatus"] = "received_email_sent"
-                                except Exception as email_error:
-                                    logger.error(f"Failed to send CV received email: {email_error}")
-                                    # Don't fail the CV processing if email fails
-
-                                update_pdf = cv_model.update(request, "_id", ObjectId(new_pdf_id), update_data)
-                                await generate_mark(request, [update_pdf])
-                                
-                                successful_cvs.append(f"{original_name}.pdf")
-
-                            except Exception as e:
-                                failed_cvs.append({"filename": f"{original_name}.pdf", "error": str(e)})
-                                print(f"Error processing {original_name}.pdf: {e}")
+            if not file.filename.endswith((".pdf", ".zip")):
+                raise HTTPException(status_code=400, detail="Only PDF or ZIP files are allowed.")
+            check_upload(file)
 
-                os.remove(zip_path)
+        # Store every CV, then hand the batch to the background worker
+        items = []
+        for file in files:
+            if file.filename.endswith(".pdf"):
+                new_pdf_id = await cv_pipeline.create_cv(request, file.filename, division, jobName, id)
+                file_path = UPLOAD_DIR / f"{new_pdf_id}_{file.filename}"
+                created_ids.append(new_pdf_id)
+                target_paths.append(file_path)
+                await store_upload(file, file_path, settings.UPLOAD_MAX_FILE_BYTES)
+                items.append((file.filename, new_pdf_id, file_path))
 
             else:
-                raise HTTPException(status_code=400, detail="Only PDF or ZIP files are allowed.")
-        print(f"Successfully processed CVs: {successful_cvs}")
-        print(f"Failed CVs: {failed_cvs} : {len(failed_cvs)} out of {len(files)}")
+                # Read the archive from the spooled upload and decompress each PDF straight into its CV file
+                with open_zip(file) as zip_ref:
+                    for member in pdf_members(zip_ref):
+                        original_name = Path(member.filename).stem
+                        new_pdf_id = await cv_pipeline.create_cv(request, f"{original_name}.pdf", division, jobName, id)
+                        new_file_path = UPLOAD_DIR / f"{new_pdf_id}_{original_name}.pdf"
+                        created_ids.append(new_pdf_id)
+                        target_paths.append(new_file_path)
+                        await store_zip_member(zip_ref, member, new_file_path)
+                        items.append((f"{original_name}.pdf", new_pdf_id, new_file_path))
+
+        batch_id = await batch_model.create_batch(request, {
+            "jobId": id,
+            "jobName": jobName,
+            "division": division,
+            "status": "queued",
+            "files": [
+                {"filename": filename, "cvId": str(cv_id), "storedPath": str(stored_path), "stage": "stored", "error": None}
+                for filename, cv_id, stored_path in items
+            ],
+            "createdAt": datetime.now(timezone.utc)
+        })
+        await upload_worker.enqueue(str(batch_id))
         return {
-            "statusCode": 200,
-            "message": "Files processing completed",
-            "successful_cvs": successful_cvs,
-            "failed_cvs": failed_cvs,
-            "total_processed": len(successful_cvs),
-            "total_failed": len(failed_cvs)
+            "statusCode": 202,
+            "message": "Files queued for processing",
+            "batchId": str(batch_id),
+            "total_files": len(items)
         }
     except Exception as e:
+        # Files past the declared-size checks can still fail while copying; drop what this request created
+        await discard_upload(request, created_ids, target_paths)
+        if isinstance(e, HTTPException):
+            raise
+        if isinstance(e, UploadTooLarge):
+            raise HTTPException(status_code=413, detail=str(e))
+        if isinstance(e, zipfile.BadZipFile):
+            raise HTTPException(status_code=400, detail="Invalid ZIP archive")
         print("Error uploading pdf:", e)
         raise HTTPException(status_code=400, detail=str(e))
+
+async def discard_upload(request: Request, cv_ids: List[ObjectId], file_paths: List[Path]):
+    """Soft-delete the placeholder CVs of a rejected upload and remove their stored files"""
+    try:
+        await cv_model.bulk_update(request, [(cv_id, {"isDeleted": True}) for cv_id in cv_ids])
+    except Exception as e:
+        logger.error(f"Error discarding CVs of a rejected upload: {e}")
+    for path in file_paths:
+        path.unlink(missing_ok=True)
     
+@router.get("/upload_status/{batch_id}", response_model=UploadBatchStatus)
+async def upload_status(request: Request, batch_id: str):
+    if not ObjectId.is_valid(batch_id):
+        raise HTTPException(status_code=400, detail="Invalid batch ID format")
+    batch = await batch_model.find(request, "_id", ObjectId(batch_id))
+    if not batch:
+        raise HTTPException(status_code=404, detail="Upload batch not found")
+
+    counts = {stage: 0 for stage in UPLOAD_STAGES + ["failed"]}
+    for file in batch["files"]:
+        counts[file["stage"]] += 1
+    return UploadBatchStatus(
+        **batch,
+        counts=counts,
+        total_files=len(batch["files"]),
+        total_processed=counts["scored"] + counts["mailed"],
+        total_failed=counts["failed"]
+    )
+
 @router.get("/fetch_cvs")
 async def fetch_cvs(request: Request, 
     jobName: Optional[str] = Query(None),
     candidateName: Optional[str] = Query(None),
-    division: Optional[str] = Query(None)):
+    division: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size, enables cursor pagination"),
+    cursor: Optional[str] = Query(None, description="nextCursor of the previous page"),
+    view: str = Query("full", pattern="^(full|summary)$", description="summary leaves out the resume, marks and GitHub data")):
     filter_dict = {}
     if division:
         filter_dict["division"] = division
@@ -327,20 +170,36 @@ async def fetch_cvs(request: Request,
     if candidateName is not None:
         filter_dict["candidateName"] = candidateName
     filter_dict["isDeleted"] = False
+    projection = CV_SUMMARY_PROJECTION if view == "summary" else None
     try:
-        cvs =  cv_model.fetch_cvs(request, filter_dict)
+        if limit is not None:
+            cvs, next_cursor = await cv_model.fetch_cvs_page(request, filter_dict, limit, cursor, projection)
+            return {"cvs": cvs, "nextCursor": next_cursor}
+        cvs = await cv_model.fetch_cvs(request, filter_dict, projection)
         if cvs:
             return {"cvs": cvs}
         else:
             raise HTTPException(status_code=400, detail="Error fetching cvs")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print("Error fetching cvs:", e)
         raise HTTPException(status_code=400, detail="Error fetching cvs")
 
+@router.get("/fetch_cv/{cv_id}")
+async def fetch_cv(request: Request, cv_id: str):
+    if not ObjectId.is_valid(cv_id):
+        raise HTTPException(status_code=400, detail="Invalid CV ID format")
+    cv = await cv_model.find(request, "_id", ObjectId(cv_id))
+    if not cv or cv.get("isDeleted"):
+        raise HTTPException(status_code=404, detail="CV not found")
+    del cv["_id"]
+    return {"cv": cv}
+
 @router.delete("/delete_cv")
 async def delete_cv(request: Request, id: str):
     try:
-        updated_cv = cv_model.update(request, "_id", ObjectId(id), {"isDeleted": True})
+        updated_cv = await cv_model.update(request, "_id", ObjectId(id), {"isDeleted": True})
         if updated_cv:
             return 
     except Exception as e:
@@ -350,7 +209,7 @@ async def delete_cv(request: Request, id: str):
 @router.put("/update_cv")
 async def update_cv(request: Request, cv: dict):
     try:
-        updated_cv = cv_model.update(request, "_id", ObjectId(cv.get("id")), cv)
+        updated_cv = await cv_model.update(request, "_id", ObjectId(cv.get("id")), cv)
         if updated_cv:
             return 
     except Exception as e:
@@ -365,24 +224,14 @@ async def structure_pdf(request: Request, pdf_file_name: str):
 @router.post("/generate_mark")
 async def generate_mark(request: Request, data: List[dict] = Body(...)):
     try:
+        # Score CVs of the same job together so they share batched prompts
+        cvs_by_job = {}
         for cv in data:
-            job_data = job_model.find(request, "_id", ObjectId(cv.get("jobId")))
-            soup = BeautifulSoup(job_data["jobDescription"], "html.parser")
-            job_data["jobDescription"] = soup.get_text(separator="\n")
-            gemini_extractor = GeminiPDFExtractor()
-            
-            # Get GitHub data if available
-            github_data = cv.get("githubData")
-            
-            # Generate marks with GitHub data
-            generated_marks = await gemini_extractor.generate_marks(
-                cv.get("resumeContent"), 
-                job_data,
-                github_data
-            )
-            total_mark = sum(item["mark"] for item in generated_marks.values())
-            cv_model.update(request, "_id", ObjectId(cv.get("id")), {"comparisonResults": generated_marks, "markGenerated": True, "finalMark": total_mark, "selectedForInterview": total_mark >= job_data['selectionMark']})
-            
+            cvs_by_job.setdefault(cv.get("jobId"), []).append(cv)
+        results = await asyncio.gather(*[cv_pipeline.score_cvs(request, cvs) for cvs in cvs_by_job.values()])
+        for result in (result for job_results in results for result in job_results):
+            if isinstance(result, Exception):
+                raise result
         return 
     except Exception as e:
         print("Error updating cv:", e)
@@ -403,25 +252,50 @@ async def get_pdf(request: Request,
 @router.get("/fetch_github")
 async def fetch_github(request: Request, id: str):
     print(id)
-    githubData = cv_model.get_github_data(request, id)
+    githubData = await cv_model.get_github_data(request, id)
     print(githubData)
     return githubData
 
 
 class ExportCVsRequest(BaseModel):
     cv_ids: List[str] = Field(..., description="List of CV IDs to export")
+    format: str = Field("xlsx", pattern="^(xlsx|csv|ndjson)$", description="xlsx is styled but only sent once complete; csv and ndjson stream unstyled rows as they are read and suit large exports")
+
+
+# media type, file extension and row streamer of the unstyled export formats
+STREAMING_EXPORTS = {
+    "csv": ("text/csv", "csv", stream_cvs_csv),
+    "ndjson": ("application/x-ndjson", "ndjson", stream_cvs_ndjson)
+}
+
+
+async def _prepend(first: Dict[str, Any], rest: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    yield first
+    async for item in rest:
+        yield item
+
+
+async def _batches(items: AsyncIterator[Dict[str, Any]], size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 
 @router.post("/export_cvs_to_excel")
 async def export_cvs_to_excel(request: Request, export_request: ExportCVsRequest):
     """
-    Export selected CVs to Excel file.
+    Export selected CVs to Excel file, or stream them as CSV / NDJSON.
     
     Args:
-        export_request: Request containing list of CV IDs to export
+        export_request: Request containing list of CV IDs to export and the format
         
     Returns:
-        StreamingResponse: Excel file download
+        StreamingResponse: Excel, CSV or NDJSON file download
     """
     try:
         cv_ids = export_request.cv_ids
@@ -429,30 +303,47 @@ async def export_cvs_to_excel(request: Request, export_request: ExportCVsRequest
         if not cv_ids:
             raise HTTPException(status_code=400, detail="No CV IDs provided")
         
-        # Fetch CV data from database
-        cv_data_list = []
+        object_ids = []
         for cv_id in cv_ids:
-            try:
-                cv_data = cv_model.find(request, "_id", ObjectId(cv_id))
-                if cv_data:
-                    cv_data_list.append(cv_data)
-            except Exception as e:
-                logger.error(f"Error fetching CV {cv_id}: {e}")
-                continue
+            if ObjectId.is_valid(cv_id):
+                object_ids.append(ObjectId(cv_id))
+            else:
+                logger.error(f"Error fetching CV {cv_id}: invalid id")
+        cvs = cv_model.iter_by_ids(request, object_ids, EXPORT_PROJECTION, settings.EXPORT_BATCH_SIZE)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        if export_request.format in STREAMING_EXPORTS:
+            # Rows go out as the cursor yields them, only the first is awaited to detect an empty export
+            first = await anext(cvs, None)
+            if first is None:
+                raise HTTPException(status_code=404, detail="No CVs found for the provided IDs")
+            media_type, extension, stream = STREAMING_EXPORTS[export_request.format]
+            return StreamingResponse(
+                stream(_prepend(first, cvs)),
+                media_type=media_type,
+                headers={"Content-Disposition": f"attachment; filename=CV_Export_{timestamp}.{extension}"}
+            )
         
-        if not cv_data_list:
+        # Rows are written as the cursor yields them, one batch at a time off the event loop, in cursor
+        # order like the streamed formats. xlsx is a zip container that is only sent once complete; large
+        # exports should use csv or ndjson, which stream from the first row.
+        batches = _batches(cvs, settings.EXPORT_BATCH_SIZE)
+        sample = await anext(batches, None)
+        if sample is None:
             raise HTTPException(status_code=404, detail="No CVs found for the provided IDs")
         
-        # Create Excel file
-        excel_file = create_cv_excel(cv_data_list)
+        # Column widths come from the first batch
+        writer = await asyncio.to_thread(CvExcelWriter, sample)
+        async for batch in batches:
+            await asyncio.to_thread(writer.append, batch)
+        excel_file = await asyncio.to_thread(writer.save)
         
         # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"CV_Export_{timestamp}.xlsx"
         
-        # Return as downloadable file
+        # Return as downloadable file, read back in chunks
         return StreamingResponse(
-            excel_file,
+            iter_file(excel_file),
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
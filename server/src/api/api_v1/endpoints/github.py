@@ -3,7 +3,7 @@ GitHub Enrichment Endpoints
 API endpoints for GitHub data extraction and enrichment
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 from bson import ObjectId
 from typing import Optional
 
@@ -14,7 +14,8 @@ from schemas.github import (
     GitHubData
 )
 from models.cv import CV
-from utils.github_extractor import GitHubExtractor
+from models.github_deferral import GitHubDeferralModel
+from utils.github_extractor import GitHubExtractor, github_extractor
 from config.config import settings
 from datetime import datetime
 import logging
@@ -22,10 +23,12 @@ import logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
+github_deferral_model = GitHubDeferralModel()
 
 
 @router.post("/enrich/{cv_id}", response_model=GitHubEnrichmentResponse)
 async def enrich_github_data(
+    request: Request,
     cv_id: str,
     force_refresh: bool = False
 ):
@@ -40,6 +43,7 @@ async def enrich_github_data(
     5. Return enrichment status
     
     Args:
+        request: Incoming request holding the database handle
         cv_id: MongoDB ObjectId of CV document
         force_refresh: Force refresh even if GitHub data exists
         
@@ -55,15 +59,15 @@ async def enrich_github_data(
             )
         
         # Fetch CV from database
-        cv_data = CV.get_cv_by_id(cv_id)
+        cv_data = await CV.get_cv_by_id(cv_id)
         if not cv_data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"CV with ID {cv_id} not found"
             )
         
-        # Check if already enriched (unless force refresh)
-        if not force_refresh and cv_data.get("githubData"):
+        # Check if already enriched (unless force refresh); deferred enrichments are retried
+        if not force_refresh and cv_data.get("githubData") and cv_data["githubData"].get("fetch_status") != "rate_limited":
             return GitHubEnrichmentResponse(
                 cv_id=cv_id,
                 status="already_enriched",
@@ -87,7 +91,6 @@ async def enrich_github_data(
             )
         
         # Extract username from URL
-        extractor = GitHubExtractor(token=settings.GITHUB_API_TOKEN)
         username = GitHubExtractor.extract_username_from_url(github_url)
         
         if not username:
@@ -102,15 +105,24 @@ async def enrich_github_data(
         logger.info(f"Fetching GitHub data for username: {username}")
         
         # Fetch complete GitHub profile
-        github_data = await extractor.get_complete_profile(username)
+        github_data = await github_extractor.get_complete_profile(username, force_refresh=force_refresh)
         
         # Store in database
-        CV.update_github_data(cv_id, github_data)
+        await CV.update_github_data(cv_id, github_data)
+        if github_data["fetch_status"] == "rate_limited":
+            # The re-enrichment worker retries once the window resets and rescores the CV
+            await github_deferral_model.defer(request, cv_id, username, github_deferral_model.retry_time(github_data))
         
         # Prepare response
         if github_data["fetch_status"] == "success":
             response_status = "success"
             message = f"Successfully enriched CV with GitHub data for user {username}"
+        elif github_data["fetch_status"] == "partial":
+            response_status = "partial"
+            message = f"Partially enriched CV with GitHub data for user {username}: {github_data.get('error')}"
+        elif github_data["fetch_status"] == "rate_limited":
+            response_status = "rate_limited"
+            message = f"GitHub rate limit reached, enrichment will be retried after {github_data.get('retry_at')}"
         elif github_data["fetch_status"] == "user_not_found":
             response_status = "user_not_found"
             message = f"GitHub user '{username}' not found"
@@ -190,7 +202,7 @@ async def get_github_enrichment_status(cv_id: str):
             )
         
         # Fetch CV
-        cv_data = CV.get_cv_by_id(cv_id)
+        cv_data = await CV.get_cv_by_id(cv_id)
         if not cv_data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -241,17 +253,17 @@ async def check_github_rate_limit():
     Check current GitHub API rate limit status
     
     Returns:
-        Rate limit information
+        Rate limit information and the number of requests held back until reset
     """
     try:
-        extractor = GitHubExtractor(token=settings.GITHUB_API_TOKEN)
-        rate_limit = await extractor.check_rate_limit()
+        rate_limit = await github_extractor.check_rate_limit()
         
         return {
             "rate_limit": rate_limit.get("limit"),
             "remaining": rate_limit.get("remaining"),
             "used": rate_limit.get("used"),
             "reset_at": rate_limit.get("reset"),
+            "queued_requests": rate_limit.get("queued", 0),
             "has_token": bool(settings.GITHUB_API_TOKEN)
         }
     except Exception as e:
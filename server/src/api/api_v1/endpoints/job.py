@@ -2,15 +2,24 @@ from fastapi import FastAPI, APIRouter, Request, HTTPException, Query
 from bson.objectid import ObjectId
 from schemas.job import Job,JobCreate
 from models.job import JobModel
+from models.cv import CvModel, job_ranking_model
 from typing import Optional, Any
+from utils.gemini import score_cache
 
 router = APIRouter()
 job_model = JobModel()
+cv_model = CvModel()
+
+# Job fields that feed the scoring prompt
+SCORING_FIELDS = ("jobName", "division", "jobDescription", "criteria")
+
+# Lower bounds of the final mark histogram buckets, the last bucket also holds 100
+MARK_BUCKETS = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100.000001]
 
 @router.post("/create_job")
 async def create_job(request: Request, job: JobCreate):
     try:
-        job_id = job_model.create_job(request, job)
+        job_id = await job_model.create_job(request, job)
         if job_id:
             return {"job_id": str(job_id)}
         else:
@@ -34,7 +43,7 @@ async def fetch_jobs(request: Request,
         filter_dict["jobName"] = jobName
     filter_dict["isDeleted"] = False
     try:
-        jobs =  job_model.fetch_jobs(request, filter_dict)
+        jobs = await job_model.fetch_jobs(request, filter_dict)
         if jobs:
             return {"jobs": jobs}
         else:
@@ -46,7 +55,7 @@ async def fetch_jobs(request: Request,
 @router.delete("/delete_job")
 async def delete_job(request: Request, id: str):
     try:
-        updated_job = job_model.update(request, "_id", ObjectId(id), {"isDeleted": True})
+        updated_job = await job_model.update(request, "_id", ObjectId(id), {"isDeleted": True})
         if updated_job:
             return 
     except Exception as e:
@@ -56,9 +65,103 @@ async def delete_job(request: Request, id: str):
 @router.put("/update_job")
 async def update_job(request: Request, job: dict):
     try:
-        updated_job = job_model.update(request, "_id", ObjectId(job.get("id")), job)
+        previous_job = await job_model.find(request, "_id", ObjectId(job.get("id")))
+        updated_job = await job_model.update(request, "_id", ObjectId(job.get("id")), job)
         if updated_job:
+            # Cached marks were generated against the old description/criteria
+            if previous_job and any(previous_job.get(field) != updated_job.get(field) for field in SCORING_FIELDS):
+                await score_cache.invalidate({"jobId": str(updated_job["_id"])})
             return 
     except Exception as e:
         print("Error updating jobs:", e)
-        raise HTTPException(status_code=400, detail="Error updating jobs")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail="Error updating jobs")
+
+@router.get("/{id}/stats")
+async def job_stats(request: Request, id: str):
+    if not ObjectId.is_valid(id):
+        raise HTTPException(status_code=400, detail="Invalid job ID format")
+    job = await job_model.find(request, "_id", ObjectId(id))
+    if not job or job.get("isDeleted"):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    try:
+        stats = await cv_model.job_stats(request, id, MARK_BUCKETS)
+    except Exception as e:
+        print("Error fetching job stats:", e)
+        raise HTTPException(status_code=400, detail="Error fetching job stats")
+
+    totals = stats["totals"][0] if stats["totals"] else {"candidates": 0, "scored": 0, "selected": 0, "averageMark": None}
+    histogram = {bucket["_id"]: bucket["count"] for bucket in stats["histogram"]}
+    return {
+        "jobId": id,
+        "candidates": totals["candidates"],
+        "scored": totals["scored"],
+        "unscored": totals["candidates"] - totals["scored"],
+        "selected": totals["selected"],
+        "selectionRate": round(totals["selected"] / totals["scored"], 4) if totals["scored"] else None,
+        "averageMark": round(totals["averageMark"], 2) if totals["averageMark"] is not None else None,
+        "markHistogram": [
+            {"from": lower, "to": min(upper, 100), "count": histogram.get(lower, 0)}
+            for lower, upper in zip(MARK_BUCKETS, MARK_BUCKETS[1:])
+        ],
+        "marksOutOfRange": histogram.get("other", 0),
+        "criteriaAverages": {criterion["_id"]: round(criterion["average"], 2) for criterion in stats["criteria"] if criterion["average"] is not None},
+        "mailStatus": {status["_id"]: status["count"] for status in stats["mailStatus"]}
+    }
+
+@router.get("/{id}/ranking")
+async def job_ranking(request: Request, id: str, limit: int = Query(20, ge=1, le=500)):
+    if not ObjectId.is_valid(id):
+        raise HTTPException(status_code=400, detail="Invalid job ID format")
+    job = await job_model.find(request, "_id", ObjectId(id))
+    if not job or job.get("isDeleted"):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    try:
+        summary = await job_ranking_model.get_summary(request, id)
+        candidates = await cv_model.top_ranked(request, id, limit)
+    except Exception as e:
+        print("Error fetching job ranking:", e)
+        raise HTTPException(status_code=400, detail="Error fetching job ranking")
+
+    # Equal marks share a rank and the next distinct mark skips ahead (1, 2, 2, 4)
+    previous_mark = None
+    for position, cv in enumerate(candidates, start=1):
+        if cv.get("finalMark") != previous_mark:
+            rank, previous_mark = position, cv.get("finalMark")
+        cv["rank"] = rank
+
+    return {
+        "jobId": id,
+        "scored": summary["scored"],
+        "selected": summary["selected"],
+        "averageMark": round(summary["markSum"] / summary["scored"], 2) if summary["scored"] else None,
+        "candidates": candidates
+    }
+
+@router.get("/{id}/ranking/{cv_id}")
+async def candidate_rank(request: Request, id: str, cv_id: str):
+    if not ObjectId.is_valid(id) or not ObjectId.is_valid(cv_id):
+        raise HTTPException(status_code=400, detail="Invalid ID format")
+    cv = await cv_model.find(request, "_id", ObjectId(cv_id))
+    if not cv or cv.get("isDeleted") or cv.get("jobId") != id:
+        raise HTTPException(status_code=404, detail="CV not found for this job")
+    if not cv.get("markGenerated"):
+        raise HTTPException(status_code=409, detail="CV has not been scored yet")
+
+    try:
+        ranked_above = await cv_model.count_ranked_above(request, id, cv.get("finalMark") or 0)
+        summary = await job_ranking_model.get_summary(request, id)
+    except Exception as e:
+        print("Error fetching candidate rank:", e)
+        raise HTTPException(status_code=400, detail="Error fetching candidate rank")
+
+    return {
+        "jobId": id,
+        "cvId": cv_id,
+        "candidateName": cv.get("candidateName"),
+        "finalMark": cv.get("finalMark"),
+        "selectedForInterview": cv.get("selectedForInterview"),
+        "rank": ranked_above + 1,
+        "scored": summary["scored"]
+    }
@@ -11,9 +11,12 @@ from utils.mailing.email_templates import (
     send_cv_received_email,
     send_cv_selected_email,
     send_interview_scheduled_email,
-    send_cv_rejection_email
+    send_cv_rejection_email,
+    send_cv_selected_emails,
+    send_cv_rejection_emails
 )
 from bson.objectid import ObjectId
+from typing import Awaitable, Callable, List
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -41,30 +44,48 @@ async def send_cv_received_email_endpoint(email_request: CVSchema):
         raise HTTPException(status_code=500, detail=f"Failed to send email: {str(e)}")
 
 
-@router.post("/send-cv-selected-email")
-async def send_cv_selected_email_endpoint(request: Request,email_request: list[CVSchema]):
-    """Send selection notification email to candidate."""
+async def send_bulk_emails(
+    request: Request,
+    email_request: List[CVSchema],
+    send: Callable[[List[dict]], Awaitable[List[bool]]],
+    mail_status: str
+) -> dict:
+    """Send one templated email per candidate and record mailStatus for the accepted ones in one bulk write."""
+    # Reject malformed ids before anything is sent, so mailStatus can be recorded for every delivered email
+    invalid_ids = [email.id for email in email_request if not ObjectId.is_valid(email.id)]
+    if invalid_ids:
+        raise HTTPException(status_code=400, detail=f"Invalid CV ID format: {', '.join(invalid_ids)}")
+
     successfully_sent_emails = []
     failed_emails = []
-    for email in email_request:
-        try:
-            result = await send_cv_selected_email(
-                recipient_email=email.recipient_email,
-                candidate_name=email.candidate_name,
-                position=email.position,
-                cc_emails=email.cc_emails
-            )
-            if result:
-                successfully_sent_emails.append(email.recipient_email)
-                cv_model.update(request, "_id", ObjectId(email.id), {'mailStatus': 'selection_email_sent'})
-            else:
-                failed_emails.append(email.recipient_email)
-        except Exception as e:
+    try:
+        results = await send([email.dict() for email in email_request])
+    except Exception as e:
+        logger.error(f"Bulk email send failed: {str(e)}")
+        results = [False] * len(email_request)
+
+    sent_updates = []
+    for email, sent in zip(email_request, results):
+        if sent:
+            successfully_sent_emails.append(email.recipient_email)
+            sent_updates.append((ObjectId(email.id), {'mailStatus': mail_status}))
+        else:
             failed_emails.append(email.recipient_email)
-    
+
+    try:
+        await cv_model.bulk_update(request, sent_updates)
+    except Exception as e:
+        # The emails are already out; report them as sent rather than inviting a duplicate retry
+        logger.error(f"Recording mailStatus failed: {str(e)}")
     return {"successfully_sent_emails": successfully_sent_emails, "failed_emails": failed_emails}
 
 
+@router.post("/send-cv-selected-email")
+async def send_cv_selected_email_endpoint(request: Request,email_request: list[CVSchema]):
+    """Send selection notification email to candidate."""
+    return await send_bulk_emails(request, email_request, send_cv_selected_emails, 'selection_email_sent')
+
+
 class InterviewScheduledEmailSchema(BaseModel):
     id: str
     recipient_email: EmailStr
@@ -79,6 +100,8 @@ class InterviewScheduledEmailSchema(BaseModel):
 @router.post("/send-interview-scheduled-email")
 async def send_interview_scheduled_email_endpoint(request: Request, email_request: InterviewScheduledEmailSchema):
     """Send interview schedule email to candidate."""
+    if not ObjectId.is_valid(email_request.id):
+        raise HTTPException(status_code=400, detail="Invalid CV ID format")
     try:
         result = await send_interview_scheduled_email(
             recipient_email=email_request.recipient_email,
@@ -101,7 +124,7 @@ async def send_interview_scheduled_email_endpoint(request: Request, email_reques
             }
         }
         if result:
-            cv_model.update(request, "_id", ObjectId(email_request.id), update_data)
+            await cv_model.update(request, "_id", ObjectId(email_request.id), update_data)
             return result
         else:
             raise HTTPException(status_code=500, detail="Failed to send interview scheduled email")
@@ -111,25 +134,7 @@ async def send_interview_scheduled_email_endpoint(request: Request, email_reques
 @router.post("/send-cv-rejection-email")
 async def send_cv_rejection_email_endpoint(request: Request, email_request: list[CVSchema]):
     """Send rejection email to candidate."""
-    successfully_sent_emails = []
-    failed_emails = []
-    for email in email_request:
-        try:
-            result = await send_cv_rejection_email(
-                recipient_email=email.recipient_email,
-                candidate_name=email.candidate_name,
-                position=email.position,
-                cc_emails=email.cc_emails
-            )
-            if result:
-                successfully_sent_emails.append(email.recipient_email)
-                cv_model.update(request, "_id", ObjectId(email.id), {'mailStatus': 'rejection_email_sent'})
-            else:
-                failed_emails.append(email.recipient_email)
-        except Exception as e:
-            failed_emails.append(email.recipient_email)
-    
-    return {"successfully_sent_emails": successfully_sent_emails, "failed_emails": failed_emails}
+    return await send_bulk_emails(request, email_request, send_cv_rejection_emails, 'rejection_email_sent')
     
 # @router.post("/send-email-gmail/")
 # async def send_email_endpoint(email_request: EmailSchema):
@@ -7,6 +7,8 @@ from utils.gemini import GeminiPDFExtractor
 from bson.objectid import ObjectId
 from schemas.pdf import Pdf,PdfBase
 from models.pdf import PdfModel
+from config.config import settings
+from utils.upload_storage import UploadTooLarge, check_upload, open_zip, pdf_members, store_upload, store_zip_member
 
 router = APIRouter()
 pdf_model = PdfModel()
@@ -17,47 +19,74 @@ file_path = os.path.join(base_dir, f"../../../data")
 UPLOAD_DIR = Path(file_path)
 UPLOAD_DIR.mkdir(exist_ok=True)
 
+async def _discard(request: Request, pdf_id: str, path: Path):
+    """Remove the record and partial file of an upload that could not be stored"""
+    try:
+        await pdf_model.delete_many(request, [ObjectId(pdf_id)])
+    except Exception as cleanup_error:
+        print("Error discarding rejected upload:", cleanup_error)
+    path.unlink(missing_ok=True)
+
+
 @router.post("/upload_file")
 async def upload_file(request: Request, file: UploadFile = File(...)):
     gemini_extractor = GeminiPDFExtractor()
+    if not file.filename.endswith((".pdf", ".zip")):
+        raise HTTPException(status_code=400, detail="Only PDF or ZIP files are allowed.")
     try:
+        # Declared sizes and archive limits are checked before any record is created
+        check_upload(file)
         if file.filename.endswith(".pdf"):
-            new_pdf_id = pdf_model.create_pdf(request, {"pdfName":file.filename})
+            new_pdf_id = await pdf_model.create_pdf(request, {"pdfName":file.filename})
             file_path = UPLOAD_DIR / f"{new_pdf_id}_{file.filename}"
-            with open(file_path, "wb") as f:
-                shutil.copyfileobj(file.file, f)
-            extract = await gemini_extractor.extract_and_structure_pdf(f"{new_pdf_id}_{file.filename}")
-            update_pdf = pdf_model.update(request, "_id", ObjectId(new_pdf_id), {"resumeContent": extract})
+            try:
+                await store_upload(file, file_path, settings.UPLOAD_MAX_FILE_BYTES)
+            except Exception:
+                await _discard(request, new_pdf_id, file_path)
+                raise
+            try:
+                extract = await gemini_extractor.extract_and_structure_pdf(f"{new_pdf_id}_{file.filename}")
+                update_pdf = await pdf_model.update(request, "_id", ObjectId(new_pdf_id), {"resumeContent": extract})
+            except Exception as e:
+                # The stored file and its record stay, only the extraction is reported
+                print("Error extracting pdf:", e)
+                raise HTTPException(status_code=502, detail=f"{file.filename} was stored but could not be extracted")
             return {"filename": file.filename, "saved_path": str(file_path)}
 
-        elif file.filename.endswith(".zip"):
-            # Save ZIP temporarily
-            zip_path = UPLOAD_DIR / file.filename
-            with open(zip_path, "wb") as f:
-                shutil.copyfileobj(file.file, f)
-
-
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                for member in zip_ref.namelist():
-                    if member.lower().endswith(".pdf"):
-                        original_name = Path(member).stem
-                        new_pdf_id = pdf_model.create_pdf(request, {"pdfName":f"{original_name}.pdf"})
-                        new_filename = f"{new_pdf_id}_{original_name}.pdf"
-                        new_file_path = UPLOAD_DIR / new_filename
-
-                        with zip_ref.open(member) as source, open(new_file_path, "wb") as target:
-                            shutil.copyfileobj(source, target)
+        else:
+            saved_paths = []
+            failed = []
+            with open_zip(file) as zip_ref:
+                for member in pdf_members(zip_ref):
+                    original_name = Path(member.filename).stem
+                    new_pdf_id = await pdf_model.create_pdf(request, {"pdfName":f"{original_name}.pdf"})
+                    new_filename = f"{new_pdf_id}_{original_name}.pdf"
+                    new_file_path = UPLOAD_DIR / new_filename
+                    try:
+                        await store_zip_member(zip_ref, member, new_file_path)
+                    except Exception as e:
+                        # Only this member is dropped, the ones stored before it are kept
+                        await _discard(request, new_pdf_id, new_file_path)
+                        failed.append({"filename": member.filename, "error": str(e)})
+                        continue
+                    saved_paths.append(str(new_file_path))
+                    try:
                         extract = await gemini_extractor.extract_and_structure_pdf(new_filename)
-                        update_pdf = pdf_model.update(request, "_id", ObjectId(new_pdf_id), {"resumeContent": extract})
+                        update_pdf = await pdf_model.update(request, "_id", ObjectId(new_pdf_id), {"resumeContent": extract})
+                    except Exception as e:
+                        print("Error extracting pdf:", e)
+                        failed.append({"filename": member.filename, "error": "Stored but could not be extracted"})
 
-            os.remove(zip_path)
             return {
                 "filename": file.filename,
-                "saved_path": str(zip_path)
+                "saved_paths": saved_paths,
+                "failed": failed
             }
 
-        else:
-            raise HTTPException(status_code=400, detail="Only PDF or ZIP files are allowed.")
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         print("Error uploading pdf:", e)
         raise HTTPException(status_code=400, detail="Error")
@@ -18,7 +18,7 @@ user_model = UserModel()
 
 @router.get('/', response_description="Get users", response_model=List[User])
 async def read_users(request: Request, limit: Optional[int] = None):
-     users = user_model.list_users(request)
+     users = await user_model.list_users(request)
      
      if users:
           return users 
@@ -37,7 +37,7 @@ async def register(request: Request, payload: UserBase) -> UserBase:
     payload.updatedAt = payload.createdAt
         
     
-    new_user_id = user_model.create_user(request, payload)
+    new_user_id = await user_model.create_user(request, payload)
     
     return JSONResponse(
         status_code=status.HTTP_200_OK
@@ -6,6 +6,15 @@ import os
 from config.config import settings
 from config.database import Database
 from api.api_v1.router import router
+from utils.upload_worker import upload_worker
+from utils.mail_outbox import mail_outbox
+from utils.pdf_links import shutdown_executor as shutdown_pdf_link_executor
+from utils.gemini_files import gemini_file_store
+from config.indexes import ensure_indexes
+from utils.github_extractor import GitHubExtractor
+from utils.gemini import GeminiPDFExtractor
+from utils.github_reenrichment import github_reenrichment
+from utils.mailing.ms_graph import graph_email_service
 
 
 app = FastAPI(
@@ -39,12 +48,27 @@ async def app_init():
           app.db = database.connect()
           app.db_client = database.get_client()
           print("You successfully connected to MongoDB!")
+          await ensure_indexes(app.db)
      except ConnectionError as e:
           print(str(e))
+     GitHubExtractor.open_client()
+     GeminiPDFExtractor.open_client()
+     await mail_outbox.start(app)
+     await gemini_file_store.start()
+     await upload_worker.start(app)
+     await github_reenrichment.start(app)
 
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+     await github_reenrichment.stop()
+     await upload_worker.stop()
+     await mail_outbox.stop()
+     await gemini_file_store.stop()
+     shutdown_pdf_link_executor()
+     await GitHubExtractor.close_client()
+     await GeminiPDFExtractor.close_client()
+     await graph_email_service.close_client()
      app.db_client.close()
 
 
@@ -29,6 +29,13 @@ class ServerSettings(BaseSettings):
 class DatabaseSettings(BaseSettings):
      DB_URI: str = env.get('MONGO_URI')
      DB_NAME: str = env.get('DB_NAME')
+     DB_MAX_POOL_SIZE: int = int(env.get('DB_MAX_POOL_SIZE', 100))
+     DB_MIN_POOL_SIZE: int = int(env.get('DB_MIN_POOL_SIZE', 1))
+     DB_MAX_CONNECTING: int = int(env.get('DB_MAX_CONNECTING', 2))
+     DB_MAX_IDLE_TIME_MS: int = int(env.get('DB_MAX_IDLE_TIME_MS', 30000))
+     DB_SERVER_SELECTION_TIMEOUT_MS: int = int(env.get('DB_SERVER_SELECTION_TIMEOUT_MS', 5000))
+     DB_CONNECT_TIMEOUT_MS: int = int(env.get('DB_CONNECT_TIMEOUT_MS', 60000))
+     DB_SOCKET_TIMEOUT_MS: int = int(env.get('DB_SOCKET_TIMEOUT_MS', 60000))
      
      class Config:
           case_sensitive = True
@@ -38,11 +45,91 @@ class GitHubSettings(BaseSettings):
      GITHUB_API_VERSION: str = "2022-11-28"
      GITHUB_TIMEOUT: int = 10
      GITHUB_CACHE_TTL: int = 86400  # 24 hours in seconds
+     GITHUB_CACHE_RETENTION: int = 86400 * 7  # keep expired profiles a week for conditional refreshes
+     GITHUB_CACHE_MAX_ENTRIES: int = 2048
+     GITHUB_HTTP2: bool = True
+     GITHUB_MAX_CONNECTIONS: int = 20
+     GITHUB_MAX_KEEPALIVE_CONNECTIONS: int = 10
+     GITHUB_KEEPALIVE_EXPIRY: float = 60.0  # seconds an idle connection is kept open
+     GITHUB_RATE_LIMIT_PACE_FRACTION: float = 0.1  # spread requests evenly once this share of the budget is left
+     GITHUB_RATE_LIMIT_MAX_WAIT: int = 15  # longest a request is held for budget, kept well below proxy timeouts; longer waits are deferred
+     # Enrichments deferred by the rate limit are retried after the reset, then the CV is rescored
+     GITHUB_DEFERRED_POLL_INTERVAL: int = 60
+     GITHUB_DEFERRED_BATCH_SIZE: int = 50
+     GITHUB_DEFERRED_MAX_ATTEMPTS: int = 5
+     GITHUB_DEFERRED_RETRY_DELAY: int = 300  # used when GitHub reported no reset time or the retry failed
      
      class Config:
           case_sensitive = True
 
-class Settings(CommonSettings, ServerSettings, DatabaseSettings, GitHubSettings):
+class MailSettings(BaseSettings):
+     MAIL_TIMEOUT: int = 30
+     MAIL_MAX_CONNECTIONS: int = 10
+     MAIL_MAX_KEEPALIVE_CONNECTIONS: int = 5
+     MAIL_BATCH_CONCURRENCY: int = 4  # concurrent Graph $batch calls, Graph allows 4 per mailbox
+     MAIL_TOKEN_REFRESH_MARGIN: int = 300  # refresh the Graph access token this many seconds before it expires
+     MAIL_OUTBOX_BATCH_SIZE: int = 100  # queued emails claimed per delivery round
+     MAIL_OUTBOX_MAX_ATTEMPTS: int = 5
+     MAIL_OUTBOX_RETRY_BASE_DELAY: int = 30  # seconds before the first retry, doubled on every further failure
+     MAIL_OUTBOX_RETRY_MAX_DELAY: int = 3600
+     MAIL_OUTBOX_POLL_INTERVAL: int = 15  # seconds between checks for retries that came due
+     
+     class Config:
+          case_sensitive = True
+
+class UploadSettings(BaseSettings):
+     UPLOAD_MAX_FILE_BYTES: int = int(env.get('UPLOAD_MAX_FILE_BYTES', 20 * 1024 * 1024))  # per PDF, uploaded or inside a ZIP
+     UPLOAD_MAX_ARCHIVE_BYTES: int = int(env.get('UPLOAD_MAX_ARCHIVE_BYTES', 512 * 1024 * 1024))
+     UPLOAD_MAX_ZIP_MEMBERS: int = int(env.get('UPLOAD_MAX_ZIP_MEMBERS', 2000))
+     UPLOAD_MAX_ZIP_UNCOMPRESSED_BYTES: int = int(env.get('UPLOAD_MAX_ZIP_UNCOMPRESSED_BYTES', 2 * 1024 * 1024 * 1024))
+     
+     class Config:
+          case_sensitive = True
+
+class ExportSettings(BaseSettings):
+     EXPORT_BATCH_SIZE: int = int(env.get('EXPORT_BATCH_SIZE', 500))  # CVs fetched per cursor round-trip
+     
+     class Config:
+          case_sensitive = True
+
+class PipelineSettings(BaseSettings):
+     # Maximum number of CVs allowed in each stage of the ingestion pipeline at once
+     PIPELINE_GEMINI_CONCURRENCY: int = int(env.get('PIPELINE_GEMINI_CONCURRENCY', 4))
+     PIPELINE_GITHUB_CONCURRENCY: int = int(env.get('PIPELINE_GITHUB_CONCURRENCY', 8))
+     PIPELINE_MONGO_CONCURRENCY: int = int(env.get('PIPELINE_MONGO_CONCURRENCY', 10))
+     # CVs of the same job scored in one Gemini prompt (1 disables batching)
+     SCORING_BATCH_SIZE: int = int(env.get('SCORING_BATCH_SIZE', 8))
+     # How long a CV ready for scoring waits for others to fill its batch
+     SCORING_BATCH_WAIT_MS: int = int(env.get('SCORING_BATCH_WAIT_MS', 2000))
+     # Number of upload batches processed in the background at the same time
+     UPLOAD_WORKER_COUNT: int = int(env.get('UPLOAD_WORKER_COUNT', 1))
+     # Processes reading link annotations out of uploaded PDFs
+     PDF_LINK_WORKERS: int = int(env.get('PDF_LINK_WORKERS', 2))
+     # Send the local text layer to Gemini instead of uploading the PDF, when the document averages at least
+     # PDF_TEXT_MIN_CHARS_PER_PAGE characters per page and at most PDF_TEXT_MAX_EMPTY_PAGE_SHARE of its pages have no text
+     GEMINI_TEXT_EXTRACTION: bool = env.get('GEMINI_TEXT_EXTRACTION', 'true').lower() == 'true'
+     PDF_TEXT_MIN_CHARS_PER_PAGE: int = int(env.get('PDF_TEXT_MIN_CHARS_PER_PAGE', 100))
+     PDF_TEXT_MAX_EMPTY_PAGE_SHARE: float = float(env.get('PDF_TEXT_MAX_EMPTY_PAGE_SHARE', 0.5))
+     # Uploaded PDFs are reused by content hash and deleted once unused for GEMINI_FILE_RETENTION seconds
+     GEMINI_FILE_RETENTION: int = int(env.get('GEMINI_FILE_RETENTION', 3600))
+     GEMINI_FILE_EXPIRY_MARGIN: int = int(env.get('GEMINI_FILE_EXPIRY_MARGIN', 600))
+     GEMINI_FILE_SWEEP_INTERVAL: int = int(env.get('GEMINI_FILE_SWEEP_INTERVAL', 300))
+     
+     class Config:
+          case_sensitive = True
+
+class CacheSettings(BaseSettings):
+     # Entries kept in the in-process LRU in front of each Mongo-backed cache
+     EXTRACTION_CACHE_MAX_ENTRIES: int = int(env.get('EXTRACTION_CACHE_MAX_ENTRIES', 1024))
+     SCORE_CACHE_MAX_ENTRIES: int = int(env.get('SCORE_CACHE_MAX_ENTRIES', 4096))
+     # Seconds a job ranking summary is served before it is recounted from the job's CVs; the recount only
+     # corrects drift left by a crash between a CV write and its $inc, the summary is kept current without it
+     RANKING_SUMMARY_MAX_AGE: int = int(env.get('RANKING_SUMMARY_MAX_AGE', 300))
+     
+     class Config:
+          case_sensitive = True
+
+class Settings(CommonSettings, ServerSettings, DatabaseSettings, GitHubSettings, MailSettings, UploadSettings, ExportSettings, PipelineSettings, CacheSettings):
      pass
 
 
@@ -1,8 +1,12 @@
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 
 from config.config import settings
 
 class Database:
+     # Shared across the application so every model reuses the same connection pool
+     _client = None
+     _db = None
+     
      def __init__(self):
           self.db_uri = settings.DB_URI
           self.db_name = settings.DB_NAME
@@ -11,16 +15,19 @@ class Database:
      
      def connect(self):
           try:
-               self.client = MongoClient(
+               self.client = AsyncIOMotorClient(
                     self.db_uri,
-                    serverSelectionTimeoutMS=5000,
-                    connectTimeoutMS=60000,
-                    socketTimeoutMS=60000,
-                    maxPoolSize=10,
-                    minPoolSize=1,
-                    maxIdleTimeMS=30000 # Close idle connections after 30s
+                    serverSelectionTimeoutMS=settings.DB_SERVER_SELECTION_TIMEOUT_MS,
+                    connectTimeoutMS=settings.DB_CONNECT_TIMEOUT_MS,
+                    socketTimeoutMS=settings.DB_SOCKET_TIMEOUT_MS,
+                    maxPoolSize=settings.DB_MAX_POOL_SIZE,
+                    minPoolSize=settings.DB_MIN_POOL_SIZE,
+                    maxIdleTimeMS=settings.DB_MAX_IDLE_TIME_MS, # Close idle connections after this long
+                    maxConnecting=settings.DB_MAX_CONNECTING
                )
-               return self.client[self.db_name]
+               Database._client = self.client
+               Database._db = self.client[self.db_name]
+               return Database._db
           except Exception as e:
                raise ConnectionError(f"Error connecting to database: {e}") from e
      
@@ -29,5 +36,11 @@ class Database:
           if not self.client:
                raise ConnectionError("Database client is not connected")
           return self.client
+     
+     @staticmethod
+     def get_db():
+          if Database._db is None:
+               raise ConnectionError("Database client is not connected")
+          return Database._db
 
 
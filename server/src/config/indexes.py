@@ -0,0 +1,76 @@
+import logging
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# List queries always filter isDeleted: False, so their indexes skip deleted documents
+ACTIVE = {"isDeleted": False}
+
+# Every index the application relies on, keyed by collection and created at startup
+INDEXES = {
+     "cvs": [
+          # fetch_cvs without filters, newest first, and its (createdAt, _id) cursor
+          IndexModel([("createdAt", DESCENDING), ("_id", DESCENDING)], name="active_recent", partialFilterExpression=ACTIVE),
+          IndexModel([("jobName", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)], name="active_job_recent", partialFilterExpression=ACTIVE),
+          IndexModel([("division", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)], name="active_division_recent", partialFilterExpression=ACTIVE),
+          IndexModel([("candidateName", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)], name="active_candidate_recent_id", partialFilterExpression=ACTIVE),
+          # Per-job dashboard $match and marks ordered within a job
+          IndexModel([("jobId", ASCENDING), ("finalMark", DESCENDING)], name="active_job_marks", partialFilterExpression=ACTIVE)
+     ],
+     "jobs": [
+          IndexModel([("division", ASCENDING), ("jobName", ASCENDING)], name="active_division_job", partialFilterExpression=ACTIVE),
+          # exist_job looks names up regardless of isDeleted
+          IndexModel([("jobName", ASCENDING)], name="job_name")
+     ],
+     "upload_batches": [
+          IndexModel([("status", ASCENDING), ("createdAt", ASCENDING)], name="status_created")
+     ],
+     "email_outbox": [
+          IndexModel([("status", ASCENDING), ("nextAttemptAt", ASCENDING)], name="status_next_attempt"),
+          IndexModel([("claimId", ASCENDING)], name="claim", sparse=True),
+          # Received emails already queued for a CV when a batch is resumed
+          IndexModel([("cvId", ASCENDING), ("kind", ASCENDING)], name="cv_kind")
+     ],
+     "gemini_files": [
+          IndexModel([("deleteAfter", ASCENDING)], name="delete_after"),
+          IndexModel([("expiresAt", ASCENDING)], name="expires_at")
+     ],
+     "github_deferrals": [
+          IndexModel([("retryAt", ASCENDING)], name="retry_at")
+     ],
+     "github_cache": [
+          # Removes profiles once their retention period has passed
+          IndexModel([("expiresAt", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0)
+     ],
+     "score_cache": [
+          # Invalidation when a job's scoring inputs change
+          IndexModel([("jobId", ASCENDING)], name="job_id")
+     ]
+}
+
+# Indexes replaced by a differently keyed definition, dropped at startup once the replacement exists
+RETIRED_INDEXES = {
+     "cvs": ["active_candidate_recent"]
+}
+
+async def ensure_indexes(db) -> None:
+     """
+          create the registered indexes, existing ones are left untouched;
+          a conflicting definition is logged and does not stop startup
+     """
+     for collection, indexes in INDEXES.items():
+          try:
+               await db[collection].create_indexes(indexes)
+          except PyMongoError as e:
+               logger.warning(f"Index creation failed for {collection}: {e}")
+               continue
+          for name in RETIRED_INDEXES.get(collection, []):
+               try:
+                    await db[collection].drop_index(name)
+               except OperationFailure:
+                    # Already dropped, or never created on this deployment
+                    pass
+               except PyMongoError as e:
+                    logger.warning(f"Dropping index {name} on {collection} failed: {e}")
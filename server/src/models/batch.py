@@ -0,0 +1,42 @@
+from fastapi import Request
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from typing import Union, Dict, Any, Optional, List
+from datetime import datetime, timezone
+
+class BatchModel():
+     collection: str = "upload_batches"
+     
+     def get_collection(self, request: Request):
+          return request.app.db[self.collection]
+     
+     async def create_batch(self, request: Request, batch: dict):
+          new_batch = await self.get_collection(request).insert_one(batch)
+          
+          if new_batch:
+               return new_batch.inserted_id
+     
+     async def find(self, request: Request, field: str, value) -> Optional[Dict[str, Any]]:
+          batch = await self.get_collection(request).find_one({field: value})
+          if batch:
+               batch["id"] = str(batch["_id"])
+               del batch["_id"]
+               return batch
+     
+     async def find_unfinished(self, request: Request) -> List[Dict[str, Any]]:
+          batches = await self.get_collection(request).find({"status": {"$in": ["queued", "processing"]}}, {"_id": 1}).sort({"createdAt": 1}).to_list(length=None)
+          return [str(batch["_id"]) for batch in batches]
+     
+     async def set_status(self, request: Request, batch_id: Union[str, ObjectId], status: str, data: Optional[dict] = None):
+          data = dict(data or {})
+          data["status"] = status
+          data["updatedAt"] = datetime.now(timezone.utc)
+          await self.get_collection(request).update_one({"_id": ObjectId(batch_id)}, {"$set": data})
+     
+     async def set_file_stage(self, request: Request, batch_id: Union[str, ObjectId], index: int, stage: str, error: Optional[str] = None):
+          data = {
+               f"files.{index}.stage": stage,
+               f"files.{index}.error": error,
+               "updatedAt": datetime.now(timezone.utc)
+          }
+          await self.get_collection(request).update_one({"_id": ObjectId(batch_id)}, {"$set": data})
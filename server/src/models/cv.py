@@ -1,58 +1,187 @@
+import base64
 from fastapi import Request
 from bson.objectid import ObjectId
 from uuid import UUID, uuid4
 from pydantic import Field, EmailStr
-from pymongo import ReturnDocument
-from typing import Union, Dict, Any, Optional
+from pymongo import ReturnDocument, UpdateOne
+from typing import Union, Dict, Any, Optional, List, Tuple, AsyncIterator
 from config.database import Database
 from schemas.cv import cvCreate, Cv
+from models.ranking import JobRankingModel
 from datetime import datetime, timezone
+# Fields whose change moves a CV within its job's ranking summary
+RANKING_FIELDS = {"finalMark", "markGenerated", "selectedForInterview", "isDeleted", "jobId"}
+job_ranking_model = JobRankingModel()
+
 class CvModel():
      collection: str = "cvs"
      
      def get_collection(self, request: Request):
           return request.app.db[self.collection]
      
-     def fetch_cvs(self, request: Request, filter_dict: Optional[dict] = None) -> Cv:
-          cvs = list(self.get_collection(request).find(filter_dict).sort({"createdAt": -1}))
+     async def fetch_cvs(self, request: Request, filter_dict: Optional[dict] = None, projection: Optional[dict] = None) -> Cv:
+          cvs = await self.get_collection(request).find(filter_dict, projection).sort({"createdAt": -1, "_id": -1}).to_list(length=None)
           for cv in cvs:
                cv["id"] = str(cv["_id"]) 
                del cv["_id"]
           return cvs
      
-     def list_cvs(self, request: Request) -> list:
-          cvs = list(self.get_collection(request).find())
+     async def fetch_cvs_page(self, request: Request, filter_dict: dict, limit: int, cursor: Optional[str] = None, projection: Optional[dict] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+          """
+          Keyset page of CVs, newest first, continuing after the CV encoded in cursor
+
+          Returns:
+               The CVs of the page and the cursor of the next page (None on the last page)
+          """
+          query = dict(filter_dict)
+          if cursor:
+               created_at, last_id = self.decode_cursor(cursor)
+               if created_at is None:
+                    # CVs without createdAt sort after every dated CV
+                    query["createdAt"] = None
+                    query["_id"] = {"$lt": last_id}
+               else:
+                    # One range on the (createdAt, _id) index instead of an $or, so the page is read in index
+                    # order without an in-memory sort. Not after created_at also takes the undated CVs, which
+                    # sort last; the CVs sharing created_at up to the previous page's last one are skipped.
+                    query["createdAt"] = {"$not": {"$gt": created_at}}
+                    query["$nor"] = [{"createdAt": created_at, "_id": {"$gte": last_id}}]
+          if projection is not None:
+               projection = {**projection, "createdAt": 1}
+          cvs = await self.get_collection(request).find(query, projection).sort({"createdAt": -1, "_id": -1}).limit(limit + 1).to_list(length=None)
+
+          next_cursor = None
+          if len(cvs) > limit:
+               cvs = cvs[:limit]
+               next_cursor = self.encode_cursor(cvs[-1].get("createdAt"), cvs[-1]["_id"])
+          for cv in cvs:
+               cv["id"] = str(cv["_id"])
+               del cv["_id"]
+          return cvs, next_cursor
+     
+     @staticmethod
+     def encode_cursor(created_at: Optional[datetime], cv_id: ObjectId) -> str:
+          value = f"{created_at.isoformat() if created_at else ''}|{cv_id}"
+          return base64.urlsafe_b64encode(value.encode()).decode()
+     
+     @staticmethod
+     def decode_cursor(cursor: str) -> Tuple[Optional[datetime], ObjectId]:
+          """Raises ValueError for a cursor not produced by encode_cursor"""
+          try:
+               created_at, cv_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+               return (datetime.fromisoformat(created_at) if created_at else None), ObjectId(cv_id)
+          except Exception:
+               raise ValueError("Invalid cursor")
+     
+     async def list_cvs(self, request: Request) -> list:
+          cvs = await self.get_collection(request).find().to_list(length=None)
           for cv in cvs:
                cv["id"] = str(cv["_id"]) 
           return cv
 
 
-     def list_cv(self, request: Request) -> list:
-          cvs = list(self.get_collection(request).find({'userType':'teacher'}))
+     async def list_cv(self, request: Request) -> list:
+          cvs = await self.get_collection(request).find({'userType':'teacher'}).to_list(length=None)
           for cv in cvs:
                cv["id"] = str(cv["_id"]) 
           return cv
           
      
-     def find(self, request: Request, field: str, value) -> Cv:
-          cv = self.get_collection(request).find_one({field: value})
+     async def iter_by_ids(self, request: Request, cv_ids: List[ObjectId], projection: Optional[dict] = None, batch_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+          """Stream the CVs with the given ids through one $in cursor, batch_size documents per round-trip"""
+          cursor = self.get_collection(request).find({"_id": {"$in": cv_ids}}, projection, batch_size=batch_size)
+          async for cv in cursor:
+               cv["id"] = str(cv["_id"])
+               yield cv
+     
+     async def job_stats(self, request: Request, job_id: str, mark_buckets: List[float]) -> Dict[str, Any]:
+          """Aggregate candidate, scoring, selection and mail figures for one job in a single pipeline"""
+          scored = {"$match": {"markGenerated": True}}
+          pipeline = [
+               # Served by the partial (jobId, finalMark) index on active CVs
+               {"$match": {"jobId": job_id, "isDeleted": False}},
+               {"$facet": {
+                    "totals": [{"$group": {
+                         "_id": None,
+                         "candidates": {"$sum": 1},
+                         "scored": {"$sum": {"$cond": [{"$eq": ["$markGenerated", True]}, 1, 0]}},
+                         "selected": {"$sum": {"$cond": [{"$eq": ["$selectedForInterview", True]}, 1, 0]}},
+                         "averageMark": {"$avg": {"$cond": [{"$eq": ["$markGenerated", True]}, "$finalMark", None]}}
+                    }}],
+                    "histogram": [
+                         scored,
+                         {"$bucket": {"groupBy": "$finalMark", "boundaries": mark_buckets, "default": "other", "output": {"count": {"$sum": 1}}}}
+                    ],
+                    "criteria": [
+                         scored,
+                         {"$project": {"criteria": {"$objectToArray": {"$ifNull": ["$comparisonResults", {}]}}}},
+                         {"$unwind": "$criteria"},
+                         {"$group": {"_id": "$criteria.k", "average": {"$avg": "$criteria.v.mark"}}},
+                         {"$sort": {"_id": 1}}
+                    ],
+                    "mailStatus": [
+                         {"$group": {"_id": {"$ifNull": ["$mailStatus", "none"]}, "count": {"$sum": 1}}},
+                         {"$sort": {"_id": 1}}
+                    ]
+               }}
+          ]
+          result = await self.get_collection(request).aggregate(pipeline).to_list(length=1)
+          return result[0]
+     
+     async def top_ranked(self, request: Request, job_id: str, limit: int) -> List[Dict[str, Any]]:
+          """Highest marked scored CVs of a job, read in (jobId, finalMark desc) index order"""
+          cvs = await self.get_collection(request).find(
+               {"jobId": job_id, "isDeleted": False, "markGenerated": True},
+               {"candidateName": 1, "cvName": 1, "finalMark": 1, "selectedForInterview": 1, "mailStatus": 1}
+          ).sort({"finalMark": -1}).limit(limit).to_list(length=None)
+          for cv in cvs:
+               cv["id"] = str(cv["_id"])
+               del cv["_id"]
+          return cvs
+     
+     async def count_ranked_above(self, request: Request, job_id: str, final_mark: float) -> int:
+          # Unscored CVs keep finalMark 0, so they never rank above a scored one
+          return await self.get_collection(request).count_documents(
+               {"jobId": job_id, "isDeleted": False, "finalMark": {"$gt": final_mark}}
+          )
+     
+     async def find(self, request: Request, field: str, value) -> Cv:
+          cv = await self.get_collection(request).find_one({field: value})
           if cv:
                cv["id"] = str(cv["_id"])
                return cv
           
-     def create_cv(self, request: Request, cv: cvCreate):
-          new_cv = self.get_collection(request).insert_one(cv)
+     async def create_cv(self, request: Request, cv: cvCreate):
+          new_cv = await self.get_collection(request).insert_one(cv)
           
           if new_cv:
                return new_cv.inserted_id
      
-     def update(self, request: Request, filter: str, value: Union[str, ObjectId], data)-> Optional[Dict[str, Any]]:
+     async def update(self, request: Request, filter: str, value: Union[str, ObjectId], data)-> Optional[Dict[str, Any]]:
           data['updatedAt'] = datetime.now(timezone.utc)
-          updated_cv = self.get_collection(request).find_one_and_update(
-               {filter : value}, 
-               {'$set': data},
-               return_document=ReturnDocument.AFTER
-          )
+          if RANKING_FIELDS.isdisjoint(data):
+               updated_cv = await self.get_collection(request).find_one_and_update(
+                    {filter : value}, 
+                    {'$set': data},
+                    return_document=ReturnDocument.AFTER
+               )
+          else:
+               # The previous ranking fields move this CV's share of the job ranking summary. The write only
+               # applies while they are still the ones read, so a concurrent mark change is never counted twice.
+               while True:
+                    previous_cv = await self.get_collection(request).find_one({filter : value}, {field: 1 for field in RANKING_FIELDS})
+                    if previous_cv is None:
+                         updated_cv = None
+                         break
+                    unchanged = {field: previous_cv.get(field) for field in RANKING_FIELDS}
+                    updated_cv = await self.get_collection(request).find_one_and_update(
+                         {**unchanged, "_id": previous_cv["_id"]},
+                         {'$set': data},
+                         return_document=ReturnDocument.AFTER
+                    )
+                    if updated_cv:
+                         await job_ranking_model.apply_change(request, previous_cv, updated_cv)
+                         break
           
           if updated_cv:
                updated_cv["id"] = str(updated_cv["_id"])
@@ -60,8 +189,23 @@ class CvModel():
           else:
                return False
           
-     def get_github_data(self, request: Request, cv_id: str) -> Optional[Dict[str, Any]]:
-          cv = self.get_collection(request).find_one(
+     async def bulk_update(self, request: Request, updates: List[Tuple[ObjectId, Dict[str, Any]]]) -> int:
+          """Apply per-CV $set updates in a single unordered bulk write, returns the matched count"""
+          return await self.bulk_update_if(request, [(cv_id, data, {}) for cv_id, data in updates])
+     
+     async def bulk_update_if(self, request: Request, updates: List[Tuple[ObjectId, Dict[str, Any], Dict[str, Any]]]) -> int:
+          """Apply per-CV $set updates to the CVs still matching their condition, returns the matched count"""
+          if not updates:
+               return 0
+          now = datetime.now(timezone.utc)
+          result = await self.get_collection(request).bulk_write(
+               [UpdateOne({**condition, "_id": cv_id}, {'$set': {**data, 'updatedAt': now}}) for cv_id, data, condition in updates],
+               ordered=False
+          )
+          return result.matched_count
+     
+     async def get_github_data(self, request: Request, cv_id: str) -> Optional[Dict[str, Any]]:
+          cv = await self.get_collection(request).find_one(
                {"_id": ObjectId(cv_id)},
                {"githubData": 1}
           )
@@ -73,7 +217,7 @@ class CV:
      """Static methods for CV operations without Request dependency"""
      
      @staticmethod
-     def get_cv_by_id(cv_id: str) -> Optional[Dict[str, Any]]:
+     async def get_cv_by_id(cv_id: str) -> Optional[Dict[str, Any]]:
           """
           Get CV document by ID
           
@@ -84,11 +228,11 @@ class CV:
                CV document or None
           """
           db = Database.get_db()
-          cv = db["cvs"].find_one({"_id": ObjectId(cv_id)})
+          cv = await db["cvs"].find_one({"_id": ObjectId(cv_id)})
           return cv
      
      @staticmethod
-     def update_github_data(cv_id: str, github_data: Dict[str, Any]) -> bool:
+     async def update_github_data(cv_id: str, github_data: Dict[str, Any]) -> bool:
           """
           Update CV document with GitHub enrichment data
           
@@ -100,7 +244,7 @@ class CV:
                True if successful, False otherwise
           """
           db = Database.get_db()
-          result = db["cvs"].update_one(
+          result = await db["cvs"].update_one(
                {"_id": ObjectId(cv_id)},
                {
                     "$set": {
@@ -0,0 +1,41 @@
+from fastapi import Request
+from bson.objectid import ObjectId
+from typing import Dict, Any, Optional, List, Union
+from datetime import datetime, timedelta, timezone
+from config.config import settings
+
+class GitHubDeferralModel():
+     """CVs whose GitHub enrichment was held back by the rate limit, keyed by CV id"""
+     collection: str = "github_deferrals"
+     
+     def get_collection(self, request: Request):
+          return request.app.db[self.collection]
+     
+     @staticmethod
+     def retry_time(github_data: Dict[str, Any]) -> datetime:
+          """When a rate_limited enrichment can run again, from its retry_at or GITHUB_DEFERRED_RETRY_DELAY"""
+          if github_data.get("retry_at"):
+               return datetime.fromisoformat(github_data["retry_at"]).replace(tzinfo=timezone.utc)
+          return datetime.now(timezone.utc) + timedelta(seconds=settings.GITHUB_DEFERRED_RETRY_DELAY)
+     
+     async def defer(self, request: Request, cv_id: Union[str, ObjectId], username: str, retry_at: datetime):
+          now = datetime.now(timezone.utc)
+          await self.get_collection(request).update_one(
+               {"_id": ObjectId(cv_id)},
+               {"$set": {"username": username, "retryAt": retry_at, "updatedAt": now}, "$setOnInsert": {"attempts": 0, "createdAt": now}},
+               upsert=True
+          )
+     
+     async def fetch_due(self, request: Request, limit: int) -> List[Dict[str, Any]]:
+          return await self.get_collection(request).find(
+               {"retryAt": {"$lte": datetime.now(timezone.utc)}}
+          ).sort({"retryAt": 1}).limit(limit).to_list(length=None)
+     
+     async def reschedule(self, request: Request, cv_id: ObjectId, retry_at: datetime, error: Optional[str] = None):
+          await self.get_collection(request).update_one(
+               {"_id": cv_id},
+               {"$set": {"retryAt": retry_at, "lastError": error, "updatedAt": datetime.now(timezone.utc)}, "$inc": {"attempts": 1}}
+          )
+     
+     async def remove(self, request: Request, cv_id: ObjectId):
+          await self.get_collection(request).delete_one({"_id": cv_id})
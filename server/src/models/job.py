@@ -14,39 +14,39 @@ class JobModel():
      def get_collection(self, request: Request):
           return request.app.db[self.collection]
          
-     def fetch_jobs(self, request: Request, filter_dict: Optional[dict] = None) -> JobBase:
-          jobs = list(self.get_collection(request).find(filter_dict))
+     async def fetch_jobs(self, request: Request, filter_dict: Optional[dict] = None) -> JobBase:
+          jobs = await self.get_collection(request).find(filter_dict).to_list(length=None)
           for job in jobs:
                job["id"] = str(job["_id"]) 
                del job["_id"]
           return jobs
 
-     def list_job(self, request: Request) -> list:
-          job = list(self.get_collection(request).find({'userType':'teacher'}))
+     async def list_job(self, request: Request) -> list:
+          job = await self.get_collection(request).find({'userType':'teacher'}).to_list(length=None)
           for job in job:
                job["id"] = str(job["_id"]) 
           return job
           
      
-     def find(self, request: Request, field: str, value) -> Job:
-          job = self.get_collection(request).find_one({field: value})
+     async def find(self, request: Request, field: str, value) -> Job:
+          job = await self.get_collection(request).find_one({field: value})
           if job:
                job["id"] = str(job["_id"])
                return job
           
-     def exist_job(self, request: Request, jobName: str):
-          existing_job = self.get_collection(request).find_one({"jobName": jobName})
+     async def exist_job(self, request: Request, jobName: str):
+          existing_job = await self.get_collection(request).find_one({"jobName": jobName})
           return True if existing_job else False
           
-     def create_job(self, request: Request, job: JobCreate):
-          new_job = self.get_collection(request).insert_one(job.dict())
+     async def create_job(self, request: Request, job: JobCreate):
+          new_job = await self.get_collection(request).insert_one(job.dict())
           
           if new_job:
                return new_job.inserted_id
      
-     def update(self, request: Request, filter: str, value: Union[str, ObjectId], data)-> Optional[Dict[str, Any]]:
+     async def update(self, request: Request, filter: str, value: Union[str, ObjectId], data)-> Optional[Dict[str, Any]]:
           data['updatedAt'] = datetime.now(timezone.utc)
-          updated_job = self.get_collection(request).find_one_and_update(
+          updated_job = await self.get_collection(request).find_one_and_update(
                {filter : value}, 
                {'$set': data},
                return_document=ReturnDocument.AFTER
@@ -0,0 +1,74 @@
+from fastapi import Request
+from bson.objectid import ObjectId
+from uuid import uuid4
+from typing import Dict, Any, Optional, List
+from datetime import datetime, timezone
+
+class OutboxModel():
+     collection: str = "email_outbox"
+     
+     def get_collection(self, request: Request):
+          return request.app.db[self.collection]
+     
+     async def enqueue(self, request: Request, email: Dict[str, Any]):
+          now = datetime.now(timezone.utc)
+          email = dict(email)
+          email.update({
+               "status": "pending",
+               "attempts": 0,
+               "nextAttemptAt": now,
+               "lastError": None,
+               "createdAt": now,
+               "updatedAt": now
+          })
+          new_email = await self.get_collection(request).insert_one(email)
+          
+          if new_email:
+               return new_email.inserted_id
+     
+     async def exists(self, request: Request, filter_dict: Dict[str, Any]) -> bool:
+          return await self.get_collection(request).find_one(filter_dict, {"_id": 1}) is not None
+     
+     async def claim_due(self, request: Request, limit: int) -> List[Dict[str, Any]]:
+          """Mark up to limit due emails as sending and return them with their attempt counted"""
+          now = datetime.now(timezone.utc)
+          due = await self.get_collection(request).find(
+               {"status": "pending", "nextAttemptAt": {"$lte": now}}, {"_id": 1}
+          ).sort({"nextAttemptAt": 1}).limit(limit).to_list(length=None)
+          if not due:
+               return []
+          
+          claim_id = uuid4().hex
+          await self.get_collection(request).update_many(
+               {"_id": {"$in": [email["_id"] for email in due]}, "status": "pending"},
+               {"$set": {"status": "sending", "claimId": claim_id, "updatedAt": now}, "$inc": {"attempts": 1}}
+          )
+          return await self.get_collection(request).find({"claimId": claim_id}).to_list(length=None)
+     
+     async def mark_sent(self, request: Request, email_ids: List[ObjectId]):
+          if not email_ids:
+               return
+          now = datetime.now(timezone.utc)
+          await self.get_collection(request).update_many(
+               {"_id": {"$in": email_ids}},
+               {"$set": {"status": "sent", "sentAt": now, "lastError": None, "updatedAt": now}}
+          )
+     
+     async def mark_failed(self, request: Request, email_id: ObjectId, error: str, next_attempt_at: Optional[datetime] = None):
+          """Schedule another attempt, or give up when next_attempt_at is None"""
+          data = {
+               "status": "pending" if next_attempt_at else "failed",
+               "lastError": error,
+               "updatedAt": datetime.now(timezone.utc)
+          }
+          if next_attempt_at:
+               data["nextAttemptAt"] = next_attempt_at
+          await self.get_collection(request).update_one({"_id": email_id}, {"$set": data})
+     
+     async def release_claimed(self, request: Request) -> int:
+          """Return emails left in sending by a stopped worker to the queue"""
+          result = await self.get_collection(request).update_many(
+               {"status": "sending"},
+               {"$set": {"status": "pending", "updatedAt": datetime.now(timezone.utc)}}
+          )
+          return result.modified_count
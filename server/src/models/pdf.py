@@ -3,7 +3,7 @@ from bson.objectid import ObjectId
 from uuid import UUID, uuid4
 from pydantic import Field, EmailStr
 from pymongo import ReturnDocument
-from typing import Union, Dict, Any, Optional
+from typing import Union, Dict, Any, Optional, List
 from config.database import Database
 from schemas.pdf import Pdf,PdfBase
 
@@ -13,36 +13,36 @@ class PdfModel():
      def get_collection(self, request: Request):
           return request.app.db[self.collection]
      
-     def list_pdfs(self, request: Request) -> list:
-          pdf = list(self.get_collection(request).find())
+     async def list_pdfs(self, request: Request) -> list:
+          pdf = await self.get_collection(request).find().to_list(length=None)
           for pdf in pdf:
                pdf["id"] = str(pdf["_id"]) 
           return pdf
 
 
-     def list_pdf(self, request: Request) -> list:
-          pdf = list(self.get_collection(request).find({'userType':'teacher'}))
+     async def list_pdf(self, request: Request) -> list:
+          pdf = await self.get_collection(request).find({'userType':'teacher'}).to_list(length=None)
           for pdf in pdf:
                pdf["id"] = str(pdf["_id"]) 
           return pdf
           
      
-     def find(self, request: Request, field: str, value) -> Pdf:
-          pdf = self.get_collection(request).find_one({field: value})
+     async def find(self, request: Request, field: str, value) -> Pdf:
+          pdf = await self.get_collection(request).find_one({field: value})
           if pdf:
                pdf["id"] = str(pdf["_id"])
                return pdf
           
-     def create_pdf(self, request: Request, pdf: PdfBase):
-          new_pdf = self.get_collection(request).insert_one(pdf)
+     async def create_pdf(self, request: Request, pdf: PdfBase):
+          new_pdf = await self.get_collection(request).insert_one(pdf)
           
           if new_pdf:
                return new_pdf.inserted_id
      
-     def update(self, request: Request, filter: str, value: Union[str, ObjectId], data)-> Optional[Dict[str, Any]]:
+     async def update(self, request: Request, filter: str, value: Union[str, ObjectId], data)-> Optional[Dict[str, Any]]:
           print("filters", filter)
           print("data", data)
-          updated_pdf = self.get_collection(request).find_one_and_update(
+          updated_pdf = await self.get_collection(request).find_one_and_update(
                {filter : value}, 
                {'$set': data},
                return_document=ReturnDocument.AFTER
@@ -54,4 +54,10 @@ class PdfModel():
                return updated_pdf
           else:
                return False
-     
\ No newline at end of file
+     
+     
+     async def delete_many(self, request: Request, pdf_ids: List[ObjectId]) -> int:
+          if not pdf_ids:
+               return 0
+          result = await self.get_collection(request).delete_many({"_id": {"$in": pdf_ids}})
+          return result.deleted_count
@@ -0,0 +1,75 @@
+from fastapi import Request
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from config.config import settings
+
+class JobRankingModel():
+     """
+          Per-job totals kept in step with every finalMark write, so rankings do not count the whole job
+          on each read. The CV write and the $inc are separate operations, so a summary is recounted from
+          the CVs once it is older than RANKING_SUMMARY_MAX_AGE, which bounds any drift from a crash or a
+          write racing a recount.
+     """
+     collection: str = "job_rankings"
+     
+     def get_collection(self, request: Request):
+          return request.app.db[self.collection]
+     
+     @staticmethod
+     def _contribution(cv: Dict[str, Any]) -> Tuple[int, float, int]:
+          if not cv or cv.get("isDeleted") or not cv.get("markGenerated"):
+               return 0, 0.0, 0
+          return 1, float(cv.get("finalMark") or 0), 1 if cv.get("selectedForInterview") else 0
+     
+     async def apply_change(self, request: Request, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+          """Move a CV's contribution from its previous state to its new one with atomic $inc updates"""
+          before_job, after_job = (before or {}).get("jobId"), (after or {}).get("jobId")
+          changes = {}
+          for job_id, sign, cv in ((before_job, -1, before), (after_job, 1, after)):
+               if not job_id:
+                    continue
+               scored, mark_sum, selected = self._contribution(cv)
+               total = changes.setdefault(job_id, [0, 0.0, 0])
+               total[0] += sign * scored
+               total[1] += sign * mark_sum
+               total[2] += sign * selected
+          
+          for job_id, (scored, mark_sum, selected) in changes.items():
+               if scored == 0 and mark_sum == 0 and selected == 0:
+                    continue
+               # Only existing summaries are updated; a missing one is rebuilt from the CVs on first read
+               await self.get_collection(request).update_one(
+                    {"_id": job_id},
+                    {"$inc": {"scored": scored, "markSum": mark_sum, "selected": selected}, "$set": {"updatedAt": datetime.now(timezone.utc)}}
+               )
+     
+     async def get_summary(self, request: Request, job_id: str) -> Dict[str, Any]:
+          """
+               Return the job's totals. The $inc updates keep them current; the recount once a summary is
+               older than RANKING_SUMMARY_MAX_AGE is only a drift safety net, costing one aggregate per job
+               and period rather than one per read.
+          """
+          fresh_after = datetime.now(timezone.utc) - timedelta(seconds=settings.RANKING_SUMMARY_MAX_AGE)
+          summary = await self.get_collection(request).find_one({"_id": job_id, "rebuiltAt": {"$gte": fresh_after}})
+          if summary is None:
+               summary = await self.rebuild(request, job_id)
+          return summary
+     
+     async def rebuild(self, request: Request, job_id: str) -> Dict[str, Any]:
+          """Recount a job's totals from its CVs and replace the summary with them"""
+          rebuilt_at = datetime.now(timezone.utc)
+          totals = await request.app.db["cvs"].aggregate([
+               {"$match": {"jobId": job_id, "isDeleted": False, "markGenerated": True}},
+               {"$group": {
+                    "_id": None,
+                    "scored": {"$sum": 1},
+                    "markSum": {"$sum": "$finalMark"},
+                    "selected": {"$sum": {"$cond": [{"$eq": ["$selectedForInterview", True]}, 1, 0]}}
+               }}
+          ]).to_list(length=1)
+          values = {"scored": 0, "markSum": 0.0, "selected": 0}
+          if totals:
+               values.update({key: totals[0][key] for key in values})
+          values.update({"rebuiltAt": rebuilt_at, "updatedAt": rebuilt_at})
+          await self.get_collection(request).update_one({"_id": job_id}, {"$set": values}, upsert=True)
+          return {"_id": job_id, **values}
@@ -14,35 +14,35 @@ class UserModel():
      def get_collection(self, request: Request):
           return request.app.db[self.collection]
      
-     def list_users(self, request: Request) -> list:
-          users = list(self.get_collection(request).find())
+     async def list_users(self, request: Request) -> list:
+          users = await self.get_collection(request).find().to_list(length=None)
           for user in users:
                user["id"] = str(user["_id"]) 
           return users
 
 
-     def list_teachers(self, request: Request) -> list:
-          users = list(self.get_collection(request).find({'userType':'teacher'}))
+     async def list_teachers(self, request: Request) -> list:
+          users = await self.get_collection(request).find({'userType':'teacher'}).to_list(length=None)
           for user in users:
                user["id"] = str(user["_id"]) 
           return users
 
 
-     def list_students(self, request: Request) -> list:
-          users = list(self.get_collection(request).find({'userType':'student'}))
+     async def list_students(self, request: Request) -> list:
+          users = await self.get_collection(request).find({'userType':'student'}).to_list(length=None)
           for user in users:
                user["id"] = str(user["_id"]) 
           return users
           
      
-     def find(self, request: Request, field: str, value) -> User:
-          user = self.get_collection(request).find_one({field: value})
+     async def find(self, request: Request, field: str, value) -> User:
+          user = await self.get_collection(request).find_one({field: value})
           if user:
                user["id"] = str(user["_id"])
                return user
           
-     def create_user(self, request: Request, user: UserBase):
-          new_user = self.get_collection(request).insert_one(user.dict())
+     async def create_user(self, request: Request, user: UserBase):
+          new_user = await self.get_collection(request).insert_one(user.dict())
           
           if new_user:
                return new_user.inserted_id
@@ -0,0 +1,47 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
+
+# Order in which a CV moves through the ingestion pipeline; "failed" can follow any stage
+UPLOAD_STAGES = ["stored", "extracted", "enriched", "scored", "mailed"]
+
+
+class UploadBatchFile(BaseModel):
+    filename: str
+    cvId: str
+    stage: str = "stored"  # stored, extracted, enriched, scored, mailed, failed
+    error: Optional[str] = None
+
+
+class UploadBatchStatus(BaseModel):
+    id: str
+    jobId: str
+    jobName: str
+    division: str
+    status: str  # queued, processing, completed
+    files: List[UploadBatchFile] = Field(default_factory=list)
+    counts: Dict[str, int] = Field(default_factory=dict)
+    total_files: int = 0
+    total_processed: int = 0
+    total_failed: int = 0
+    createdAt: Optional[datetime] = None
+    updatedAt: Optional[datetime] = None
+    completedAt: Optional[datetime] = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "id": "6650b8f2c2a4e8a1f0d3b111",
+                "jobId": "1222",
+                "jobName": "Intern Software Engineer",
+                "division": "se",
+                "status": "processing",
+                "files": [
+                    {"filename": "Chamath.pdf", "cvId": "6650b8f2c2a4e8a1f0d3b112", "stage": "scored", "error": None}
+                ],
+                "counts": {"stored": 0, "extracted": 0, "enriched": 0, "scored": 1, "mailed": 0, "failed": 0},
+                "total_files": 1,
+                "total_processed": 1,
+                "total_failed": 0
+            }
+        }
@@ -108,8 +108,9 @@ class GitHubData(BaseModel):
     profile: Optional[GitHubProfile] = None
     statistics: Optional[GitHubStatistics] = None
     repositories: List[GitHubRepository] = Field(default_factory=list)
-    fetch_status: str  # success, user_not_found, error
+    fetch_status: str  # success, partial, user_not_found, rate_limited, error
     error: Optional[str] = None
+    retry_at: Optional[str] = None  # when a rate_limited enrichment can be retried
     fetched_at: str
 
 
@@ -122,7 +123,7 @@ class GitHubEnrichmentRequest(BaseModel):
 class GitHubEnrichmentResponse(BaseModel):
     """Response schema for GitHub enrichment"""
     cv_id: str
-    status: str  # success, user_not_found, no_github_url, error
+    status: str  # success, partial, user_not_found, no_github_url, rate_limited, error
     message: str
     github_data: Optional[GitHubData] = None
     enriched_at: str
@@ -0,0 +1,139 @@
+"""
+Result Cache
+Two-level cache with an in-process LRU in front of a MongoDB collection
+"""
+
+import copy
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from cachetools import LRUCache, TTLCache
+
+from config.database import Database
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Build a deterministic SHA-256 key from bytes, strings or JSON-serialisable values
+
+    Args:
+        parts: Values that together identify a cached result
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, bytes):
+            data = part
+        elif isinstance(part, str):
+            data = part.encode("utf-8")
+        else:
+            data = json.dumps(part, sort_keys=True, default=str).encode("utf-8")
+        # Length prefix keeps ("ab", "c") and ("a", "bc") apart
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Cache of JSON-like results keyed by fingerprint, persisted in MongoDB"""
+
+    def __init__(self, collection: str, max_entries: int, ttl_seconds: Optional[int] = None, retention_seconds: Optional[int] = None):
+        """
+        Args:
+            collection: MongoDB collection holding the persisted entries
+            max_entries: Number of entries kept in the in-process LRU
+            ttl_seconds: How long an entry is served as fresh (no expiry when omitted)
+            retention_seconds: How long MongoDB keeps an entry before its TTL index
+                               (registered in config.indexes) removes it, defaults to ttl_seconds
+        """
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.retention_seconds = retention_seconds or ttl_seconds
+        if ttl_seconds:
+            self.memory = TTLCache(maxsize=max_entries, ttl=ttl_seconds)
+        else:
+            self.memory = LRUCache(maxsize=max_entries)
+
+    def get_collection(self):
+        return Database.get_db()[self.collection]
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a fresh cached value, promoting persisted hits into memory
+
+        Returns:
+            A copy of the cached value or None on a miss
+        """
+        if key in self.memory:
+            return copy.deepcopy(self.memory[key])
+
+        query = {"_id": key}
+        if self.ttl_seconds:
+            query["createdAt"] = {"$gte": datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)}
+        try:
+            entry = await self.get_collection().find_one(query, {"value": 1})
+        except Exception as e:
+            logger.warning(f"{self.collection} lookup failed: {e}")
+            return None
+
+        if entry is None:
+            return None
+        self.memory[key] = entry["value"]
+        return copy.deepcopy(entry["value"])
+
+    async def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch the persisted entry including metadata, even if it is no longer fresh
+
+        Returns:
+            Entry document or None
+        """
+        try:
+            return await self.get_collection().find_one({"_id": key})
+        except Exception as e:
+            logger.warning(f"{self.collection} lookup failed: {e}")
+            return None
+
+    async def set(self, key: str, value: Any, metadata: Optional[Dict[str, Any]] = None):
+        """
+        Store a value in memory and in MongoDB
+
+        Args:
+            key: Fingerprint of the inputs that produced the value
+            value: Result to cache
+            metadata: Extra top-level fields stored with the entry (e.g. for invalidation queries)
+        """
+        self.memory[key] = copy.deepcopy(value)
+        now = datetime.now(timezone.utc)
+        entry = {"value": value, "createdAt": now}
+        if self.retention_seconds:
+            entry["expiresAt"] = now + timedelta(seconds=self.retention_seconds)
+        entry.update(metadata or {})
+        try:
+            await self.get_collection().replace_one({"_id": key}, entry, upsert=True)
+        except Exception as e:
+            logger.warning(f"{self.collection} write failed: {e}")
+
+    async def invalidate(self, filter_dict: Dict[str, Any]) -> int:
+        """
+        Drop persisted entries matching a metadata filter
+
+        The in-process LRU is cleared entirely since it does not index metadata.
+
+        Returns:
+            Number of persisted entries removed
+        """
+        self.memory.clear()
+        try:
+            result = await self.get_collection().delete_many(filter_dict)
+            return result.deleted_count
+        except Exception as e:
+            logger.warning(f"{self.collection} invalidation failed: {e}")
+            return 0
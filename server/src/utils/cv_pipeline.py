@@ -0,0 +1,479 @@
+"""
+CV Ingestion Pipeline
+Runs the per-CV stages (link extraction, Gemini extraction, GitHub enrichment,
+queueing the received email and scoring) concurrently with a bounded number of CVs per stage
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+from bson.objectid import ObjectId
+from fastapi import Request
+
+from config.config import settings
+from models.cv import CvModel
+from models.github_deferral import GitHubDeferralModel
+from models.job import JobModel
+from utils.gemini import GeminiPDFExtractor
+from utils.github_extractor import GitHubExtractor, github_extractor
+from utils.mail_outbox import mail_outbox
+from utils.pdf_links import read_link_uris_async
+
+logger = logging.getLogger(__name__)
+
+cv_model = CvModel()
+job_model = JobModel()
+github_deferral_model = GitHubDeferralModel()
+
+
+async def enrich_cv_with_github(cv_id: str, resume_content: dict) -> Optional[dict]:
+    """
+    Automatically enrich CV with GitHub data if GitHub URL is present
+
+    Args:
+        cv_id: MongoDB ObjectId of CV
+        resume_content: Extracted resume content
+
+    Returns:
+        GitHub data dictionary or None
+    """
+    try:
+        # Extract GitHub URL from resume
+        personal_info = resume_content.get("personal_info", {})
+        github_url = personal_info.get("github", "")
+
+        if not github_url:
+            logger.info(f"No GitHub URL found for CV {cv_id}")
+            return None
+
+        # Extract username
+        username = GitHubExtractor.extract_username_from_url(github_url)
+
+        if not username:
+            logger.warning(f"Could not extract username from GitHub URL: {github_url}")
+            return None
+
+        logger.info(f"Fetching GitHub data for username: {username}")
+
+        # Fetch complete GitHub profile
+        github_data = await github_extractor.get_complete_profile(username)
+
+        if github_data["fetch_status"] in ("success", "partial"):
+            logger.info(f"Successfully fetched GitHub data for {username}")
+        else:
+            logger.warning(f"GitHub enrichment failed for {username}: {github_data.get('error')}")
+
+        return github_data
+
+    except Exception as e:
+        logger.error(f"Error enriching CV {cv_id} with GitHub data: {str(e)}")
+        return None
+
+def clean_links(raw_links: set[str]) -> list[str]:
+    cleaned = set()
+    for link in raw_links:
+        link = link.strip().replace("\n", "").replace(" ", "")
+        cleaned.add(link)
+    # Sorted so the prompt, and with it the extraction cache key, does not depend on set order
+    return sorted(cleaned)
+
+def classify_links(links: list[str]) -> dict:
+    result = {
+        "profiles": {
+            "github": [],
+            "linkedin": [],
+            "medium": [],
+            "website": []
+        },
+        "github_repos": [],
+        "certificates": [],
+        "emails": [],
+        "others": []
+    }
+
+    for link in links:
+        if link.startswith("mailto:"):
+            result["emails"].append(link)
+            continue
+
+        parsed = urlparse(link)
+        domain = parsed.netloc.lower()
+        path_parts = parsed.path.strip("/").split("/")
+
+        # ---------- GitHub ----------
+        if domain == "github.com":
+            if len(path_parts) == 1:
+                # GitHub profile
+                result["profiles"]["github"].append(link)
+            elif len(path_parts) >= 2:
+                # GitHub repository
+                result["github_repos"].append(link)
+            continue
+
+        # ---------- LinkedIn ----------
+        if "linkedin.com" in domain:
+            if path_parts and path_parts[0] == "in":
+                result["profiles"]["linkedin"].append(link)
+            else:
+                result["others"].append(link)
+            continue
+
+        # ---------- Medium ----------
+        if "medium.com" in domain:
+            result["profiles"]["medium"].append(link)
+            continue
+
+        # ---------- Certificates ----------
+        if any(d in domain for d in ["hackerrank.com", "coursera.org", "udemy.com", "linkedin.com/learning"]):
+            result["certificates"].append(link)
+            continue
+
+        if "drive.google.com" in domain:
+            result["certificates"].append(link)
+            continue
+
+        # ---------- Personal website ----------
+        if domain and not domain.endswith(("github.com", "linkedin.com", "medium.com")):
+            result["profiles"]["website"].append(link)
+            continue
+
+        result["others"].append(link)
+
+    return result
+
+async def extract_pdf_links(file_path: Path) -> dict:
+    """
+    Collect and classify the hyperlinks embedded in a PDF
+
+    Args:
+        file_path: Path of the stored PDF
+
+    Returns:
+        Classified links dictionary
+    """
+    links = await read_link_uris_async(file_path)
+    return classify_links(clean_links(links))
+
+async def load_job_for_scoring(request: Request, job_id: str) -> dict:
+    """
+    Fetch a job and convert its HTML description to plain text for the scoring prompt
+
+    Args:
+        job_id: MongoDB ObjectId of the job
+
+    Returns:
+        Job document
+    """
+    job_data = await job_model.find(request, "_id", ObjectId(job_id))
+    soup = BeautifulSoup(job_data["jobDescription"], "html.parser")
+    job_data["jobDescription"] = soup.get_text(separator="\n")
+    return job_data
+
+
+class CvPipeline:
+    """Bounded-concurrency pipeline for CV ingestion and scoring"""
+
+    def __init__(self):
+        """
+        Create one semaphore per external dependency so that a batch never
+        holds more than the configured number of CVs in a stage at once
+        """
+        self.gemini = asyncio.Semaphore(settings.PIPELINE_GEMINI_CONCURRENCY)
+        self.github = asyncio.Semaphore(settings.PIPELINE_GITHUB_CONCURRENCY)
+        self.mongo = asyncio.Semaphore(settings.PIPELINE_MONGO_CONCURRENCY)
+
+    async def _db(self, func, *args):
+        """Await a model call within the Mongo limit"""
+        async with self.mongo:
+            return await func(*args)
+
+    async def create_cv(self, request: Request, cv_name: str, division: str, job_name: str, job_id: str) -> ObjectId:
+        """
+        Insert the placeholder CV document for an uploaded file
+
+        Returns:
+            ObjectId of the new CV
+        """
+        return await self._db(cv_model.create_cv, request, {
+            "cvName": cv_name,
+            "division": division,
+            "jobName": job_name,
+            "jobId": job_id,
+            "selectedForInterview": False,
+            "isDeleted": False,
+            "comparisonResults": {},
+            "markGenerated": False,
+            "finalMark": 0.0,
+            "createdAt": datetime.now(timezone.utc)
+        })
+
+    async def score_cv(self, request: Request, cv: dict, job_data: Optional[dict] = None) -> Optional[Dict[str, Any]]:
+        """
+        Generate marks for a CV against its job and store the result
+
+        Args:
+            cv: CV document (must contain id, jobId and resumeContent)
+            job_data: Pre-loaded job document, fetched by jobId when omitted
+
+        Returns:
+            Updated CV document
+        """
+        if job_data is None:
+            job_data = await self._db(load_job_for_scoring, request, cv.get("jobId"))
+
+        gemini_extractor = GeminiPDFExtractor()
+        async with self.gemini:
+            # Generate marks with GitHub data
+            generated_marks = await gemini_extractor.generate_marks(
+                cv.get("resumeContent"),
+                job_data,
+                cv.get("githubData")
+            )
+        return await self._store_marks(request, cv, generated_marks, job_data)
+
+    async def score_cvs(self, request: Request, cvs: List[dict], job_data: Optional[dict] = None) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Score CVs of the same job with batched prompts of up to SCORING_BATCH_SIZE CVs
+
+        Args:
+            cvs: CV documents (must contain id, jobId and resumeContent)
+            job_data: Pre-loaded job document, fetched by the first CV's jobId when omitted
+
+        Returns:
+            Updated CV document, or the exception that prevented scoring, per input CV
+        """
+        if not cvs:
+            return []
+        if job_data is None:
+            job_data = await self._db(load_job_for_scoring, request, cvs[0].get("jobId"))
+
+        size = max(settings.SCORING_BATCH_SIZE, 1)
+        chunks = [cvs[index:index + size] for index in range(0, len(cvs), size)]
+
+        async def _score_chunk(chunk: List[dict]):
+            gemini_extractor = GeminiPDFExtractor()
+            async with self.gemini:
+                marks = await gemini_extractor.generate_marks_batch(
+                    [{"id": cv.get("id"), "resumeContent": cv.get("resumeContent"), "githubData": cv.get("githubData")} for cv in chunk],
+                    job_data
+                )
+            results = []
+            for cv in chunk:
+                cv_marks = marks.get(cv.get("id"))
+                try:
+                    if isinstance(cv_marks, Exception):
+                        raise cv_marks
+                    results.append(await self._store_marks(request, cv, cv_marks, job_data))
+                except Exception as e:
+                    results.append(e)
+            return results
+
+        chunk_results = await asyncio.gather(*[_score_chunk(chunk) for chunk in chunks], return_exceptions=True)
+        results = []
+        for chunk, chunk_result in zip(chunks, chunk_results):
+            results.extend(chunk_result if not isinstance(chunk_result, Exception) else [chunk_result] * len(chunk))
+        return results
+
+    async def _store_marks(self, request: Request, cv: dict, generated_marks: dict, job_data: dict) -> Optional[Dict[str, Any]]:
+        total_mark = sum(item["mark"] for item in generated_marks.values())
+        return await self._db(cv_model.update, request, "_id", ObjectId(cv.get("id")), {
+            "comparisonResults": generated_marks,
+            "markGenerated": True,
+            "finalMark": total_mark,
+            "selectedForInterview": total_mark >= job_data['selectionMark']
+        })
+
+    async def process_cv(self, request: Request, cv_id: ObjectId, file_path: Path, job_name: str, job_data: Optional[dict] = None, on_stage: Optional[Callable[[str], Awaitable[None]]] = None, scorer: Optional["ScoreBatcher"] = None) -> Dict[str, Any]:
+        """
+        Run every ingestion stage for one stored CV
+
+        Args:
+            cv_id: ObjectId of the CV document created for the file
+            file_path: Path of the stored PDF inside the upload directory
+            job_name: Position name used in the received email
+            job_data: Pre-loaded job document used for scoring
+            on_stage: Awaited with the stage name (extracted, enriched, scored, mailed) as each one completes;
+                      mailed means the received email was queued in the outbox
+            scorer: Batcher that scores this CV together with others of the same job
+
+        Returns:
+            Scored CV document
+        """
+        async def _report(stage: str):
+            if on_stage:
+                await on_stage(stage)
+
+        classified_links = await extract_pdf_links(file_path)
+
+        # Extract CV content
+        gemini_extractor = GeminiPDFExtractor()
+        async with self.gemini:
+            extract = await gemini_extractor.extract_and_structure_pdf(file_path.name, classified_links)
+        await _report("extracted")
+
+        # Automatically enrich with GitHub data
+        async with self.github:
+            github_data = await enrich_cv_with_github(str(cv_id), extract)
+
+        # Update CV with extracted content and GitHub data
+        personal_info = extract.get("personal_info", {})
+        update_data = {
+            "candidateName": personal_info.get("name") or "",
+            "resumeContent": extract
+        }
+        if github_data:
+            update_data["githubData"] = github_data
+            if github_data.get("fetch_status") == "rate_limited":
+                # Scored without GitHub for now; the re-enrichment worker rescores it after the reset
+                await self._db(
+                    github_deferral_model.defer, request, cv_id,
+                    github_data["username"], github_deferral_model.retry_time(github_data)
+                )
+
+        updated_cv = await self._db(cv_model.update, request, "_id", ObjectId(cv_id), update_data)
+        await _report("enriched")
+
+        if scorer:
+            scored_cv = await scorer.score(updated_cv)
+        else:
+            scored_cv = await self.score_cv(request, updated_cv, job_data)
+        await _report("scored")
+
+        if await self.queue_received_email(request, cv_id, personal_info, job_name):
+            await _report("mailed")
+
+        return scored_cv
+
+    async def queue_received_email(self, request: Request, cv_id: ObjectId, personal_info: dict, job_name: str) -> bool:
+        """
+        Queue the CV received email, the outbox worker delivers it and sets mailStatus
+
+        An email already queued for the CV is not queued again, so a batch resumed
+        between the enqueue and its stage update does not mail the candidate twice.
+
+        Returns:
+            Whether the CV has an address the email was queued for
+        """
+        candidate_email = personal_info.get("email") or ""
+        if not candidate_email:
+            return False
+        if not await self._db(mail_outbox.is_queued, request, "received", cv_id):
+            await self._db(
+                mail_outbox.enqueue, request, "received", cv_id,
+                candidate_email, personal_info.get("name") or "", job_name
+            )
+        return True
+
+    async def resume_received_email(self, request: Request, cv_id: ObjectId, job_name: str) -> bool:
+        """
+        Finish a CV that was scored before the worker stopped by queueing its received email
+
+        Returns:
+            Whether the email is queued
+        """
+        cv = await self._db(cv_model.find, request, "_id", ObjectId(cv_id))
+        if not cv:
+            raise ValueError(f"CV {cv_id} not found")
+        personal_info = (cv.get("resumeContent") or {}).get("personal_info") or {}
+        return await self.queue_received_email(request, cv_id, personal_info, job_name)
+
+    async def run(self, request: Request, items: List[Tuple[str, ObjectId, Path]], job_name: str, job_id: str, on_stage: Optional[Callable[[int, str, Optional[str]], Awaitable[None]]] = None) -> Tuple[List[str], List[Dict[str, str]]]:
+        """
+        Process a batch of stored CVs concurrently
+
+        Args:
+            items: (display filename, CV ObjectId, stored file path) for every CV
+            job_name: Position name used in the received email
+            job_id: MongoDB ObjectId of the job the CVs are scored against
+            on_stage: Awaited with (item index, stage, error) whenever a CV advances or fails
+
+        Returns:
+            Lists of successful filenames and failed {filename, error} entries, in upload order
+        """
+        job_data = await self._db(load_job_for_scoring, request, job_id)
+        scorer = ScoreBatcher(self, request, job_data)
+
+        async def _process(index: int, filename: str, cv_id: ObjectId, file_path: Path):
+            async def _report(stage: str):
+                if on_stage:
+                    await on_stage(index, stage, None)
+
+            try:
+                await self.process_cv(request, cv_id, file_path, job_name, job_data, _report, scorer)
+                return None
+            except Exception as e:
+                logger.error(f"Error processing {filename}: {e}")
+                if on_stage:
+                    await on_stage(index, "failed", str(e))
+                return {"filename": filename, "error": str(e)}
+
+        results = await asyncio.gather(*[_process(index, *item) for index, item in enumerate(items)])
+
+        successful_cvs = []
+        failed_cvs = []
+        for (filename, _, _), error in zip(items, results):
+            if error:
+                failed_cvs.append(error)
+            else:
+                successful_cvs.append(filename)
+        return successful_cvs, failed_cvs
+
+
+class ScoreBatcher:
+    """Collects CVs of one job as they become ready and scores them in shared prompts"""
+
+    def __init__(self, pipeline: CvPipeline, request: Request, job_data: dict):
+        self.pipeline = pipeline
+        self.request = request
+        self.job_data = job_data
+        self.pending = []
+        self.timer = None
+        self.tasks = set()
+
+    async def score(self, cv: dict) -> Optional[Dict[str, Any]]:
+        """
+        Queue a CV for scoring; a batch is sent once SCORING_BATCH_SIZE CVs are
+        waiting or SCORING_BATCH_WAIT_MS has passed since the first one arrived
+
+        Returns:
+            Updated CV document
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((cv, future))
+        if len(self.pending) >= settings.SCORING_BATCH_SIZE:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(settings.SCORING_BATCH_WAIT_MS / 1000, self.flush)
+        return await future
+
+    def flush(self):
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.create_task(self._score(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _score(self, batch: list):
+        try:
+            results = await self.pipeline.score_cvs(self.request, [cv for cv, _ in batch], self.job_data)
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+cv_pipeline = CvPipeline()
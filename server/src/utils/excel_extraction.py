@@ -1,127 +1,218 @@
+import csv
+import io
+import json
+import tempfile
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
-from io import BytesIO
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, BinaryIO, Iterable, Iterator
 from datetime import datetime
 
+# Only the fields cv_export_row reads, so exports skip resume bodies, marks and GitHub data
+EXPORT_PROJECTION = {
+    "candidateName": 1,
+    "jobName": 1,
+    "finalMark": 1,
+    "selectedForInterview": 1,
+    "mailStatus": 1,
+    "interviewEvent": 1,
+    "createdAt": 1,
+    "updatedAt": 1,
+    "resumeContent.personal_info": 1,
+    "resumeContent.education": 1
+}
 
-def create_cv_excel(cv_data_list: List[Dict[str, Any]]) -> BytesIO:
+# Define headers
+EXPORT_HEADERS = [
+    "Candidate Name",
+    "Email",
+    "Phone",
+    "Location",
+    "LinkedIn",
+    "GitHub",
+    "Job Name",
+    "Final Mark",
+    "Selected for Interview",
+    "University",
+    "Degree",
+    "Mail Status",
+    "Interview Scheduled",
+    "Interview Name",
+    "Interview Location",
+    "Interview Attendees",
+    "Interview Start Datetime",
+    "Interview End Datetime",
+    "Created Date",
+    "Updated Date"
+]
+
+MAX_COLUMN_WIDTH = 60
+CHUNK_SIZE = 64 * 1024
+
+
+def cv_export_row(cv: Dict[str, Any]) -> List[Any]:
     """
-    Create an Excel file from CV data.
+    Flatten a CV document into the export columns.
     
     Args:
-        cv_data_list: List of CV documents from MongoDB
+        cv: CV document projected with EXPORT_PROJECTION
         
     Returns:
-        BytesIO: Excel file in memory
+        Values in EXPORT_HEADERS order
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "CV Export"
-    
-    # Define header styling
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=11)
-    header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
+    resume_content = cv.get("resumeContent", {})
+    personal_info = resume_content.get("personal_info", {})
+    education = resume_content.get("education", [{}])[0] if resume_content.get("education") else {}
+    interviewEvent = cv.get("interviewEvent", {})
     
-    # Define headers
-    headers = [
-        "Candidate Name",
-        "Email",
-        "Phone",
-        "Location",
-        "LinkedIn",
-        "GitHub",
-        "Job Name",
-        "Final Mark",
-        "Selected for Interview",
-        "University",
-        "Degree",
-        "Mail Status",
-        "Interview Scheduled",
-        "Interview Name",
-        "Interview Location",
-        "Interview Attendees",
-        "Interview Start Datetime",
-        "Interview End Datetime",
-        "Created Date",
-        "Updated Date"
+    return [
+        cv.get("candidateName", ""),
+        personal_info.get("email", ""),
+        personal_info.get("phone", ""),
+        personal_info.get("address", ""),
+        personal_info.get("linkedin", ""),
+        personal_info.get("github", ""),
+        cv.get("jobName", ""),
+        cv.get("finalMark", 0),
+        "Yes" if cv.get("selectedForInterview", False) else "No",
+        education.get("institution", ""),
+        education.get("degree", ""),
+        cv.get("mailStatus", ""),
+        "Yes" if cv.get("interviewEvent", False) else "No",
+        interviewEvent.get("interviewName", ""),
+        interviewEvent.get("interviewLocation", ""),
+        ", ".join(interviewEvent.get("interviewAttendees", [])),
+        interviewEvent.get("interviewStartDatetime", ""),
+        interviewEvent.get("interviewEndDatetime", ""),
+        cv.get("createdAt", "").strftime("%Y-%m-%d %H:%M:%S") if cv.get("createdAt") else "",
+        cv.get("updatedAt", "").strftime("%Y-%m-%d %H:%M:%S") if cv.get("updatedAt") else ""
     ]
+
+
+class CvExcelWriter:
+    """
+    Write-only xlsx export that takes CVs in batches as they come off the cursor.
     
-    # Write headers
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num)
-        cell.value = header
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_alignment
-        cell.border = border
+    Column widths must precede the rows in the sheet XML, so they are sized from
+    the first batch only; later rows never widen a column. Rows are spooled to
+    disk by openpyxl, so memory stays bounded by one batch, but the zip container
+    can only be sent once save() has finished. Exports too large to wait for
+    should use the csv or ndjson formats, which stream from the first row.
+    """
     
-    # Write data rows
-    for row_num, cv in enumerate(cv_data_list, 2):
-        resume_content = cv.get("resumeContent", {})
-        personal_info = resume_content.get("personal_info", {})
-        education = resume_content.get("education", [{}])[0] if resume_content.get("education") else {}
-        interviewEvent = cv.get("interviewEvent", {})
+    def __init__(self, sample: List[Dict[str, Any]]):
+        """
+        Args:
+            sample: First batch of CV documents, used for the column widths and written first
+        """
+        rows = [cv_export_row(cv) for cv in sample]
+        widths = [len(header) for header in EXPORT_HEADERS]
+        for row in rows:
+            for index, value in enumerate(row):
+                length = len(str(value)) if value is not None else 0
+                if length > widths[index]:
+                    widths[index] = length
+        
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("CV Export")
         
-        row_data = [
-            cv.get("candidateName", ""),
-            personal_info.get("email", ""),
-            personal_info.get("phone", ""),
-            personal_info.get("address", ""),
-            personal_info.get("linkedin", ""),
-            personal_info.get("github", ""),
-            cv.get("jobName", ""),
-            cv.get("finalMark", 0),
-            "Yes" if cv.get("selectedForInterview", False) else "No",
-            education.get("institution", ""),
-            education.get("degree", ""),
-            cv.get("mailStatus", ""),
-            "Yes" if cv.get("interviewEvent", False) else "No",
-            interviewEvent.get("interviewName", ""),
-            interviewEvent.get("interviewLocation", ""),
-            ", ".join(interviewEvent.get("interviewAttendees", [])),
-            interviewEvent.get("interviewStartDatetime", ""),
-            interviewEvent.get("interviewEndDatetime", ""),
-            cv.get("createdAt", "").strftime("%Y-%m-%d %H:%M:%S") if cv.get("createdAt") else "",
-            cv.get("updatedAt", "").strftime("%Y-%m-%d %H:%M:%S") if cv.get("updatedAt") else ""
-        ]
+        # Define header styling, shared by every cell instead of created per cell
+        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+        header_font = Font(bold=True, color="FFFFFF", size=11)
+        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        self.cell_alignment = Alignment(vertical="top", wrap_text=True)
+        self.border = Border(
+            left=Side(style='thin'),
+            right=Side(style='thin'),
+            top=Side(style='thin'),
+            bottom=Side(style='thin')
+        )
         
-        for col_num, value in enumerate(row_data, 1):
-            cell = ws.cell(row=row_num, column=col_num)
-            cell.value = value
-            cell.border = border
-            cell.alignment = Alignment(vertical="top", wrap_text=True)
+        for col_num, width in enumerate(widths, 1):
+            self.sheet.column_dimensions[get_column_letter(col_num)].width = min(width + 2, MAX_COLUMN_WIDTH)
+        # Freeze the header row
+        self.sheet.freeze_panes = "A2"
+        
+        # Write headers
+        header_cells = []
+        for header in EXPORT_HEADERS:
+            cell = WriteOnlyCell(self.sheet, value=header)
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = header_alignment
+            cell.border = self.border
+            header_cells.append(cell)
+        self.sheet.append(header_cells)
+        self._append_rows(rows)
     
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 60)  # Max width 60
-        ws.column_dimensions[column_letter].width = adjusted_width
+    def append(self, cvs: Iterable[Dict[str, Any]]):
+        """Write one batch of CV documents below the rows written so far."""
+        self._append_rows(cv_export_row(cv) for cv in cvs)
     
-    # Freeze the header row
-    ws.freeze_panes = "A2"
+    def _append_rows(self, rows: Iterable[List[Any]]):
+        for row in rows:
+            row_cells = []
+            for value in row:
+                cell = WriteOnlyCell(self.sheet, value=value)
+                cell.border = self.border
+                cell.alignment = self.cell_alignment
+                row_cells.append(cell)
+            self.sheet.append(row_cells)
     
-    # Save to BytesIO
-    excel_file = BytesIO()
-    wb.save(excel_file)
-    excel_file.seek(0)
+    def save(self) -> BinaryIO:
+        """
+        Returns:
+            Temporary file holding the xlsx, positioned at the start; closing it deletes it
+        """
+        excel_file = tempfile.TemporaryFile()
+        self.workbook.save(excel_file)
+        excel_file.seek(0)
+        return excel_file
+
+
+def iter_file(file: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a file in chunks and close it once fully read."""
+    try:
+        while chunk := file.read(chunk_size):
+            yield chunk
+    finally:
+        file.close()
+
+
+async def stream_cvs_csv(cvs: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """
+    Stream CVs as CSV rows, one chunk per CV, as they arrive from the cursor.
     
-    return excel_file
+    Args:
+        cvs: CV documents projected with EXPORT_PROJECTION
+        
+    Returns:
+        UTF-8 encoded CSV, header first
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADERS)
+    yield buffer.getvalue().encode("utf-8")
+    async for cv in cvs:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(cv_export_row(cv))
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def stream_cvs_ndjson(cvs: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """
+    Stream CVs as newline-delimited JSON objects keyed by the export headers.
+    
+    Args:
+        cvs: CV documents projected with EXPORT_PROJECTION
+        
+    Returns:
+        UTF-8 encoded NDJSON, one CV per line
+    """
+    async for cv in cvs:
+        yield (json.dumps(dict(zip(EXPORT_HEADERS, cv_export_row(cv))), default=str) + "\n").encode("utf-8")
 
 
 def format_cv_for_export(cv_document: Dict[str, Any]) -> Dict[str, Any]:
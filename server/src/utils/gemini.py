@@ -1,22 +1,78 @@
 import os
 import json
+import hashlib
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Union
 from google import genai
 from dotenv import load_dotenv
+from config.config import settings
+from utils.cache import ResultCache, fingerprint
+from utils.pdf_text import read_text_layer_async
+from utils.gemini_files import gemini_file_store
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Extractions keyed by PDF bytes, model and prompt, shared by every extractor instance
+extraction_cache = ResultCache("extraction_cache", settings.EXTRACTION_CACHE_MAX_ENTRIES)
+# Marks keyed by scoring model and the full prompt (resume, job, criteria and GitHub summary)
+score_cache = ResultCache("score_cache", settings.SCORE_CACHE_MAX_ENTRIES)
+
+DIVISION_NAMES = {
+    "se": "Software Engineering",
+    "qe": "Test Automation Engineering",
+    "devops": "DevOps Engineering"
+}
+
 class GeminiPDFExtractor:
-    def __init__(self):
-        self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+    EXTRACTION_MODEL = "gemini-2.0-flash"
+    SCORING_MODEL = "gemini-2.5-flash"
+
+    _client: Optional[genai.Client] = None
 
-    async def extract_and_structure_pdf(self, pdf_file_name:str, links: dict) -> dict:
+    def __init__(self):
+        # Calls go through client.aio so that model latency never blocks the event loop
+        self.client = self.open_client()
+
+    @classmethod
+    def open_client(cls) -> genai.Client:
+        """
+        Create the shared client whose connection pool every extractor reuses
+
+        Called at application startup; extractors created before that open it lazily.
+
+        Returns:
+            Shared genai client
+        """
+        if cls._client is None:
+            cls._client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        return cls._client
+
+    @classmethod
+    async def close_client(cls):
+        """
+        Close the shared client at application shutdown
+
+        google-genai only exposes aclose()/close() from 1.39 on; older clients
+        release their pools when the last reference is dropped.
+        """
+        if cls._client is not None:
+            if hasattr(cls._client.aio, "aclose"):
+                await cls._client.aio.aclose()
+            if hasattr(cls._client, "close"):
+                cls._client.close()
+            cls._client = None
+
+    async def extract_and_structure_pdf(self, pdf_file_name:str, links: Optional[dict] = None) -> dict:
           """Extract and structure PDF content into JSON"""
 
+          if links is None:
+              links = {}
           base_dir = os.path.dirname(os.path.abspath(__file__)) 
           file_path = os.path.join(base_dir, f"../data/{pdf_file_name}")
       #     print("Resolved path:", file_path)
       #     print("Exists:", os.path.exists(file_path))
-          # Upload PDF to Gemini
-          pdf_file = self.client.files.upload(file=file_path)
 
           prompt = f"""
           Analyze this PDF CV/Resume and extract structured data in JSON format.
@@ -175,10 +231,32 @@ class GeminiPDFExtractor:
 
           Output ONLY the JSON object. No explanations, no comments, no extra text.
           """
+
+          # Identical CV bytes with the same prompt, model and input mode reuse the stored extraction
+          mode = "text" if settings.GEMINI_TEXT_EXTRACTION else "file"
+          pdf_hash = await asyncio.to_thread(self._file_hash, file_path)
+          cache_key = fingerprint(pdf_hash, self.EXTRACTION_MODEL, prompt, mode)
+          cached = await extraction_cache.get(cache_key)
+          if cached is not None:
+              return cached
+
+          # Text-based CVs go as compact text; scanned or image-only PDFs still need the file
+          pdf_text = None
+          if mode == "text":
+              try:
+                  pdf_text = await read_text_layer_async(file_path)
+              except Exception as e:
+                  logger.warning(f"Text layer extraction failed for {pdf_file_name}, uploading the file: {e}")
+          if pdf_text:
+              contents = [prompt, f"CV_TEXT (text layer of the PDF):\n{pdf_text}"]
+          else:
+              # Upload PDF to Gemini, reusing a still valid upload of the same bytes
+              pdf_file = await gemini_file_store.get_or_upload(file_path, pdf_hash)
+              contents = [prompt, pdf_file]
         
-          response = self.client.models.generate_content(
-               model="gemini-2.0-flash",
-               contents=[prompt, pdf_file]
+          response = await self.client.aio.models.generate_content(
+               model=self.EXTRACTION_MODEL,
+               contents=contents
           )
 #           print("TEXT:::",response.text)
           # Clean up the response to extract JSON
@@ -191,26 +269,18 @@ class GeminiPDFExtractor:
           if json_start != -1 and json_end != -1:
               json_text = response_text[json_start:json_end]
 #               print("JSON::", json.loads(json_text))
-              return json.loads(json_text)
+              extract = json.loads(json_text)
+              await extraction_cache.set(cache_key, extract, {"pdfHash": pdf_hash, "model": self.EXTRACTION_MODEL})
+              return extract
           else:
               raise ValueError("Could not extract valid JSON from response")
     
-    async def generate_marks(self, resumeContent: dict, jobData: dict, githubData: dict = None) -> dict:
-        job_name = jobData.get("jobName")
-        if jobData.get("division") == 'se':
-            division = "Software Engineering"
-        if jobData.get("division") == 'qe':
-            division = "Test Automation Engineering"
-        if jobData.get("division") == 'devops':
-            division = "DevOps Engineering"
-        job_description = jobData.get("jobDescription")
-        criteria_object = jobData.get("criteria")
-        resume_content = resumeContent
-        
-        # Prepare GitHub data summary if available
+    @staticmethod
+    def summarize_github(githubData: Optional[dict]) -> str:
+        """Prepare GitHub data summary if available"""
         github_summary = "No GitHub data available."
-        if githubData and githubData.get("fetch_status") == "success":
-            profile = githubData.get("profile", {})
+        if githubData and githubData.get("fetch_status") in ("success", "partial"):
+            profile = githubData.get("profile") or {}
             stats = githubData.get("statistics", {})
             repo_stats = stats.get("repositories", {}) if stats else {}
             lang_stats = stats.get("languages", {}) if stats else {}
@@ -232,16 +302,33 @@ class GeminiPDFExtractor:
                 - Location: {profile.get('location', 'N/A')}
                 - Bio: {profile.get('bio', 'N/A')}
             """
-        
-        guidance_section = {
-            "A/L or Advanced Level Results": "This mainly has 3 subjects which are considered as the main subjects. Best result for a subject is 'A', next 'B', 'C', 'S' and the lowest is 'F'. Consider district and island ranks also. (having an island rank above 300 or a district rank above 100 can be considered as a good result",
-            "GPA or CGPA": "This is a cumulative measure of a student's academic performance, typically on a scale of 4.0. So the best is 4.0, 3.9-3.7 is good, 3.5-3.0 is average and lower than 2.0 is really poor.",
-            "Projects": "List of projects undertaken, with a focus on those relevant to the job description.",
-            "Work Experience": "Details of previous employment, including roles, responsibilities, and achievements.",
-            "Skills": "Technical and soft skills relevant to the job description.",
-            "Certifications": "Relevant certifications that enhance the candidate's qualifications for the job.",
-            "GitHub": "GitHub profile showing coding activity, open-source contributions, and technical expertise. Consider: account age, number of repositories,primary languages, activity level, and quality of projects. Active contributors with original repositories show strong technical engagement. For scoring: 2+ years account age with 10+ original repos = strong (70-100% of max), 1-2 years with 5-10 repos = moderate (40-70% of max), <1 year with <5 repos = weak (0-40% of max). Consider activity (active in last 30 days = bonus) and language match with job requirements."
-        }
+        return github_summary
+
+    GUIDANCE_SECTION = {
+        "A/L or Advanced Level Results": "This mainly has 3 subjects which are considered as the main subjects. Best result for a subject is 'A', next 'B', 'C', 'S' and the lowest is 'F'. Consider district and island ranks also. (having an island rank above 300 or a district rank above 100 can be considered as a good result",
+        "GPA or CGPA": "This is a cumulative measure of a student's academic performance, typically on a scale of 4.0. So the best is 4.0, 3.9-3.7 is good, 3.5-3.0 is average and lower than 2.0 is really poor.",
+        "Projects": "List of projects undertaken, with a focus on those relevant to the job description.",
+        "Work Experience": "Details of previous employment, including roles, responsibilities, and achievements.",
+        "Skills": "Technical and soft skills relevant to the job description.",
+        "Certifications": "Relevant certifications that enhance the candidate's qualifications for the job.",
+        "GitHub": "GitHub profile showing coding activity, open-source contributions, and technical expertise. Consider: account age, number of repositories,primary languages, activity level, and quality of projects. Active contributors with original repositories show strong technical engagement. For scoring: 2+ years account age with 10+ original repos = strong (70-100% of max), 1-2 years with 5-10 repos = moderate (40-70% of max), <1 year with <5 repos = weak (0-40% of max). Consider activity (active in last 30 days = bonus) and language match with job requirements."
+    }
+
+    @staticmethod
+    def _scoring_context(jobData: dict) -> tuple:
+        """Job fields shared by every candidate scored against the job"""
+        job_name = jobData.get("jobName")
+        division = DIVISION_NAMES.get(jobData.get("division"), jobData.get("division"))
+        job_description = jobData.get("jobDescription")
+        criteria_object = jobData.get("criteria")
+        return job_name, division, job_description, criteria_object
+
+    def build_scoring_prompt(self, resumeContent: dict, jobData: dict, githubData: dict = None) -> str:
+        """Render the single-candidate scoring prompt"""
+        job_name, division, job_description, criteria_object = self._scoring_context(jobData)
+        resume_content = resumeContent
+        github_summary = self.summarize_github(githubData)
+        guidance_section = self.GUIDANCE_SECTION
         prompt_template = f"""
             You are an expert technical recruiter evaluating resumes for the position of **{job_name}** in the **{division}** division.
 
@@ -308,13 +395,183 @@ class GeminiPDFExtractor:
             Evaluate the resume based on the items specified in the criteria_object. Use only the information provided in the guidance_section for your evaluation. 
             Return the results strictly in JSON format, including each criterion with its assigned mark and a brief explanation.
             """
+        return prompt_template
+
+    async def generate_marks(self, resumeContent: dict, jobData: dict, githubData: dict = None) -> dict:
+        prompt_template = self.build_scoring_prompt(resumeContent, jobData, githubData)
         # print("PROMPT::", prompt_template)
-        response = self.client.models.generate_content(
-            model="gemini-2.5-flash",
+        # The prompt embeds every scoring input, so unchanged inputs map to the same key
+        cache_key = fingerprint(self.SCORING_MODEL, prompt_template)
+        cached = await score_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        response = await self.client.aio.models.generate_content(
+            model=self.SCORING_MODEL,
             contents=prompt_template
         )
+        marks = self._parse_json(response.text)
+        await score_cache.set(cache_key, marks, {"jobId": str(jobData.get("id") or jobData.get("_id"))})
+        return marks
+
+    def build_batch_scoring_prompt(self, candidates: List[dict], jobData: dict) -> str:
+        """
+        Render one prompt that scores several candidates against the same job
+
+        The job description, criteria and guidance are included once, followed by
+        one block per candidate labelled with the candidate id.
+        """
+        job_name, division, job_description, criteria_object = self._scoring_context(jobData)
+        candidate_blocks = "\n".join(
+            f"""
+            ---------- CANDIDATE {candidate["id"]} ----------
+            **Resume Content:**
+            {candidate.get("resumeContent")}
+
+            **GitHub Profile Data:**
+            {self.summarize_github(candidate.get("githubData"))}
+            """
+            for candidate in candidates
+        )
+        prompt_template = f"""
+            You are an expert technical recruiter evaluating resumes for the position of **{job_name}** in the **{division}** division.
+
+            You are given:
+            1. A **job description**.
+            2. The **resume content** and **GitHub profile data** of {len(candidates)} candidates, each labelled with a candidate id.
+            3. A **criteria object** containing evaluation categories and their maximum marks.
+            4. A **guidance section** describing what is considered strong or weak performance for each criterion.
+
+            ### Your task:
+            Evaluate every candidate independently. Compare each resume against the job description and assign marks for each criterion based on how well the resume matches the expectations for this job and division.
+
+            ### Rules:
+            - Each criterion in the given object has a *maximum mark* (e.g., 10, 20, etc.).
+            - Give a *mark between 0 and the maximum* for each.
+            - Give a **mark fraction** for each and save the mark_fraction in the object as **mark/maximum mark in criteria**.
+            - Provide a *one-sentence explanation* for each mark explaining why that score was given.
+            - **For GitHub criterion**: If GitHub data is available, evaluate based on account age, repositories, activity, languages, and relevance to the job. If no GitHub data is available, give 0 marks with explanation "No GitHub profile data available."
+            - **Do NOT** give marks for `LinkedIn` (skip it entirely or add with mark 0/maximum and description "Not generating mark for LinkedIn").
+            - Never compare candidates with each other; a candidate's marks depend only on their own data.
+            - Be consistent and fair in marking.
+            - Use the “guidance section” to understand what good or poor performance looks like for each criterion.
+
+            ### Example Output Format:
+            Return a JSON object keyed by candidate id, like this:
+            {{
+              "<candidate id>": {{
+                "A/L": {{
+                  "mark": 8,
+                  "mark_fraction": "8/10",
+                  "explanation": "Strong academic results relevant to the role."
+                }},
+                "GitHub": {{
+                  "mark": 4,
+                  "mark_fraction": "4/5",
+                  "explanation": "Active GitHub profile with relevant projects and strong community engagement."
+                }},
+                ...
+              }},
+              ...
+            }}
+
+            ### Input Data
+
+            **Job Name:** {job_name}  
+            **Division:** {division}  
+
+            **Job Description:**
+            {job_description}
+
+            **Evaluation Criteria (Max Marks):**
+            {criteria_object}
+
+            **Guidance Section (Best vs. Worst Examples):**
+            {self.GUIDANCE_SECTION}
+
+            **Candidates:**
+            {candidate_blocks}
+
+            Evaluate each candidate based on the items specified in the criteria_object. Use only the information provided in the guidance_section for your evaluation.
+            Return the results strictly in JSON format, with one entry per candidate id containing each criterion with its assigned mark and a brief explanation.
+            """
+        return prompt_template
+
+    @staticmethod
+    def _valid_marks(marks: Any) -> bool:
+        """Check that a parsed result has a numeric mark for every criterion"""
+        return isinstance(marks, dict) and bool(marks) and all(
+            isinstance(item, dict) and isinstance(item.get("mark"), (int, float)) for item in marks.values()
+        )
+
+    async def generate_marks_batch(self, candidates: List[dict], jobData: dict) -> Dict[str, Union[dict, Exception]]:
+        """
+        Score several CVs against one job with a single prompt
+
+        Cached candidates are answered from the score cache and the rest share one
+        Gemini call. Candidates missing or malformed in the batched answer (or all
+        of them if it cannot be parsed) fall back to sequential generate_marks calls.
+
+        Args:
+            candidates: Dicts with id, resumeContent and optional githubData
+            jobData: Job document the candidates are scored against
+
+        Returns:
+            Marks per candidate id, or the exception raised by its fallback call
+        """
+        results = {}
+        pending = []
+        for candidate in candidates:
+            # Same key as generate_marks so both paths share cached results
+            cache_key = fingerprint(
+                self.SCORING_MODEL,
+                self.build_scoring_prompt(candidate.get("resumeContent"), jobData, candidate.get("githubData"))
+            )
+            cached = await score_cache.get(cache_key)
+            if cached is not None:
+                results[candidate["id"]] = cached
+            else:
+                pending.append((candidate, cache_key))
+
+        batched = {}
+        # A single uncached candidate gains nothing from the batched prompt
+        if len(pending) > 1:
+            try:
+                response = await self.client.aio.models.generate_content(
+                    model=self.SCORING_MODEL,
+                    contents=self.build_batch_scoring_prompt([candidate for candidate, _ in pending], jobData)
+                )
+                batched = self._parse_json(response.text)
+            except Exception as e:
+                logger.warning(f"Batched scoring failed, falling back to per-CV calls: {e}")
+
+        fallback = []
+        job_id = str(jobData.get("id") or jobData.get("_id"))
+        for candidate, cache_key in pending:
+            marks = batched.get(candidate["id"]) if isinstance(batched, dict) else None
+            if self._valid_marks(marks):
+                await score_cache.set(cache_key, marks, {"jobId": job_id})
+                results[candidate["id"]] = marks
+            else:
+                fallback.append(candidate)
+
+        # One call at a time: the caller holds a single Gemini slot for the whole batch
+        for candidate in fallback:
+            try:
+                results[candidate["id"]] = await self.generate_marks(candidate.get("resumeContent"), jobData, candidate.get("githubData"))
+            except Exception as e:
+                results[candidate["id"]] = e
+        return results
+
+    @staticmethod
+    def _file_hash(file_path: str) -> str:
+        with open(file_path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    @staticmethod
+    def _parse_json(text: str) -> dict:
         # Clean up the response to extract JSON
-        response_text = response.text.strip()
+        response_text = text.strip()
         # Find JSON in the response
         json_start = response_text.find('{')
         json_end = response_text.rfind('}') + 1
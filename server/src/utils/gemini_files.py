@@ -0,0 +1,154 @@
+"""
+Gemini File Store
+Tracks files uploaded to the Gemini Files API by content hash so that a PDF is
+uploaded once while its handle is valid, and deletes them in the background
+once they have not been used for GEMINI_FILE_RETENTION seconds
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from google import genai
+from google.genai import types
+
+from config.config import settings
+from config.database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class GeminiFileStore:
+    """Upload handles persisted in MongoDB, keyed by SHA-256 of the file bytes"""
+
+    collection: str = "gemini_files"
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def get_collection(self):
+        return Database.get_db()[self.collection]
+
+    def get_client(self) -> genai.Client:
+        # Uploads share the extractor's connection pool; imported here as utils.gemini imports this module
+        from utils.gemini import GeminiPDFExtractor
+        return GeminiPDFExtractor.open_client()
+
+    async def get_or_upload(self, file_path: str, file_hash: str, mime_type: str = "application/pdf") -> types.Part:
+        """
+        Return a part referencing the uploaded file, uploading it only when no
+        valid handle exists for these bytes
+
+        Args:
+            file_path: Local file to upload on a miss
+            file_hash: SHA-256 of the file bytes
+            mime_type: MIME type recorded for the handle
+
+        Returns:
+            Part usable in generate_content contents
+        """
+        # Concurrent extractions of the same bytes share one upload
+        lock = self._locks.setdefault(file_hash, asyncio.Lock())
+        try:
+            async with lock:
+                now = datetime.now(timezone.utc)
+                delete_after = now + timedelta(seconds=settings.GEMINI_FILE_RETENTION)
+                handle = await self._find_valid(file_hash, now)
+                if handle:
+                    await self._touch(file_hash, delete_after)
+                    return types.Part.from_uri(file_uri=handle["uri"], mime_type=handle["mimeType"])
+
+                uploaded = await self.get_client().aio.files.upload(file=file_path)
+                await self._save(file_hash, uploaded, mime_type, now, delete_after)
+                return types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type or mime_type)
+        finally:
+            if not lock.locked() and self._locks.get(file_hash) is lock:
+                del self._locks[file_hash]
+
+    async def _find_valid(self, file_hash: str, now: datetime) -> Optional[dict]:
+        try:
+            return await self.get_collection().find_one({
+                "_id": file_hash,
+                "expiresAt": {"$gt": now + timedelta(seconds=settings.GEMINI_FILE_EXPIRY_MARGIN)}
+            })
+        except Exception as e:
+            logger.warning(f"{self.collection} lookup failed: {e}")
+            return None
+
+    async def _touch(self, file_hash: str, delete_after: datetime):
+        try:
+            await self.get_collection().update_one({"_id": file_hash}, {"$set": {"deleteAfter": delete_after}})
+        except Exception as e:
+            logger.warning(f"{self.collection} update failed: {e}")
+
+    async def _save(self, file_hash: str, uploaded: types.File, mime_type: str, now: datetime, delete_after: datetime):
+        # Files API uploads expire after 48 hours when no expiration is reported
+        expires_at = uploaded.expiration_time or now + timedelta(hours=48)
+        try:
+            previous = await self.get_collection().find_one_and_replace(
+                {"_id": file_hash},
+                {
+                    "name": uploaded.name,
+                    "uri": uploaded.uri,
+                    "mimeType": uploaded.mime_type or mime_type,
+                    "createdAt": now,
+                    "expiresAt": expires_at,
+                    "deleteAfter": delete_after
+                },
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"{self.collection} write failed: {e}")
+            return
+        if previous and previous.get("name") != uploaded.name:
+            # A handle close to expiry was replaced, drop the old upload right away
+            await self._delete_remote(previous["name"])
+
+    async def _delete_remote(self, name: str):
+        try:
+            await self.get_client().aio.files.delete(name=name)
+        except Exception as e:
+            # Already expired or removed files cannot be deleted again
+            logger.info(f"Gemini file {name} not deleted: {e}")
+
+    async def sweep(self) -> int:
+        """
+        Delete uploads that were not used within the retention period or have expired
+
+        Returns:
+            Number of handles removed
+        """
+        now = datetime.now(timezone.utc)
+        due = await self.get_collection().find(
+            {"$or": [{"deleteAfter": {"$lte": now}}, {"expiresAt": {"$lte": now}}]}, {"name": 1}
+        ).to_list(length=None)
+        for handle in due:
+            await self._delete_remote(handle["name"])
+            await self.get_collection().delete_one({"_id": handle["_id"], "name": handle["name"]})
+        return len(due)
+
+    async def start(self):
+        """Start the background sweeper"""
+        self.task = asyncio.create_task(self._work())
+
+    async def stop(self):
+        """Cancel the sweeper; unused uploads are deleted on a later run or expire on their own"""
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _work(self):
+        while True:
+            try:
+                removed = await self.sweep()
+                if removed:
+                    logger.info(f"Deleted {removed} Gemini file(s)")
+            except Exception as e:
+                logger.error(f"Error sweeping Gemini files: {e}")
+            await asyncio.sleep(settings.GEMINI_FILE_SWEEP_INTERVAL)
+
+
+gemini_file_store = GeminiFileStore()
@@ -3,22 +3,43 @@ GitHub Data Extraction Utility
 Fetches user profile, repositories, and activity data from GitHub REST API v3
 """
 
+import asyncio
 import httpx
 import re
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 import logging
 
+from config.config import settings
+from utils.cache import ResultCache
+from utils.github_rate_limiter import GitHubRateLimitExceeded, github_rate_limiter
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 support in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Complete profiles keyed by lower-cased username
+github_profile_cache = ResultCache(
+    "github_cache",
+    settings.GITHUB_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.GITHUB_CACHE_TTL,
+    retention_seconds=settings.GITHUB_CACHE_RETENTION
+)
+
 
 class GitHubExtractor:
     """GitHub REST API client for extracting user data"""
     
     BASE_URL = "https://api.github.com"
     API_VERSION = "2022-11-28"
-    TIMEOUT = 10.0
+    
+    # Application-lifetime connection pool shared by every extractor instance
+    _client: Optional[httpx.AsyncClient] = None
     
     def __init__(self, token: Optional[str] = None):
         """
@@ -38,6 +59,79 @@ class GitHubExtractor:
         if self.token:
             self.headers["Authorization"] = f"Bearer {self.token}"
     
+    @classmethod
+    def open_client(cls) -> httpx.AsyncClient:
+        """
+        Create the shared keep-alive client used for every GitHub request
+        
+        Called at application startup; requests made before that open it lazily.
+        
+        Returns:
+            Shared httpx.AsyncClient
+        """
+        if cls._client is None or cls._client.is_closed:
+            cls._client = httpx.AsyncClient(
+                base_url=cls.BASE_URL,
+                timeout=settings.GITHUB_TIMEOUT,
+                http2=settings.GITHUB_HTTP2 and HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=settings.GITHUB_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.GITHUB_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.GITHUB_KEEPALIVE_EXPIRY
+                )
+            )
+        return cls._client
+    
+    @classmethod
+    async def close_client(cls):
+        """Close the shared client at application shutdown"""
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+    
+    def get_client(self) -> httpx.AsyncClient:
+        return self.open_client()
+    
+    async def _get(self, url: str, params: Optional[Dict[str, Any]] = None, cache_entry: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """
+        GET a GitHub resource, revalidating a cached copy when one is given
+        
+        Args:
+            url: Resource URL
+            params: Query parameters
+            cache_entry: Previous {data, etag, last_modified} for the resource; a 304
+                         response means the stored data is still current and does
+                         not count against the rate limit
+            
+        Returns:
+            httpx response
+        """
+        headers = dict(self.headers)
+        if cache_entry and "data" in cache_entry:
+            if cache_entry.get("etag"):
+                headers["If-None-Match"] = cache_entry["etag"]
+            if cache_entry.get("last_modified"):
+                headers["If-Modified-Since"] = cache_entry["last_modified"]
+        
+        client = self.get_client()
+        for attempt in range(2):
+            # Held here while the shared budget is exhausted, then retried once if GitHub still refused
+            await github_rate_limiter.acquire()
+            response = await client.get(url, headers=headers, params=params)
+            github_rate_limiter.update(response)
+            if not github_rate_limiter.is_rate_limited(response):
+                break
+        return response
+    
+    @staticmethod
+    def _remember(response: httpx.Response, cache_entry: Optional[Dict[str, Any]], data: Any) -> Any:
+        """Record the parsed data and its validators on the caller's cache entry"""
+        if cache_entry is not None:
+            cache_entry["data"] = data
+            cache_entry["etag"] = response.headers.get("ETag")
+            cache_entry["last_modified"] = response.headers.get("Last-Modified")
+        return data
+    
     @staticmethod
     def extract_username_from_url(github_url: str) -> Optional[str]:
         """
@@ -81,7 +175,7 @@ class GitHubExtractor:
         
         return None
     
-    async def get_user_profile(self, username: str) -> Dict[str, Any]:
+    async def get_user_profile(self, username: str, cache_entry: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Fetch user profile information
         
@@ -89,45 +183,47 @@ class GitHubExtractor:
         
         Args:
             username: GitHub username
+            cache_entry: Previous response for conditional revalidation, updated in place
             
         Returns:
             User profile data dictionary
         """
         url = f"{self.BASE_URL}/users/{username}"
         
-        async with httpx.AsyncClient(timeout=self.TIMEOUT) as client:
-            response = await client.get(url, headers=self.headers)
-            
-            if response.status_code == 404:
-                raise ValueError(f"GitHub user '{username}' not found")
-            elif response.status_code == 403:
-                raise Exception("GitHub API rate limit exceeded")
-            elif response.status_code != 200:
-                raise Exception(f"GitHub API error: {response.status_code}")
-            
-            data = response.json()
-            
-            return {
-                "username": data.get("login"),
-                "name": data.get("name"),
-                "avatar_url": data.get("avatar_url"),
-                "bio": data.get("bio"),
-                "company": data.get("company"),
-                "location": data.get("location"),
-                "email": data.get("email"),
-                "blog": data.get("blog"),
-                "twitter_username": data.get("twitter_username"),
-                "public_repos": data.get("public_repos", 0),
-                "public_gists": data.get("public_gists", 0),
-                "followers": data.get("followers", 0),
-                "following": data.get("following", 0),
-                "created_at": data.get("created_at"),
-                "updated_at": data.get("updated_at"),
-                "hireable": data.get("hireable"),
-                "profile_url": data.get("html_url")
-            }
+        response = await self._get(url, cache_entry=cache_entry)
+        
+        if response.status_code == 304:
+            return cache_entry["data"]
+        elif response.status_code == 404:
+            raise ValueError(f"GitHub user '{username}' not found")
+        elif response.status_code == 403:
+            raise Exception("GitHub API rate limit exceeded")
+        elif response.status_code != 200:
+            raise Exception(f"GitHub API error: {response.status_code}")
+        
+        data = response.json()
+        
+        return self._remember(response, cache_entry, {
+            "username": data.get("login"),
+            "name": data.get("name"),
+            "avatar_url": data.get("avatar_url"),
+            "bio": data.get("bio"),
+            "company": data.get("company"),
+            "location": data.get("location"),
+            "email": data.get("email"),
+            "blog": data.get("blog"),
+            "twitter_username": data.get("twitter_username"),
+            "public_repos": data.get("public_repos", 0),
+            "public_gists": data.get("public_gists", 0),
+            "followers": data.get("followers", 0),
+            "following": data.get("following", 0),
+            "created_at": data.get("created_at"),
+            "updated_at": data.get("updated_at"),
+            "hireable": data.get("hireable"),
+            "profile_url": data.get("html_url")
+        })
     
-    async def get_user_repositories(self, username: str, max_repos: int = 100) -> List[Dict[str, Any]]:
+    async def get_user_repositories(self, username: str, max_repos: int = 100, cache_entry: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Fetch user's public repositories
         
@@ -136,6 +232,7 @@ class GitHubExtractor:
         Args:
             username: GitHub username
             max_repos: Maximum number of repositories to fetch (default 100)
+            cache_entry: Previous response for conditional revalidation, updated in place
             
         Returns:
             List of repository data dictionaries
@@ -147,40 +244,41 @@ class GitHubExtractor:
             "direction": "desc"
         }
         
-        async with httpx.AsyncClient(timeout=self.TIMEOUT) as client:
-            response = await client.get(url, headers=self.headers, params=params)
-            
-            if response.status_code != 200:
-                logger.warning(f"Failed to fetch repositories for {username}: {response.status_code}")
-                return []
-            
-            repos_data = response.json()
-            
-            repositories = []
-            for repo in repos_data:
-                repositories.append({
-                    "name": repo.get("name"),
-                    "full_name": repo.get("full_name"),
-                    "description": repo.get("description"),
-                    "html_url": repo.get("html_url"),
-                    "homepage": repo.get("homepage"),
-                    "language": repo.get("language"),
-                    "stargazers_count": repo.get("stargazers_count", 0),
-                    "watchers_count": repo.get("watchers_count", 0),
-                    "forks_count": repo.get("forks_count", 0),
-                    "open_issues_count": repo.get("open_issues_count", 0),
-                    "created_at": repo.get("created_at"),
-                    "updated_at": repo.get("updated_at"),
-                    "pushed_at": repo.get("pushed_at"),
-                    "size": repo.get("size", 0),
-                    "topics": repo.get("topics", []),
-                    "is_fork": repo.get("fork", False),
-                    "archived": repo.get("archived", False)
-                })
-            
-            return repositories
+        response = await self._get(url, params=params, cache_entry=cache_entry)
+        
+        if response.status_code == 304:
+            return cache_entry["data"]
+        if response.status_code != 200:
+            # Raised so get_complete_profile reports partial data instead of caching an empty list
+            raise Exception(f"GitHub API error fetching repositories: {response.status_code}")
+        
+        repos_data = response.json()
+        
+        repositories = []
+        for repo in repos_data:
+            repositories.append({
+                "name": repo.get("name"),
+                "full_name": repo.get("full_name"),
+                "description": repo.get("description"),
+                "html_url": repo.get("html_url"),
+                "homepage": repo.get("homepage"),
+                "language": repo.get("language"),
+                "stargazers_count": repo.get("stargazers_count", 0),
+                "watchers_count": repo.get("watchers_count", 0),
+                "forks_count": repo.get("forks_count", 0),
+                "open_issues_count": repo.get("open_issues_count", 0),
+                "created_at": repo.get("created_at"),
+                "updated_at": repo.get("updated_at"),
+                "pushed_at": repo.get("pushed_at"),
+                "size": repo.get("size", 0),
+                "topics": repo.get("topics", []),
+                "is_fork": repo.get("fork", False),
+                "archived": repo.get("archived", False)
+            })
+        
+        return self._remember(response, cache_entry, repositories)
     
-    async def get_user_events(self, username: str, max_events: int = 100) -> List[Dict[str, Any]]:
+    async def get_user_events(self, username: str, max_events: int = 100, cache_entry: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Fetch user's recent public activity events
         
@@ -189,6 +287,7 @@ class GitHubExtractor:
         Args:
             username: GitHub username
             max_events: Maximum number of events to fetch (default 100)
+            cache_entry: Previous response for conditional revalidation, updated in place
             
         Returns:
             List of event data dictionaries
@@ -198,25 +297,26 @@ class GitHubExtractor:
             "per_page": min(max_events, 100)
         }
         
-        async with httpx.AsyncClient(timeout=self.TIMEOUT) as client:
-            response = await client.get(url, headers=self.headers, params=params)
-            
-            if response.status_code != 200:
-                logger.warning(f"Failed to fetch events for {username}: {response.status_code}")
-                return []
-            
-            events_data = response.json()
-            
-            events = []
-            for event in events_data:
-                events.append({
-                    "type": event.get("type"),
-                    "created_at": event.get("created_at"),
-                    "repo": event.get("repo", {}).get("name"),
-                    "public": event.get("public", True)
-                })
-            
-            return events
+        response = await self._get(url, params=params, cache_entry=cache_entry)
+        
+        if response.status_code == 304:
+            return cache_entry["data"]
+        if response.status_code != 200:
+            # Raised so get_complete_profile reports partial data instead of caching an empty list
+            raise Exception(f"GitHub API error fetching events: {response.status_code}")
+        
+        events_data = response.json()
+        
+        events = []
+        for event in events_data:
+            events.append({
+                "type": event.get("type"),
+                "created_at": event.get("created_at"),
+                "repo": event.get("repo", {}).get("name"),
+                "public": event.get("public", True)
+            })
+        
+        return self._remember(response, cache_entry, events)
     
     def analyze_language_usage(self, repositories: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -349,21 +449,62 @@ class GitHubExtractor:
             "last_activity": events[0].get("created_at") if events else None
         }
     
-    async def get_complete_profile(self, username: str) -> Dict[str, Any]:
+    async def get_complete_profile(self, username: str, force_refresh: bool = False) -> Dict[str, Any]:
         """
         Fetch and analyze complete GitHub profile data
         
+        Results are cached per username for GITHUB_CACHE_TTL. Expired entries are
+        kept for GITHUB_CACHE_RETENTION so that refreshes can send conditional
+        requests and reuse unchanged responses.
+        
         Args:
             username: GitHub username
+            force_refresh: Skip the fresh-cache lookup and revalidate against GitHub
             
         Returns:
             Complete profile data with statistics
         """
+        cache_key = username.lower()
+        if not force_refresh:
+            cached = await github_profile_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        previous = await github_profile_cache.get_entry(cache_key) or {}
+        sources = {name: dict(entry) for name, entry in (previous.get("sources") or {}).items()}
+        for name in ("profile", "repositories", "events"):
+            sources.setdefault(name, {})
+        
         try:
-            # Fetch all data
-            profile = await self.get_user_profile(username)
-            repositories = await self.get_user_repositories(username)
-            events = await self.get_user_events(username)
+            # Fetch all data concurrently; a failing sub-call must not discard the others
+            profile, repositories, events = await asyncio.gather(
+                self.get_user_profile(username, cache_entry=sources["profile"]),
+                self.get_user_repositories(username, cache_entry=sources["repositories"]),
+                self.get_user_events(username, cache_entry=sources["events"]),
+                return_exceptions=True
+            )
+            
+            if isinstance(profile, ValueError):
+                # User not found
+                raise profile
+            for result in (profile, repositories, events):
+                if isinstance(result, GitHubRateLimitExceeded):
+                    # Deferred until the window resets rather than stored as partial data
+                    raise result
+            
+            errors = []
+            if isinstance(profile, Exception):
+                errors.append(f"profile: {profile}")
+                profile = {}
+            if isinstance(repositories, Exception):
+                errors.append(f"repositories: {repositories}")
+                repositories = []
+            if isinstance(events, Exception):
+                errors.append(f"events: {events}")
+                events = []
+            
+            if len(errors) == 3:
+                raise Exception("; ".join(errors))
             
             # Analyze data
             language_stats = self.analyze_language_usage(repositories)
@@ -379,8 +520,8 @@ class GitHubExtractor:
                 account_age_days = 0
                 account_age_years = 0
             
-            return {
-                "profile": profile,
+            result = {
+                "profile": profile or None,
                 "statistics": {
                     "repositories": repo_stats,
                     "languages": language_stats,
@@ -389,9 +530,15 @@ class GitHubExtractor:
                     "account_age_years": account_age_years
                 },
                 "repositories": repositories[:10],  # Top 10 repos
-                "fetch_status": "success",
+                "fetch_status": "partial" if errors else "success",
                 "fetched_at": datetime.utcnow().isoformat()
             }
+            if errors:
+                logger.warning(f"Partial GitHub data for {username}: {'; '.join(errors)}")
+                result["error"] = "; ".join(errors)
+            else:
+                await github_profile_cache.set(cache_key, result, {"sources": sources})
+            return result
             
         except ValueError as e:
             # User not found
@@ -405,6 +552,19 @@ class GitHubExtractor:
                 "fetched_at": datetime.utcnow().isoformat()
             }
         
+        except GitHubRateLimitExceeded as e:
+            logger.warning(f"GitHub enrichment for {username} deferred: {str(e)}")
+            return {
+                "profile": None,
+                "statistics": None,
+                "repositories": [],
+                "fetch_status": "rate_limited",
+                "username": username,
+                "error": str(e),
+                "retry_at": datetime.utcfromtimestamp(e.reset).isoformat() if e.reset else None,
+                "fetched_at": datetime.utcnow().isoformat()
+            }
+        
         except Exception as e:
             # Other errors (rate limit, network, etc.)
             logger.error(f"GitHub API error for {username}: {str(e)}")
@@ -428,18 +588,23 @@ class GitHubExtractor:
         """
         url = f"{self.BASE_URL}/rate_limit"
         
-        async with httpx.AsyncClient(timeout=self.TIMEOUT) as client:
-            response = await client.get(url, headers=self.headers)
-            
-            if response.status_code != 200:
-                return {"error": "Failed to fetch rate limit"}
-            
-            data = response.json()
-            core_limit = data.get("resources", {}).get("core", {})
-            
-            return {
-                "limit": core_limit.get("limit"),
-                "remaining": core_limit.get("remaining"),
-                "reset": core_limit.get("reset"),
-                "used": core_limit.get("used")
-            }
+        client = self.get_client()
+        response = await client.get(url, headers=self.headers)
+        
+        if response.status_code != 200:
+            return {"error": "Failed to fetch rate limit"}
+        
+        data = response.json()
+        core_limit = data.get("resources", {}).get("core", {})
+        github_rate_limiter.update_from_status(core_limit)
+        
+        return {
+            "limit": core_limit.get("limit"),
+            "remaining": core_limit.get("remaining"),
+            "reset": core_limit.get("reset"),
+            "used": core_limit.get("used"),
+            "queued": github_rate_limiter.queued
+        }
+
+
+github_extractor = GitHubExtractor(token=settings.GITHUB_API_TOKEN)
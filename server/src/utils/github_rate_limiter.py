@@ -0,0 +1,143 @@
+"""
+GitHub Rate Limit Scheduler
+Tracks the core REST API budget from response headers and holds requests
+back until the window resets instead of letting them fail
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from config.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class GitHubRateLimitExceeded(Exception):
+    """Raised when a request would have to wait longer than GITHUB_RATE_LIMIT_MAX_WAIT"""
+
+    def __init__(self, message: str, reset: Optional[float] = None):
+        super().__init__(message)
+        self.reset = reset
+
+
+class GitHubRateLimiter:
+    """Shared budget for every request sent to the GitHub REST API"""
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset: Optional[float] = None  # epoch seconds
+        self.queued = 0
+        self.last_request = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """
+        Wait until a request may be sent
+
+        Requests go through immediately while the budget is healthy. Once less
+        than GITHUB_RATE_LIMIT_PACE_FRACTION of the limit is left they are spread
+        evenly over the rest of the window, and with no budget left they wait
+        for the reset. Waits longer than GITHUB_RATE_LIMIT_MAX_WAIT are not held
+        at all, so callers can defer the work instead of blocking a worker or an
+        HTTP request until the window resets.
+
+        Raises:
+            GitHubRateLimitExceeded: the request would wait longer than GITHUB_RATE_LIMIT_MAX_WAIT
+        """
+        self.queued += 1
+        try:
+            while True:
+                # Budget and send slots are reserved one caller at a time; every wait happens outside the lock
+                async with self._lock:
+                    now = time.time()
+                    if self.reset is not None and now >= self.reset:
+                        # A new window starts with an unknown budget until the next response
+                        self.remaining = None
+                    if self.reset is None or self.remaining is None or self.remaining > 0:
+                        send_at = now
+                        if self.reset is not None and self.remaining and self.limit and self.remaining < self.limit * settings.GITHUB_RATE_LIMIT_PACE_FRACTION:
+                            # Each caller takes the next evenly spaced slot of the rest of the window
+                            send_at = max(now, self.last_request + (self.reset - now) / self.remaining)
+                        if send_at - now > settings.GITHUB_RATE_LIMIT_MAX_WAIT:
+                            raise GitHubRateLimitExceeded(f"GitHub API rate limit nearly exhausted, resets in {int(self.reset - now)}s", self.reset)
+                        if self.remaining is not None:
+                            self.remaining -= 1
+                        self.last_request = send_at
+                        wait = send_at - now
+                        reserved = True
+                    else:
+                        wait = self.reset - now + 1
+                        if wait > settings.GITHUB_RATE_LIMIT_MAX_WAIT:
+                            raise GitHubRateLimitExceeded(f"GitHub API rate limit exceeded, resets in {int(wait)}s", self.reset)
+                        reserved = False
+
+                if reserved:
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    return
+                logger.warning(f"GitHub rate limit exhausted, holding {self.queued} request(s) for {int(wait)}s")
+                await asyncio.sleep(wait)
+        finally:
+            self.queued -= 1
+
+    def update(self, response: httpx.Response):
+        """
+        Record the budget reported by a GitHub response
+
+        Args:
+            response: Any response from api.github.com
+        """
+        headers = response.headers
+        if "X-RateLimit-Remaining" not in headers:
+            return
+
+        remaining = int(headers["X-RateLimit-Remaining"])
+        reset = float(headers.get("X-RateLimit-Reset", 0)) or None
+        self.limit = int(headers.get("X-RateLimit-Limit", self.limit or 0)) or self.limit
+
+        if self.is_rate_limited(response):
+            remaining = 0
+            retry_after = headers.get("Retry-After")
+            if retry_after:
+                reset = max(reset or 0, time.time() + float(retry_after))
+
+        if reset != self.reset or self.remaining is None:
+            self.remaining = remaining
+        else:
+            # Responses can arrive out of order within a window; keep the lowest count
+            self.remaining = min(self.remaining, remaining)
+        self.reset = reset
+
+    def update_from_status(self, core_limit: Dict[str, Any]):
+        """Record the core budget returned by GET /rate_limit"""
+        if core_limit.get("remaining") is None:
+            return
+        self.limit = core_limit.get("limit")
+        self.remaining = core_limit.get("remaining")
+        self.reset = core_limit.get("reset")
+
+    @staticmethod
+    def is_rate_limited(response: httpx.Response) -> bool:
+        """Whether a response was rejected because the budget ran out"""
+        if response.status_code == 429:
+            return True
+        return response.status_code == 403 and (
+            response.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in response.headers
+        )
+
+    def status(self) -> Dict[str, Any]:
+        """Budget as last seen plus the number of requests waiting for it"""
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reset": int(self.reset) if self.reset else None,
+            "queued": self.queued
+        }
+
+
+github_rate_limiter = GitHubRateLimiter()
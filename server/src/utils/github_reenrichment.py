@@ -0,0 +1,102 @@
+"""
+GitHub Re-enrichment Worker
+Re-runs GitHub enrichments that the rate limit deferred once the window has
+reset, and rescores the CVs that were scored without their GitHub data
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Optional
+
+from fastapi import FastAPI
+
+from config.config import settings
+from models.cv import CvModel
+from models.github_deferral import GitHubDeferralModel
+from utils.cv_pipeline import cv_pipeline
+from utils.github_extractor import github_extractor
+
+logger = logging.getLogger(__name__)
+
+cv_model = CvModel()
+github_deferral_model = GitHubDeferralModel()
+
+
+class GitHubReenrichment:
+    """Background task draining the github_deferrals collection"""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.context = None
+
+    async def start(self, app: FastAPI):
+        """
+        Start the worker; deferrals stored by a previous run are picked up on its first pass
+
+        Args:
+            app: Application holding the database handle
+        """
+        self.context = SimpleNamespace(app=app)
+        self.task = asyncio.create_task(self._work())
+
+    async def stop(self):
+        """Cancel the worker; pending deferrals stay stored for the next start"""
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _work(self):
+        while True:
+            try:
+                done = await self.process_due()
+                if done:
+                    logger.info(f"Re-enriched {done} CV(s) with GitHub data")
+            except Exception as e:
+                logger.error(f"Error re-enriching deferred GitHub data: {e}")
+            await asyncio.sleep(settings.GITHUB_DEFERRED_POLL_INTERVAL)
+
+    async def process_due(self) -> int:
+        """
+        Re-enrich and rescore every CV whose retry time has passed
+
+        Returns:
+            Number of CVs whose deferral was resolved
+        """
+        done = 0
+        for deferral in await github_deferral_model.fetch_due(self.context, settings.GITHUB_DEFERRED_BATCH_SIZE):
+            cv_id = deferral["_id"]
+            try:
+                github_data = await github_extractor.get_complete_profile(deferral["username"], force_refresh=True)
+            except Exception as e:
+                await self._retry_later(deferral, datetime.now(timezone.utc) + timedelta(seconds=settings.GITHUB_DEFERRED_RETRY_DELAY), str(e))
+                continue
+
+            if github_data["fetch_status"] == "rate_limited":
+                # Every remaining deferral would meet the same limit
+                await self._retry_later(deferral, github_deferral_model.retry_time(github_data), github_data.get("error"))
+                break
+
+            try:
+                cv = await cv_model.update(self.context, "_id", cv_id, {"githubData": github_data})
+                if cv and not cv.get("isDeleted") and cv.get("resumeContent") and github_data["fetch_status"] in ("success", "partial"):
+                    await cv_pipeline.score_cv(self.context, cv)
+            except Exception as e:
+                await self._retry_later(deferral, datetime.now(timezone.utc) + timedelta(seconds=settings.GITHUB_DEFERRED_RETRY_DELAY), str(e))
+                continue
+
+            await github_deferral_model.remove(self.context, cv_id)
+            done += 1
+        return done
+
+    async def _retry_later(self, deferral: dict, retry_at: datetime, error: Optional[str]):
+        if deferral.get("attempts", 0) + 1 >= settings.GITHUB_DEFERRED_MAX_ATTEMPTS:
+            logger.warning(f"Giving up GitHub enrichment of CV {deferral['_id']}: {error}")
+            await github_deferral_model.remove(self.context, deferral["_id"])
+            return
+        await github_deferral_model.reschedule(self.context, deferral["_id"], retry_at, error)
+
+
+github_reenrichment = GitHubReenrichment()
@@ -0,0 +1,159 @@
+"""
+Mail Outbox Worker
+Delivers emails queued in the email_outbox collection in the background, with
+retry and exponential backoff, so request handlers never wait on Graph
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import List, Optional, Union
+
+from bson.objectid import ObjectId
+from fastapi import FastAPI, Request
+
+from config.config import settings
+from models.cv import CvModel
+from models.outbox import OutboxModel
+from utils.mailing.email_templates import (
+    build_cv_received_email,
+    build_cv_selected_email,
+    build_cv_rejection_email
+)
+from utils.mailing.ms_graph import graph_email_service
+
+logger = logging.getLogger(__name__)
+
+cv_model = CvModel()
+outbox_model = OutboxModel()
+
+# Template builder, the mailStatus recorded on the CV once the email is delivered,
+# and the statuses that delivery may replace. A delivery delayed by retries must
+# not roll back a status the CV reached in the meantime.
+EMAIL_KINDS = {
+    "received": (build_cv_received_email, "received_email_sent", [None, "received_email_sent"]),
+    "selected": (build_cv_selected_email, "selection_email_sent", [None, "received_email_sent", "selection_email_sent", "rejection_email_sent"]),
+    "rejection": (build_cv_rejection_email, "rejection_email_sent", [None, "received_email_sent", "selection_email_sent", "rejection_email_sent"])
+}
+
+
+class MailOutbox:
+    """Durable email queue drained by a background task"""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.context = None
+
+    async def start(self, app: FastAPI):
+        """
+        Start the delivery task and requeue emails a previous run stopped mid-send
+
+        Args:
+            app: Application holding the database handle
+        """
+        self.context = SimpleNamespace(app=app)
+        self.wakeup = asyncio.Event()
+        released = await outbox_model.release_claimed(self.context)
+        if released:
+            logger.info(f"Requeued {released} email(s) left in sending")
+        self.task = asyncio.create_task(self._work())
+
+    async def stop(self):
+        """Cancel the delivery task; queued emails are sent on next start"""
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def enqueue(self, request: Request, kind: str, cv_id: Union[str, ObjectId], recipient_email: str, candidate_name: str, position: str):
+        """
+        Queue an email for delivery
+
+        Args:
+            kind: One of EMAIL_KINDS
+            cv_id: CV whose mailStatus is updated once the email is delivered
+            recipient_email: Candidate's email address
+            candidate_name: Name of the candidate
+            position: Position applied for
+        """
+        if kind not in EMAIL_KINDS:
+            raise ValueError(f"Unknown email kind: {kind}")
+        await outbox_model.enqueue(request, {
+            "kind": kind,
+            "cvId": ObjectId(cv_id),
+            "recipientEmail": recipient_email,
+            "candidateName": candidate_name,
+            "position": position
+        })
+        if self.wakeup:
+            self.wakeup.set()
+
+    async def is_queued(self, request: Request, kind: str, cv_id: Union[str, ObjectId]) -> bool:
+        """Whether an email of this kind was already queued for the CV, in any delivery state"""
+        return await outbox_model.exists(request, {"kind": kind, "cvId": ObjectId(cv_id)})
+
+    async def _work(self):
+        while True:
+            self.wakeup.clear()
+            try:
+                delivered = await self.deliver_due()
+            except Exception as e:
+                logger.error(f"Error draining email outbox: {e}")
+                delivered = 0
+            if delivered:
+                continue
+            # Nothing due, sleep until an email is queued or a retry may have come due
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), settings.MAIL_OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def deliver_due(self) -> int:
+        """
+        Send one batch of due emails and record the outcome of each
+
+        Returns:
+            Number of emails attempted
+        """
+        emails = await outbox_model.claim_due(self.context, settings.MAIL_OUTBOX_BATCH_SIZE)
+        if not emails:
+            return 0
+
+        try:
+            messages = []
+            for email in emails:
+                build, _, _ = EMAIL_KINDS[email["kind"]]
+                messages.append(build(email["recipientEmail"], email["candidateName"], email["position"]))
+            results = await graph_email_service.send_email_batch(messages)
+        except Exception as e:
+            # Claimed emails only leave sending through here, or they would wait for the next restart
+            logger.error(f"Email batch failed: {e}")
+            for email in emails:
+                await outbox_model.mark_failed(self.context, email["_id"], str(e), self._next_attempt(email["attempts"]))
+            return len(emails)
+
+        sent_ids = []
+        status_updates = []
+        for email, sent in zip(emails, results):
+            if sent:
+                sent_ids.append(email["_id"])
+                _, mail_status, replaces = EMAIL_KINDS[email["kind"]]
+                status_updates.append((email["cvId"], {"mailStatus": mail_status}, {"mailStatus": {"$in": replaces}}))
+            else:
+                await outbox_model.mark_failed(self.context, email["_id"], "Graph did not accept the message", self._next_attempt(email["attempts"]))
+
+        await outbox_model.mark_sent(self.context, sent_ids)
+        await cv_model.bulk_update_if(self.context, status_updates)
+        return len(emails)
+
+    @staticmethod
+    def _next_attempt(attempts: int) -> Optional[datetime]:
+        if attempts >= settings.MAIL_OUTBOX_MAX_ATTEMPTS:
+            return None
+        delay = min(settings.MAIL_OUTBOX_RETRY_BASE_DELAY * 2 ** (attempts - 1), settings.MAIL_OUTBOX_RETRY_MAX_DELAY)
+        return datetime.now(timezone.utc) + timedelta(seconds=delay)
+
+
+mail_outbox = MailOutbox()
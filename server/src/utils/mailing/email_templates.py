@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
 from utils.mailing.ms_graph import graph_email_service
 
 # Get the templates directory path
@@ -8,23 +9,75 @@ TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
 base_dir = os.path.dirname(os.path.abspath(__file__)) 
 file_path = os.path.join(base_dir, f"./templates")
 
-def load_template(template_name: str) -> str:
-    """Load an HTML email template from the templates directory."""
-    template_path = Path(file_path) / template_name
-    if not template_path.exists():
-        raise FileNotFoundError(f"Template {template_name} not found at {template_path}")
-    
-    with open(template_path, "r", encoding="utf-8") as f:
-        return f.read()
+def _compile_templates() -> Dict[str, Template]:
+    """Compile every HTML template in the templates directory once, at import."""
+    environment = Environment(
+        loader=FileSystemLoader(file_path),
+        autoescape=select_autoescape(["html"]),
+        auto_reload=False
+    )
+    return {
+        template_name: environment.get_template(template_name)
+        for template_name in environment.list_templates(extensions=["html"])
+    }
+
+
+TEMPLATES = _compile_templates()
+
+
+def load_template(template_name: str) -> Template:
+    """Return a precompiled HTML email template; sending never touches the disk."""
+    template = TEMPLATES.get(template_name)
+    if template is None:
+        raise FileNotFoundError(f"Template {template_name} not found at {Path(file_path) / template_name}")
+    return template
 
 
-def render_template(template_content: str, variables: Dict[str, Any]) -> str:
-    """Replace template variables with actual values."""
-    rendered = template_content
-    for key, value in variables.items():
-        placeholder = f"{{{{{key}}}}}"
-        rendered = rendered.replace(placeholder, str(value))
-    return rendered
+def render_template(template: Template, variables: Dict[str, Any]) -> str:
+    """Render a compiled template with the given variables in a single pass."""
+    return template.render(variables)
+
+
+def build_cv_received_email(recipient_email: str, candidate_name: str, position: str) -> Dict[str, str]:
+    """Render the subject and body of a CV received email."""
+    template = load_template("cv_received_template.html")
+    return {
+        "subject": f"Application Received - {position}",
+        "email_to": recipient_email,
+        "body": render_template(template, {
+            "email": recipient_email,
+            "name": candidate_name,
+            "position": position
+        })
+    }
+
+
+def build_cv_selected_email(recipient_email: str, candidate_name: str, position: str) -> Dict[str, str]:
+    """Render the subject and body of a selection email."""
+    template = load_template("cv_selected_template.html")
+    return {
+        "subject": f"Congratulations! You've Been Selected - {position}",
+        "email_to": recipient_email,
+        "body": render_template(template, {
+            "email": recipient_email,
+            "name": candidate_name,
+            "position": position
+        })
+    }
+
+
+def build_cv_rejection_email(recipient_email: str, candidate_name: str, position: str) -> Dict[str, str]:
+    """Render the subject and body of a rejection email."""
+    template = load_template("cv_rejection_template.html")
+    return {
+        "subject": f"Application Update - {position}",
+        "email_to": recipient_email,
+        "body": render_template(template, {
+            "email": recipient_email,
+            "name": candidate_name,
+            "position": position
+        })
+    }
 
 
 async def send_cv_received_email(
@@ -45,20 +98,12 @@ async def send_cv_received_email(
         Response from email service
     """
     try:
-        template = load_template("cv_received_template.html")
-        
-        email_body = render_template(template, {
-            "email": recipient_email,
-            "name": candidate_name,
-            "position": position
-        })
-        
-        subject = f"Application Received - {position}"
+        email = build_cv_received_email(recipient_email, candidate_name, position)
         
         await graph_email_service.send_email(
-            subject=subject,
+            subject=email["subject"],
             email_to=recipient_email,
-            body=email_body,
+            body=email["body"],
             cc_emails=cc_emails
         )
         
@@ -91,20 +136,12 @@ async def send_cv_selected_email(
         Response from email service
     """
     try:
-        template = load_template("cv_selected_template.html")
-        
-        email_body = render_template(template, {
-            "email": recipient_email,
-            "name": candidate_name,
-            "position": position
-        })
-        
-        subject = f"Congratulations! You've Been Selected - {position}"
+        email = build_cv_selected_email(recipient_email, candidate_name, position)
         
         await graph_email_service.send_email(
-            subject=subject,
+            subject=email["subject"],
             email_to=recipient_email,
-            body=email_body,
+            body=email["body"],
             cc_emails=cc_emails
         )
         
@@ -196,20 +233,12 @@ async def send_cv_rejection_email(
         Response from email service
     """
     try:
-        template = load_template("cv_rejection_template.html")
-        
-        email_body = render_template(template, {
-            "email": recipient_email,
-            "name": candidate_name,
-            "position": position
-        })
-        
-        subject = f"Application Update - {position}"
+        email = build_cv_rejection_email(recipient_email, candidate_name, position)
         
         await graph_email_service.send_email(
-            subject=subject,
+            subject=email["subject"],
             email_to=recipient_email,
-            body=email_body,
+            body=email["body"],
             cc_emails=cc_emails
         )
         
@@ -222,3 +251,35 @@ async def send_cv_rejection_email(
             "status": "error",
             "message": f"Failed to send rejection email: {str(e)}"
         }
+
+
+async def send_cv_selected_emails(candidates: List[Dict[str, str]]) -> List[bool]:
+    """
+    Send selection emails to several candidates through Graph JSON batching.
+    
+    Args:
+        candidates: Dicts with recipient_email, candidate_name and position
+        
+    Returns:
+        Whether each email was accepted, in input order
+    """
+    return await graph_email_service.send_email_batch([
+        build_cv_selected_email(candidate["recipient_email"], candidate["candidate_name"], candidate["position"])
+        for candidate in candidates
+    ])
+
+
+async def send_cv_rejection_emails(candidates: List[Dict[str, str]]) -> List[bool]:
+    """
+    Send rejection emails to several candidates through Graph JSON batching.
+    
+    Args:
+        candidates: Dicts with recipient_email, candidate_name and position
+        
+    Returns:
+        Whether each email was accepted, in input order
+    """
+    return await graph_email_service.send_email_batch([
+        build_cv_rejection_email(candidate["recipient_email"], candidate["candidate_name"], candidate["position"])
+        for candidate in candidates
+    ])
@@ -1,12 +1,21 @@
 import os
+import time
+import asyncio
+import logging
 import webbrowser
+from typing import List, Optional
 
-import requests
+import httpx
 import msal
 from dotenv import load_dotenv
+from config.config import settings
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 MS_GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+# Maximum number of requests Graph accepts in one $batch call
+GRAPH_BATCH_LIMIT = 20
 
 def _required_env(name: str) -> str:
     value = os.getenv(name)
@@ -22,61 +31,114 @@ base_dir = os.path.dirname(os.path.abspath(__file__))
 token_path = os.path.join(base_dir, f"./refresh_token.txt")
 # SENDER_EMAIL = _required_env("OUTLOOK_EMAIL")
 
+# Scopes needed for personal Outlook accounts (delegated permissions)
+SCOPES = [
+    "https://graph.microsoft.com/Mail.Send",
+    "https://graph.microsoft.com/Calendars.ReadWrite"
+]
+
 class GraphEmailService:
-    def get_access_token(self):
-        # Scopes needed for personal Outlook accounts (delegated permissions)
-        scopes = [
-            "https://graph.microsoft.com/Mail.Send",
-            "https://graph.microsoft.com/Calendars.ReadWrite"
-        ]
+    def __init__(self):
+        self._msal_client: Optional[msal.ConfidentialClientApplication] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        # Access token kept in memory until shortly before it expires
+        self._access_token: Optional[str] = None
+        self._expires_at = 0.0
+        self._refresh_token: Optional[str] = None
+        self._token_lock = asyncio.Lock()
+
+    @property
+    def msal_client(self) -> msal.ConfidentialClientApplication:
+        # Built on first token request, since constructing it contacts the authority
+        if self._msal_client is None:
+            self._msal_client = msal.ConfidentialClientApplication(
+                client_id=APPLICATION_ID,
+                client_credential=CLIENT_SECRET,
+                authority=f"https://login.microsoftonline.com/consumers"
+            )
+        return self._msal_client
+
+    def get_client(self) -> httpx.AsyncClient:
+        """
+        Shared keep-alive client for every Graph request, opened on first use
+        
+        Returns:
+            Shared httpx.AsyncClient
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=MS_GRAPH_BASE_URL,
+                timeout=settings.MAIL_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.MAIL_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.MAIL_MAX_KEEPALIVE_CONNECTIONS
+                )
+            )
+        return self._client
+
+    async def close_client(self):
+        """Close the shared client at application shutdown"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_access_token(self) -> str:
+        """
+        Return the cached access token, refreshing it only when it is about to expire
         
-        client = msal.ConfidentialClientApplication(
-            client_id=APPLICATION_ID,
-            client_credential=CLIENT_SECRET,
-            authority=f"https://login.microsoftonline.com/consumers"
-        )
+        Returns:
+            Graph access token
+        """
+        if self._access_token and time.time() < self._expires_at:
+            return self._access_token
+
+        # Concurrent sends wait for a single refresh instead of each redeeming the refresh token
+        async with self._token_lock:
+            if self._access_token and time.time() < self._expires_at:
+                return self._access_token
+            # MSAL performs blocking HTTP (and possibly console input), keep it off the event loop
+            token_response = await asyncio.to_thread(self._acquire_token)
+            self._access_token = token_response["access_token"]
+            expires_in = int(token_response.get("expires_in", 3600))
+            self._expires_at = time.time() + max(expires_in - settings.MAIL_TOKEN_REFRESH_MARGIN, 0)
+            return self._access_token
+
+    def _acquire_token(self) -> dict:
         #Check if there is a refresh token available
-        refresh_token = None
-        if os.path.exists(token_path):
+        if self._refresh_token is None and os.path.exists(token_path):
             with open(token_path, "r") as f:
-                refresh_token = f.read().strip()
-        if refresh_token:
-            token_response = client.acquire_token_by_refresh_token(refresh_token, scopes=scopes)
+                self._refresh_token = f.read().strip()
+        if self._refresh_token:
+            token_response = self.msal_client.acquire_token_by_refresh_token(self._refresh_token, scopes=SCOPES)
         else:
             # If no refresh token, acquire a new access token
-            auth_request_url = client.get_authorization_request_url(scopes=scopes)
+            auth_request_url = self.msal_client.get_authorization_request_url(scopes=SCOPES)
             webbrowser.open(auth_request_url)
             print("Please authenticate in the browser and paste the resulting URL here:")
             authorization_code = input("Enter the authorization code: ")
 
             if not authorization_code:
                 raise RuntimeError("Authorization code is required to acquire access token")
-            token_response = client.acquire_token_by_authorization_code(
+            token_response = self.msal_client.acquire_token_by_authorization_code(
                 authorization_code, 
-                scopes=scopes
+                scopes=SCOPES
             )
         if "access_token" in token_response:
-            # Save the refresh token for future use
-            if "refresh_token" in token_response:
+            # Save the refresh token for future use, only when it was rotated
+            new_refresh_token = token_response.get("refresh_token")
+            if new_refresh_token and new_refresh_token != self._refresh_token:
+                self._refresh_token = new_refresh_token
                 with open(token_path, "w") as f:
-                    f.write(token_response["refresh_token"])
-            return token_response["access_token"]
+                    f.write(new_refresh_token)
+            return token_response
         else:
             raise RuntimeError(f"Failed to acquire access token: {token_response.get('error_description', 'No error description')}")
         
 
-    async def send_email(self, subject:str, email_to: str, body: str, cc_emails: list = CC_EMAILS):
+    @staticmethod
+    def build_message(subject: str, body: str) -> dict:
         cc_emails = CC_EMAILS
-        access_token = self.get_access_token()
-
-        url = "https://graph.microsoft.com/v1.0/me/sendMail"
-
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
-
-        message = {
+        return {
             "message": {
                 "subject": subject,
                 "body": {
@@ -92,12 +154,98 @@ class GraphEmailService:
             }
         }
 
-        response = requests.post(url, headers=headers, json=message)
+    async def send_email(self, subject:str, email_to: str, body: str, cc_emails: list = CC_EMAILS):
+        access_token = await self.get_access_token()
+
+        url = "/me/sendMail"
+
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json"
+        }
+
+        message = self.build_message(subject, body)
+
+        response = await self.get_client().post(url, headers=headers, json=message)
+        if response.status_code == 401:
+            # Token revoked before its expiry, fetch a new one on the next send
+            self._access_token = None
         # print(f"Email send response: {response} - {response.status_code} - {response.text}")
         if response.status_code == 202:
             return {"status": "Email sent successfully"}
         else:
             return {"error": response.json()}
+
+    async def send_email_batch(self, emails: List[dict]) -> List[bool]:
+        """
+        Send several emails through Graph JSON batching
+        
+        Emails are grouped GRAPH_BATCH_LIMIT per $batch call and the calls run
+        MAIL_BATCH_CONCURRENCY at a time.
+        
+        Args:
+            emails: Dicts with subject, email_to and body
+            
+        Returns:
+            Whether Graph accepted each email, in input order
+        """
+        semaphore = asyncio.Semaphore(settings.MAIL_BATCH_CONCURRENCY)
+
+        async def _send_chunk(chunk: List[dict]) -> List[bool]:
+            async with semaphore:
+                return await self._post_batch(chunk)
+
+        chunks = [emails[i:i + GRAPH_BATCH_LIMIT] for i in range(0, len(emails), GRAPH_BATCH_LIMIT)]
+        results = await asyncio.gather(*[_send_chunk(chunk) for chunk in chunks])
+        return [sent for chunk_results in results for sent in chunk_results]
+
+    async def _post_batch(self, chunk: List[dict]) -> List[bool]:
+        sent = [False] * len(chunk)
+        pending = list(range(len(chunk)))
+        for attempt in range(2):
+            access_token = await self.get_access_token()
+            payload = {
+                "requests": [
+                    {
+                        "id": str(index),
+                        "method": "POST",
+                        "url": "/me/sendMail",
+                        "headers": {"Content-Type": "application/json"},
+                        "body": self.build_message(chunk[index]["subject"], chunk[index]["body"])
+                    }
+                    for index in pending
+                ]
+            }
+            try:
+                response = await self.get_client().post(
+                    "/$batch",
+                    headers={"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"},
+                    json=payload
+                )
+            except httpx.HTTPError as e:
+                logger.error(f"Graph batch send failed: {e}")
+                return sent
+            if response.status_code == 401:
+                self._access_token = None
+            if response.status_code != 200:
+                logger.error(f"Graph batch send failed: {response.status_code} - {response.text}")
+                return sent
+
+            throttled = []
+            retry_after = 0
+            for item in response.json().get("responses", []):
+                index = int(item["id"])
+                if item.get("status") == 202:
+                    sent[index] = True
+                elif item.get("status") == 429:
+                    throttled.append(index)
+                    retry_after = max(retry_after, int(item.get("headers", {}).get("Retry-After", 1)))
+            if not throttled:
+                break
+            # Mailbox throttling applies to individual requests of a batch, retry just those once
+            await asyncio.sleep(retry_after)
+            pending = throttled
+        return sent
     
     async def send_calendar_invite(
         self,
@@ -123,9 +271,9 @@ class GraphEmailService:
             location: Optional meeting location
         """
         
-        access_token = self.get_access_token()
+        access_token = await self.get_access_token()
         
-        url = "https://graph.microsoft.com/v1.0/me/events"
+        url = "/me/events"
         
         headers = {
             "Authorization": f"Bearer {access_token}",
@@ -165,7 +313,10 @@ class GraphEmailService:
             "responseRequested": True
         }
         
-        response = requests.post(url, headers=headers, json=event)
+        response = await self.get_client().post(url, headers=headers, json=event)
+        if response.status_code == 401:
+            # Token revoked before its expiry, fetch a new one on the next send
+            self._access_token = None
         # print(f"Calendar invite response: {response} - {response.status_code} - {response.text}")
         if response.status_code in [200, 201]:
             return {"status": "Calendar invite sent successfully", "event": response.json()}
@@ -0,0 +1,78 @@
+"""
+PDF Link Reader
+Collects hyperlink URIs straight from page /Annots entries, without building
+pdfplumber pages or running layout analysis. Runs in a process pool so the
+parsing never blocks the event loop.
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Set, Union
+
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+
+from config.config import settings
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _decode(value) -> Optional[str]:
+    value = resolve1(value)
+    if isinstance(value, bytes):
+        # URIs are ASCII per the PDF spec, but producers do emit UTF-8
+        return value.decode("utf-8", errors="ignore")
+    if isinstance(value, str):
+        return value
+    return None
+
+
+def read_link_uris(file_path: Union[str, Path]) -> Set[str]:
+    """
+    Read the URI of every link annotation in a PDF
+
+    Args:
+        file_path: Path of the PDF
+
+    Returns:
+        Distinct URIs in the document
+    """
+    uris = set()
+    with open(file_path, "rb") as f:
+        document = PDFDocument(PDFParser(f))
+        for page in PDFPage.create_pages(document):
+            for annot in resolve1(page.annots) or []:
+                annot = resolve1(annot)
+                if not isinstance(annot, dict):
+                    continue
+                action = resolve1(annot.get("A"))
+                if not isinstance(action, dict):
+                    continue
+                uri = _decode(action.get("URI"))
+                if uri:
+                    uris.add(uri)
+    return uris
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.PDF_LINK_WORKERS)
+    return _executor
+
+
+def shutdown_executor():
+    """Stop the worker processes at application shutdown"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def read_link_uris_async(file_path: Union[str, Path]) -> Set[str]:
+    """Run read_link_uris in the process pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), read_link_uris, str(file_path))
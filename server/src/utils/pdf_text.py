@@ -0,0 +1,61 @@
+"""
+PDF Text Layer
+Reads the embedded text of a PDF locally so that text-based CVs can be sent to
+Gemini as compact text instead of an uploaded file
+"""
+
+import asyncio
+import re
+from pathlib import Path
+from typing import Optional, Union
+
+from pdfminer.high_level import extract_pages
+from pdfminer.layout import LTTextContainer
+
+from config.config import settings
+from utils.pdf_links import get_executor
+
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+def _compact(text: str) -> str:
+    text = _SPACES.sub(" ", text)
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+def read_text_layer(file_path: Union[str, Path]) -> Optional[str]:
+    """
+    Extract the text layer of every page
+
+    Args:
+        file_path: Path of the PDF
+
+    Returns:
+        Compacted text with pages separated by blank lines, or None for scanned or
+        image-only documents that need the file itself: fewer than
+        PDF_TEXT_MIN_CHARS_PER_PAGE characters per page on average, or more than
+        PDF_TEXT_MAX_EMPTY_PAGE_SHARE of the pages without any text
+    """
+    pages = []
+    page_count = 0
+    total_chars = 0
+    for page_layout in extract_pages(str(file_path)):
+        page_count += 1
+        text = "".join(element.get_text() for element in page_layout if isinstance(element, LTTextContainer))
+        chars = len("".join(text.split()))
+        if chars:
+            total_chars += chars
+            pages.append(_compact(text))
+    # Judged over the whole document so a short or blank last page (references, a page break) keeps the text path
+    if not pages or total_chars < settings.PDF_TEXT_MIN_CHARS_PER_PAGE * page_count:
+        return None
+    if page_count - len(pages) > settings.PDF_TEXT_MAX_EMPTY_PAGE_SHARE * page_count:
+        return None
+    return "\n\n".join(pages)
+
+
+async def read_text_layer_async(file_path: Union[str, Path]) -> Optional[str]:
+    """Run read_text_layer in the PDF process pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), read_text_layer, str(file_path))
@@ -0,0 +1,134 @@
+"""
+Upload Storage
+Writes uploaded PDFs and the PDF members of uploaded ZIP archives straight to
+per-CV files, enforcing the configured size limits
+"""
+
+import asyncio
+import shutil
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, List
+
+from fastapi import UploadFile
+
+from config.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload or archive member exceeds a configured limit"""
+
+
+def copy_limited(source: BinaryIO, target_path: Path, max_bytes: int) -> int:
+    """
+    Copy a stream to a file, aborting once more than max_bytes were read
+
+    The size declared by a client or a ZIP header is not trusted; the limit is
+    enforced on the bytes actually written and a partial file is removed.
+
+    Args:
+        source: Readable binary stream
+        target_path: File to create
+        max_bytes: Largest accepted size
+
+    Returns:
+        Number of bytes written
+    """
+    written = 0
+    try:
+        with open(target_path, "wb") as target:
+            while chunk := source.read(CHUNK_SIZE):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadTooLarge(f"{target_path.name} exceeds {max_bytes} bytes")
+                target.write(chunk)
+    except BaseException:
+        target_path.unlink(missing_ok=True)
+        raise
+    return written
+
+
+def check_declared_size(file: UploadFile, max_bytes: int):
+    """Reject an upload whose declared size already exceeds max_bytes"""
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(f"{file.filename} exceeds {max_bytes} bytes")
+
+
+def check_upload(file: UploadFile):
+    """
+    Apply the declared size and archive directory limits to a PDF or ZIP upload
+    before any record is created for it; the bytes are checked again while copying
+
+    Raises:
+        UploadTooLarge: A declared size or archive limit is exceeded
+        zipfile.BadZipFile: A .zip upload is not a ZIP archive
+    """
+    if file.filename.endswith(".zip"):
+        with open_zip(file) as zip_ref:
+            pdf_members(zip_ref)
+    else:
+        check_declared_size(file, settings.UPLOAD_MAX_FILE_BYTES)
+
+
+async def store_upload(file: UploadFile, target_path: Path, max_bytes: int) -> int:
+    """
+    Write an uploaded file to its final location off the event loop
+
+    Args:
+        file: Uploaded file
+        target_path: File to create
+        max_bytes: Largest accepted size
+
+    Returns:
+        Number of bytes written
+    """
+    check_declared_size(file, max_bytes)
+    return await asyncio.to_thread(copy_limited, file.file, target_path, max_bytes)
+
+
+def open_zip(file: UploadFile) -> zipfile.ZipFile:
+    """
+    Open an uploaded archive in place, without copying it to the upload directory
+
+    Raises:
+        UploadTooLarge: The archive itself exceeds UPLOAD_MAX_ARCHIVE_BYTES
+        zipfile.BadZipFile: The upload is not a ZIP archive
+    """
+    check_declared_size(file, settings.UPLOAD_MAX_ARCHIVE_BYTES)
+    return zipfile.ZipFile(file.file, "r")
+
+
+def pdf_members(zip_ref: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    """
+    List the PDF members of an archive, rejecting it before anything is
+    extracted when the central directory exceeds the configured limits
+
+    Returns:
+        PDF members in archive order
+    """
+    members = [info for info in zip_ref.infolist() if not info.is_dir() and info.filename.lower().endswith(".pdf")]
+    if len(members) > settings.UPLOAD_MAX_ZIP_MEMBERS:
+        raise UploadTooLarge(f"Archive holds more than {settings.UPLOAD_MAX_ZIP_MEMBERS} PDFs")
+    if sum(info.file_size for info in members) > settings.UPLOAD_MAX_ZIP_UNCOMPRESSED_BYTES:
+        raise UploadTooLarge(f"Archive expands to more than {settings.UPLOAD_MAX_ZIP_UNCOMPRESSED_BYTES} bytes")
+    for info in members:
+        if info.file_size > settings.UPLOAD_MAX_FILE_BYTES:
+            raise UploadTooLarge(f"{info.filename} exceeds {settings.UPLOAD_MAX_FILE_BYTES} bytes")
+    return members
+
+
+def _copy_member(zip_ref: zipfile.ZipFile, member: zipfile.ZipInfo, target_path: Path) -> int:
+    with zip_ref.open(member) as source:
+        return copy_limited(source, target_path, settings.UPLOAD_MAX_FILE_BYTES)
+
+
+async def store_zip_member(zip_ref: zipfile.ZipFile, member: zipfile.ZipInfo, target_path: Path) -> int:
+    """
+    Decompress one archive member straight into its per-CV file off the event loop
+
+    Returns:
+        Number of bytes written
+    """
+    return await asyncio.to_thread(_copy_member, zip_ref, member, target_path)
@@ -0,0 +1,122 @@
+"""
+Upload Batch Worker
+Processes persisted CV upload batches in the background so that /cv/upload_cv
+can return as soon as the files are stored
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional
+
+from bson.objectid import ObjectId
+from fastapi import FastAPI
+
+from config.config import settings
+from models.batch import BatchModel
+from utils.cv_pipeline import cv_pipeline
+
+logger = logging.getLogger(__name__)
+
+batch_model = BatchModel()
+
+# Stages after which a file does not need to be processed again when a batch is resumed
+FINISHED_STAGES = ("mailed", "failed")
+
+
+class UploadWorker:
+    """In-process queue of upload batches drained by background tasks"""
+
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks = []
+        self.context = None
+
+    async def start(self, app: FastAPI):
+        """
+        Start the worker tasks and re-queue batches left unfinished by a previous run
+
+        Args:
+            app: Application holding the database handle
+        """
+        # Models only read request.app, so the app itself is enough context outside a request
+        self.context = SimpleNamespace(app=app)
+        self.queue = asyncio.Queue()
+        self.tasks = [asyncio.create_task(self._work()) for _ in range(settings.UPLOAD_WORKER_COUNT)]
+
+        for batch_id in await batch_model.find_unfinished(self.context):
+            logger.info(f"Resuming upload batch {batch_id}")
+            await self.enqueue(batch_id)
+
+    async def stop(self):
+        """Cancel the worker tasks; unfinished batches are resumed on next start"""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def enqueue(self, batch_id: str):
+        """Queue a stored batch for processing"""
+        await self.queue.put(batch_id)
+
+    async def _work(self):
+        while True:
+            batch_id = await self.queue.get()
+            try:
+                await self.process_batch(batch_id)
+            except Exception as e:
+                logger.error(f"Error processing upload batch {batch_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def process_batch(self, batch_id: str):
+        """
+        Run the ingestion pipeline for every unfinished file of a batch and
+        record each stage transition on the batch document
+
+        Args:
+            batch_id: MongoDB ObjectId of the upload batch
+        """
+        batch = await batch_model.find(self.context, "_id", ObjectId(batch_id))
+        if not batch:
+            logger.warning(f"Upload batch {batch_id} not found")
+            return
+
+        await batch_model.set_status(self.context, batch_id, "processing")
+
+        # Scored files only miss their received email, the rest go through the whole pipeline
+        for index, file in enumerate(batch["files"]):
+            if file["stage"] == "scored":
+                await self._resume_scored(batch_id, index, file, batch["jobName"])
+
+        indexes = [index for index, file in enumerate(batch["files"]) if file["stage"] not in FINISHED_STAGES + ("scored",)]
+        items = [
+            (batch["files"][index]["filename"], ObjectId(batch["files"][index]["cvId"]), Path(batch["files"][index]["storedPath"]))
+            for index in indexes
+        ]
+
+        async def _on_stage(item_index: int, stage: str, error: Optional[str]):
+            await batch_model.set_file_stage(self.context, batch_id, indexes[item_index], stage, error)
+
+        if items:
+            try:
+                await cv_pipeline.run(self.context, items, batch["jobName"], batch["jobId"], _on_stage)
+            except Exception as e:
+                # The batch could not start (e.g. the job is missing), fail every pending file
+                for item_index in range(len(items)):
+                    await _on_stage(item_index, "failed", str(e))
+
+        await batch_model.set_status(self.context, batch_id, "completed", {"completedAt": datetime.now(timezone.utc)})
+
+    async def _resume_scored(self, batch_id: str, index: int, file: dict, job_name: str):
+        try:
+            if await cv_pipeline.resume_received_email(self.context, ObjectId(file["cvId"]), job_name):
+                await batch_model.set_file_stage(self.context, batch_id, index, "mailed", None)
+        except Exception as e:
+            logger.error(f"Error queueing the received email for {file['filename']}: {e}")
+            await batch_model.set_file_stage(self.context, batch_id, index, "failed", str(e))
+
+
+upload_worker = UploadWorker()
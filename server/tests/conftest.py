@@ -0,0 +1,10 @@
+import os
+
+# Placeholder credentials so modules that read them at import time can load; tests never reach Graph
+for name, value in {
+    "TENANT_ID": "test-tenant",
+    "CLIENT_ID": "test-client",
+    "CLIENT_SECRET": "test-secret",
+    "CC_EMAILS": "hr@example.com"
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("openpyxl")
+
+from openpyxl import load_workbook
+
+from utils.excel_extraction import EXPORT_HEADERS, MAX_COLUMN_WIDTH, CvExcelWriter
+
+
+def exported_cv(name):
+    return {
+        "candidateName": name,
+        "jobName": "Intern Software Engineer",
+        "finalMark": 72.5,
+        "selectedForInterview": True,
+        "resumeContent": {"personal_info": {"email": f"{name.lower()}@example.com"}},
+        "createdAt": datetime(2025, 1, 1, 9, 30)
+    }
+
+
+def test_batches_are_written_in_order_with_widths_from_the_sample():
+    writer = CvExcelWriter([exported_cv("Short")])
+    writer.append([exported_cv("A much longer candidate name than the sample"), exported_cv("Last")])
+
+    with writer.save() as excel_file:
+        sheet = load_workbook(excel_file)["CV Export"]
+        rows = list(sheet.iter_rows(values_only=True))
+        width = sheet.column_dimensions["A"].width
+
+    assert list(rows[0]) == EXPORT_HEADERS
+    assert [row[0] for row in rows[1:]] == ["Short", "A much longer candidate name than the sample", "Last"]
+    assert rows[1][1] == "short@example.com" and rows[1][-2] == "2025-01-01 09:30:00"
+    # Rows after the sample do not widen the columns
+    assert width == min(len("Candidate Name") + 2, MAX_COLUMN_WIDTH)
@@ -0,0 +1,23 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("google.genai")
+pytest.importorskip("pydantic_settings")
+
+from utils.gemini import GeminiPDFExtractor
+
+
+def test_shared_client_opens_once_and_closes(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(GeminiPDFExtractor, "_client", None)
+
+    client = GeminiPDFExtractor.open_client()
+
+    assert GeminiPDFExtractor.open_client() is client
+    assert GeminiPDFExtractor().client is client
+
+    asyncio.run(GeminiPDFExtractor.close_client())
+    assert GeminiPDFExtractor._client is None
+    # Closing twice at shutdown is harmless
+    asyncio.run(GeminiPDFExtractor.close_client())
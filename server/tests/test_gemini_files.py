@@ -0,0 +1,155 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.genai")
+pytest.importorskip("motor")
+pytest.importorskip("pydantic_settings")
+
+from google.genai import types
+
+from utils.gemini import GeminiPDFExtractor
+from utils.gemini_files import GeminiFileStore
+
+
+class FakeFiles:
+    """In-memory stand-in for client.aio.files of the Gemini Files API"""
+
+    def __init__(self, lifetime=timedelta(hours=48)):
+        self.lifetime = lifetime
+        self.files = {}
+        self.uploads = 0
+        self.deleted = []
+
+    async def upload(self, file):
+        self.uploads += 1
+        name = f"files/upload-{self.uploads}"
+        self.files[name] = file
+        return types.File(
+            name=name,
+            uri=f"https://generativelanguage.googleapis.com/v1beta/{name}",
+            mime_type="application/pdf",
+            expiration_time=datetime.now(timezone.utc) + self.lifetime
+        )
+
+    async def delete(self, name):
+        if name not in self.files:
+            raise LookupError(f"{name} does not exist")
+        del self.files[name]
+        self.deleted.append(name)
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def to_list(self, length=None):
+        return self.documents
+
+
+class FakeHandles:
+    """The subset of the gemini_files collection the store uses"""
+
+    def __init__(self):
+        self.documents = {}
+
+    async def find_one(self, filter_dict):
+        document = self.documents.get(filter_dict["_id"])
+        if document and document["expiresAt"] > filter_dict["expiresAt"]["$gt"]:
+            return document
+        return None
+
+    async def update_one(self, filter_dict, update):
+        self.documents[filter_dict["_id"]].update(update["$set"])
+
+    async def find_one_and_replace(self, filter_dict, replacement, upsert=False):
+        previous = self.documents.get(filter_dict["_id"])
+        self.documents[filter_dict["_id"]] = {"_id": filter_dict["_id"], **replacement}
+        return previous
+
+    def find(self, filter_dict, projection=None):
+        [delete_after, expires_at] = filter_dict["$or"]
+        return FakeCursor([
+            {"_id": document["_id"], "name": document["name"]}
+            for document in self.documents.values()
+            if document["deleteAfter"] <= delete_after["deleteAfter"]["$lte"] or document["expiresAt"] <= expires_at["expiresAt"]["$lte"]
+        ])
+
+    async def delete_one(self, filter_dict):
+        document = self.documents.get(filter_dict["_id"])
+        if document and document["name"] == filter_dict["name"]:
+            del self.documents[filter_dict["_id"]]
+
+
+@pytest.fixture
+def files(monkeypatch):
+    files = FakeFiles()
+    # The store must go through the extractor's shared client
+    monkeypatch.setattr(GeminiPDFExtractor, "_client", SimpleNamespace(aio=SimpleNamespace(files=files)))
+    return files
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = GeminiFileStore()
+    handles = FakeHandles()
+    monkeypatch.setattr(store, "get_collection", lambda: handles)
+    return store
+
+
+def test_same_bytes_reuse_one_upload(files, store, tmp_path):
+    pdf = tmp_path / "cv.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+
+    async def extract_twice():
+        return await asyncio.gather(store.get_or_upload(str(pdf), "hash-1"), store.get_or_upload(str(pdf), "hash-1"))
+
+    first, second = asyncio.run(extract_twice())
+
+    assert files.uploads == 1
+    assert first.file_data.file_uri == second.file_data.file_uri
+    assert store._locks == {}
+
+
+def test_handle_close_to_expiry_is_replaced(files, store, tmp_path):
+    pdf = tmp_path / "cv.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    files.lifetime = timedelta(seconds=30)
+    asyncio.run(store.get_or_upload(str(pdf), "hash-1"))
+
+    files.lifetime = timedelta(hours=48)
+    part = asyncio.run(store.get_or_upload(str(pdf), "hash-1"))
+
+    assert files.uploads == 2
+    assert part.file_data.file_uri.endswith("files/upload-2")
+    # The superseded upload is deleted instead of waiting for its expiry
+    assert files.deleted == ["files/upload-1"]
+
+
+def test_sweep_deletes_handles_past_delete_after(files, store, tmp_path, monkeypatch):
+    pdf = tmp_path / "cv.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    asyncio.run(store.get_or_upload(str(pdf), "idle"))
+    asyncio.run(store.get_or_upload(str(pdf), "recent"))
+    handles = store.get_collection()
+    handles.documents["idle"]["deleteAfter"] = datetime.now(timezone.utc) - timedelta(minutes=1)
+
+    removed = asyncio.run(store.sweep())
+
+    assert removed == 1
+    assert files.deleted == ["files/upload-1"]
+    assert set(handles.documents) == {"recent"}
+
+
+def test_sweep_drops_expired_handles_already_gone_remotely(files, store, tmp_path):
+    pdf = tmp_path / "cv.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    asyncio.run(store.get_or_upload(str(pdf), "expired"))
+    handles = store.get_collection()
+    handles.documents["expired"]["expiresAt"] = datetime.now(timezone.utc) - timedelta(minutes=1)
+    files.files.clear()
+
+    assert asyncio.run(store.sweep()) == 1
+    assert handles.documents == {}
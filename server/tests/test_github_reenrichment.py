@@ -0,0 +1,161 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+pytest.importorskip("httpx")
+pytest.importorskip("google.genai")
+pytest.importorskip("pydantic_settings")
+
+from bson.objectid import ObjectId
+
+from utils import github_reenrichment as worker_module
+from utils import github_rate_limiter as limiter_module
+from utils.github_rate_limiter import GitHubRateLimiter, GitHubRateLimitExceeded
+from utils.github_reenrichment import GitHubReenrichment
+
+
+class StubDeferralModel:
+    retry_time = staticmethod(worker_module.GitHubDeferralModel.retry_time)
+
+    def __init__(self, deferrals):
+        self.deferrals = {deferral["_id"]: deferral for deferral in deferrals}
+        self.rescheduled = []
+
+    async def fetch_due(self, request, limit):
+        return list(self.deferrals.values())[:limit]
+
+    async def reschedule(self, request, cv_id, retry_at, error=None):
+        self.rescheduled.append((cv_id, retry_at))
+        self.deferrals[cv_id]["attempts"] += 1
+
+    async def remove(self, request, cv_id):
+        self.deferrals.pop(cv_id)
+
+
+class StubExtractor:
+    def __init__(self, results):
+        self.results = results
+        self.fetched = []
+
+    async def get_complete_profile(self, username, force_refresh=False):
+        self.fetched.append((username, force_refresh))
+        return self.results[username]
+
+
+class StubCvModel:
+    def __init__(self):
+        self.updates = []
+
+    async def update(self, request, field, value, data):
+        self.updates.append((value, data))
+        return {"_id": value, "jobId": "job-1", "isDeleted": False, "resumeContent": {"skills": []}, **data}
+
+
+class StubPipeline:
+    def __init__(self):
+        self.scored = []
+
+    async def score_cv(self, request, cv, job_data=None):
+        self.scored.append(cv["_id"])
+
+
+def deferral(username, attempts=0):
+    return {"_id": ObjectId(), "username": username, "attempts": attempts, "retryAt": datetime.now(timezone.utc)}
+
+
+def run_worker(monkeypatch, deferrals, results):
+    deferral_model, extractor, cvs, pipeline = StubDeferralModel(deferrals), StubExtractor(results), StubCvModel(), StubPipeline()
+    monkeypatch.setattr(worker_module, "github_deferral_model", deferral_model)
+    monkeypatch.setattr(worker_module, "github_extractor", extractor)
+    monkeypatch.setattr(worker_module, "cv_model", cvs)
+    monkeypatch.setattr(worker_module, "cv_pipeline", pipeline)
+
+    worker = GitHubReenrichment()
+    worker.context = SimpleNamespace(app=None)
+    done = asyncio.run(worker.process_due())
+    return done, deferral_model, extractor, cvs, pipeline
+
+
+def test_due_deferrals_are_re_enriched_and_rescored(monkeypatch):
+    first, second = deferral("octocat"), deferral("ghost")
+    results = {"octocat": {"fetch_status": "success"}, "ghost": {"fetch_status": "user_not_found"}}
+
+    done, deferrals, extractor, cvs, pipeline = run_worker(monkeypatch, [first, second], results)
+
+    assert done == 2
+    assert extractor.fetched == [("octocat", True), ("ghost", True)]
+    assert [cv_id for cv_id, _ in cvs.updates] == [first["_id"], second["_id"]]
+    # Only CVs that actually gained GitHub data are rescored
+    assert pipeline.scored == [first["_id"]]
+    assert deferrals.deferrals == {}
+
+
+def test_still_rate_limited_deferrals_wait_for_the_next_reset(monkeypatch):
+    first, second = deferral("octocat"), deferral("ghost")
+    reset = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(minutes=30)
+    results = {"octocat": {"fetch_status": "rate_limited", "retry_at": reset.isoformat()}}
+
+    done, deferrals, extractor, cvs, pipeline = run_worker(monkeypatch, [first, second], results)
+
+    assert done == 0
+    # The rest of the batch is left for the next pass instead of hitting the limit again
+    assert extractor.fetched == [("octocat", True)]
+    assert deferrals.rescheduled == [(first["_id"], reset.replace(tzinfo=timezone.utc))]
+    assert cvs.updates == [] and pipeline.scored == []
+    assert set(deferrals.deferrals) == {first["_id"], second["_id"]}
+
+
+def test_deferrals_are_dropped_after_the_last_attempt(monkeypatch):
+    monkeypatch.setattr(worker_module.settings, "GITHUB_DEFERRED_MAX_ATTEMPTS", 3)
+    last = deferral("octocat", attempts=2)
+
+    done, deferrals, *_ = run_worker(monkeypatch, [last], {"octocat": {"fetch_status": "rate_limited"}})
+
+    assert done == 0
+    assert deferrals.rescheduled == []
+    assert deferrals.deferrals == {}
+
+
+def test_limiter_without_a_known_reset_does_not_wait():
+    limiter = GitHubRateLimiter()
+    limiter.limit, limiter.remaining = 5000, 10
+
+    asyncio.run(asyncio.wait_for(limiter.acquire(), timeout=1))
+
+    assert limiter.remaining == 9
+
+
+def test_limiter_paces_outside_the_lock(monkeypatch):
+    monkeypatch.setattr(limiter_module.settings, "GITHUB_RATE_LIMIT_MAX_WAIT", 5)
+    limiter = GitHubRateLimiter()
+    limiter.limit, limiter.remaining, limiter.reset = 5000, 100, time.time() + 10
+    limiter.last_request = time.time()
+
+    async def paced_and_locked():
+        waiting = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        locked = limiter._lock.locked()
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        return locked
+
+    # The paced request sleeps its ~0.1s slot without holding the lock for other callers
+    assert asyncio.run(paced_and_locked()) is False
+    assert limiter.remaining == 99
+
+
+def test_limiter_refuses_waits_past_the_maximum(monkeypatch):
+    monkeypatch.setattr(limiter_module.settings, "GITHUB_RATE_LIMIT_MAX_WAIT", 5)
+    limiter = GitHubRateLimiter()
+    limiter.limit, limiter.remaining, limiter.reset = 5000, 0, time.time() + 600
+
+    with pytest.raises(GitHubRateLimitExceeded) as error:
+        asyncio.run(limiter.acquire())
+
+    assert error.value.reset == limiter.reset
+    assert limiter.queued == 0
@@ -0,0 +1,167 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from bson.objectid import ObjectId
+from pymongo import MongoClient
+
+from config.indexes import INDEXES
+from models.cv import CvModel
+
+# Explain plans need a real server; point TEST_MONGO_URI at a disposable MongoDB to run these
+TEST_MONGO_URI = os.environ.get("TEST_MONGO_URI")
+pytestmark = pytest.mark.skipif(not TEST_MONGO_URI, reason="TEST_MONGO_URI is not set")
+
+NOW = datetime.now(timezone.utc)
+JOB_ID = str(ObjectId())
+
+# (collection, filter, sort) of the list and lookup queries issued by the models
+FIND_QUERIES = {
+    "fetch_cvs": ("cvs", {"isDeleted": False}, [("createdAt", -1), ("_id", -1)]),
+    "fetch_cvs_page": ("cvs", {"isDeleted": False, "createdAt": {"$not": {"$gt": NOW}}, "$nor": [{"createdAt": NOW, "_id": {"$gte": ObjectId()}}]}, [("createdAt", -1), ("_id", -1)]),
+    "fetch_cvs_page_undated": ("cvs", {"isDeleted": False, "createdAt": None, "_id": {"$lt": ObjectId()}}, [("createdAt", -1), ("_id", -1)]),
+    "fetch_cvs_by_job": ("cvs", {"jobName": "Intern Software Engineer", "isDeleted": False}, [("createdAt", -1), ("_id", -1)]),
+    "fetch_cvs_by_division": ("cvs", {"division": "se", "isDeleted": False}, [("createdAt", -1), ("_id", -1)]),
+    "fetch_cvs_by_candidate": ("cvs", {"candidateName": "Candidate 1", "isDeleted": False}, [("createdAt", -1), ("_id", -1)]),
+    "top_ranked": ("cvs", {"jobId": JOB_ID, "isDeleted": False, "markGenerated": True}, [("finalMark", -1)]),
+    "count_ranked_above": ("cvs", {"jobId": JOB_ID, "isDeleted": False, "finalMark": {"$gt": 50}}, None),
+    "fetch_jobs": ("jobs", {"division": "se", "jobName": "Intern Software Engineer", "isDeleted": False}, None),
+    "exist_job": ("jobs", {"jobName": "Intern Software Engineer"}, None),
+    "resumable_batches": ("upload_batches", {"status": {"$in": ["queued", "processing"]}}, [("createdAt", 1)]),
+    "claim_due": ("email_outbox", {"status": "pending", "nextAttemptAt": {"$lte": NOW}}, [("nextAttemptAt", 1)]),
+    "claimed": ("email_outbox", {"claimId": uuid.uuid4().hex}, None),
+    "gemini_file_sweep": ("gemini_files", {"$or": [{"deleteAfter": {"$lte": NOW}}, {"expiresAt": {"$lte": NOW}}]}, None),
+    "score_cache_invalidation": ("score_cache", {"jobId": JOB_ID}, None)
+}
+
+# Queries whose order must come from the index rather than an in-memory SORT stage
+INDEX_ORDERED = {"fetch_cvs", "fetch_cvs_page", "fetch_cvs_page_undated", "fetch_cvs_by_job", "fetch_cvs_by_division", "fetch_cvs_by_candidate", "top_ranked"}
+
+
+@pytest.fixture(scope="module")
+def db():
+    client = MongoClient(TEST_MONGO_URI)
+    database = client[f"cv_screening_explain_{uuid.uuid4().hex[:8]}"]
+    for collection, indexes in INDEXES.items():
+        database[collection].create_indexes(indexes)
+
+    database.cvs.insert_many([
+        {
+            "cvName": f"cv_{i}.pdf",
+            "candidateName": f"Candidate {i % 20}",
+            "division": ["se", "qe", "devops"][i % 3],
+            "jobName": "Intern Software Engineer",
+            "jobId": JOB_ID if i % 2 else str(ObjectId()),
+            "isDeleted": i % 10 == 0,
+            "markGenerated": i % 4 != 0,
+            "finalMark": float(i % 100),
+            "selectedForInterview": i % 100 >= 60,
+            "mailStatus": "received_email_sent",
+            "createdAt": NOW - timedelta(minutes=i)
+        }
+        for i in range(500)
+    ])
+    database.jobs.insert_many([
+        {"jobName": f"Job {i}", "division": "se", "isDeleted": False} for i in range(50)
+    ])
+    yield database
+    client.drop_database(database.name)
+    client.close()
+
+
+def plan_stages(explain: dict) -> list:
+    """Every stage name of the winning plan, in any explain output format"""
+    stages = []
+
+    def walk(node, in_plan):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "rejectedPlans":
+                    continue
+                if key == "stage" and in_plan:
+                    stages.append(value)
+                walk(value, in_plan or key in ("winningPlan", "queryPlan"))
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, in_plan)
+
+    walk(explain, False)
+    return stages
+
+
+@pytest.mark.parametrize("name", sorted(FIND_QUERIES))
+def test_known_queries_use_an_index(db, name):
+    collection, filter_dict, sort = FIND_QUERIES[name]
+    cursor = db[collection].find(filter_dict)
+    if sort:
+        cursor = cursor.sort(sort)
+    stages = plan_stages(cursor.explain())
+
+    assert stages, f"{name}: no winning plan in explain output"
+    assert "COLLSCAN" not in stages, f"{name} scans the whole collection: {stages}"
+    if name in INDEX_ORDERED:
+        assert "SORT" not in stages, f"{name} sorts in memory: {stages}"
+
+
+def test_job_stats_match_uses_an_index(db):
+    explain = db.command("aggregate", "cvs", pipeline=[
+        {"$match": {"jobId": JOB_ID, "isDeleted": False}},
+        {"$group": {"_id": None, "candidates": {"$sum": 1}}}
+    ], explain=True)
+    stages = plan_stages(explain)
+
+    assert stages and "COLLSCAN" not in stages, stages
+
+
+def test_ranking_count_uses_an_index(db):
+    # count_documents sends this pipeline
+    explain = db.command("aggregate", "cvs", pipeline=[
+        {"$match": {"jobId": JOB_ID, "isDeleted": False, "finalMark": {"$gt": 50}}},
+        {"$group": {"_id": 1, "n": {"$sum": 1}}}
+    ], explain=True)
+    stages = plan_stages(explain)
+
+    assert stages and "COLLSCAN" not in stages, stages
+
+
+
+def test_keyset_pages_cover_ties_and_undated_cvs(db):
+    motor = pytest.importorskip("motor.motor_asyncio")
+    tied = NOW - timedelta(days=1)
+    extra_ids = db.cvs.insert_many(
+        [{"cvName": f"tied_{i}.pdf", "isDeleted": False, "createdAt": tied} for i in range(5)]
+        + [{"cvName": f"undated_{i}.pdf", "isDeleted": False} for i in range(5)]
+    ).inserted_ids
+
+    async def walk():
+        client = motor.AsyncIOMotorClient(TEST_MONGO_URI)
+        request = SimpleNamespace(app=SimpleNamespace(db=client[db.name]))
+        seen, cursor = [], None
+        try:
+            while True:
+                # 7 per page so the tied CVs straddle a page boundary
+                page, cursor = await CvModel().fetch_cvs_page(request, {"isDeleted": False}, 7, cursor, {"cvName": 1})
+                seen.extend(page)
+                if cursor is None:
+                    return seen
+        finally:
+            client.close()
+
+    try:
+        active = db.cvs.count_documents({"isDeleted": False})
+        seen = asyncio.run(walk())
+    finally:
+        db.cvs.delete_many({"_id": {"$in": extra_ids}})
+
+    assert len(seen) == active == len({cv["id"] for cv in seen})
+    names = [cv["cvName"] for cv in seen]
+    # Dated CVs newest first, CVs sharing a createdAt by _id, undated ones last
+    assert names[-5:] == [f"undated_{i}.pdf" for i in reversed(range(5))]
+    first_tied = names.index("tied_4.pdf")
+    assert names[first_tied:first_tied + 5] == [f"tied_{i}.pdf" for i in reversed(range(5))]
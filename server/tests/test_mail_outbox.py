@@ -0,0 +1,132 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+pytest.importorskip("msal")
+pytest.importorskip("jinja2")
+pytest.importorskip("pydantic_settings")
+
+from bson.objectid import ObjectId
+
+from utils import mail_outbox as outbox_module
+from utils.mail_outbox import MailOutbox
+
+
+class StubOutboxModel:
+    """In-memory stand-in for OutboxModel holding one batch of claimed emails"""
+
+    def __init__(self, emails):
+        self.emails = {email["_id"]: email for email in emails}
+
+    async def claim_due(self, request, limit):
+        claimed = [email for email in self.emails.values() if email["status"] == "pending"][:limit]
+        for email in claimed:
+            email["status"] = "sending"
+            email["attempts"] += 1
+        return [dict(email) for email in claimed]
+
+    async def mark_sent(self, request, email_ids):
+        for email_id in email_ids:
+            self.emails[email_id]["status"] = "sent"
+
+    async def mark_failed(self, request, email_id, error, next_attempt_at=None):
+        email = self.emails[email_id]
+        email["status"] = "pending" if next_attempt_at else "failed"
+        email["lastError"] = error
+        email["nextAttemptAt"] = next_attempt_at
+
+
+class StubCvModel:
+    def __init__(self):
+        self.updates = []
+
+    async def bulk_update_if(self, request, updates):
+        self.updates.extend(updates)
+
+
+def _queued_email(kind="received", attempts=0):
+    return {
+        "_id": ObjectId(),
+        "kind": kind,
+        "cvId": ObjectId(),
+        "recipientEmail": "candidate@example.com",
+        "candidateName": "Candidate",
+        "position": "Intern Software Engineer",
+        "status": "pending",
+        "attempts": attempts
+    }
+
+
+@pytest.fixture
+def stubs(monkeypatch):
+    def install(emails, send_email_batch):
+        outbox = StubOutboxModel(emails)
+        cvs = StubCvModel()
+        monkeypatch.setattr(outbox_module, "outbox_model", outbox)
+        monkeypatch.setattr(outbox_module, "cv_model", cvs)
+        monkeypatch.setattr(outbox_module, "graph_email_service", SimpleNamespace(send_email_batch=send_email_batch))
+        return outbox, cvs
+    return install
+
+
+def test_failed_send_returns_claimed_emails_to_the_queue(stubs):
+    async def send_email_batch(messages):
+        raise RuntimeError("Could not acquire access token")
+
+    emails = [_queued_email(), _queued_email("selected")]
+    outbox, cvs = stubs(emails, send_email_batch)
+
+    attempted = asyncio.run(MailOutbox().deliver_due())
+
+    assert attempted == 2
+    for email in outbox.emails.values():
+        assert email["status"] == "pending"
+        assert email["nextAttemptAt"] is not None
+        assert "access token" in email["lastError"]
+    assert cvs.updates == []
+
+
+def test_failed_send_gives_up_after_the_last_attempt(stubs, monkeypatch):
+    async def send_email_batch(messages):
+        raise RuntimeError("Graph unavailable")
+
+    monkeypatch.setattr(outbox_module.settings, "MAIL_OUTBOX_MAX_ATTEMPTS", 1)
+    outbox, _ = stubs([_queued_email()], send_email_batch)
+
+    asyncio.run(MailOutbox().deliver_due())
+
+    assert [email["status"] for email in outbox.emails.values()] == ["failed"]
+
+
+def test_batch_results_are_recorded_per_email(stubs):
+    async def send_email_batch(messages):
+        return [True, False]
+
+    delivered, rejected = _queued_email(), _queued_email("rejection")
+    outbox, cvs = stubs([delivered, rejected], send_email_batch)
+
+    asyncio.run(MailOutbox().deliver_due())
+
+    assert outbox.emails[delivered["_id"]]["status"] == "sent"
+    assert outbox.emails[rejected["_id"]]["status"] == "pending"
+    assert [(cv_id, data) for cv_id, data, _ in cvs.updates] == [(delivered["cvId"], {"mailStatus": "received_email_sent"})]
+
+
+def test_late_received_email_does_not_replace_a_later_status(stubs):
+    async def send_email_batch(messages):
+        return [True, True]
+
+    received, selected = _queued_email(), _queued_email("selected")
+    _, cvs = stubs([received, selected], send_email_batch)
+
+    asyncio.run(MailOutbox().deliver_due())
+
+    statuses = {"_": None, "received": "received_email_sent", "selected": "selection_email_sent", "interview": "interview_scheduled_email_sent"}
+    [(_, _, received_condition), (_, _, selected_condition)] = cvs.updates
+    replaceable = received_condition["mailStatus"]["$in"]
+    # The received status only lands on a CV that has no mail status yet
+    assert [name for name, status in statuses.items() if status in replaceable] == ["_", "received"]
+    assert "interview_scheduled_email_sent" not in selected_condition["mailStatus"]["$in"]
@@ -0,0 +1,71 @@
+import pytest
+
+pytest.importorskip("pdfminer")
+pytest.importorskip("pydantic_settings")
+
+from utils.pdf_text import read_text_layer
+
+
+def write_pdf(path, pages):
+    """Write a minimal PDF with one page per entry, each a list of text lines (empty for an image-only page)"""
+    page_count = len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            " ".join(f"{4 + 2 * i} 0 R" for i in range(page_count)), page_count
+        )).encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    for i, lines in enumerate(pages):
+        stream = "BT /F1 10 Tf 50 780 Td 12 TL " + " ".join(f"({line}) Tj T*" for line in lines) + " ET"
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        ).encode())
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream.encode()))
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(data)
+    return path
+
+
+FULL_PAGE = [f"Experience line {i}: built and shipped backend services in Python" for i in range(30)]
+
+
+def test_short_last_page_keeps_the_text_path(tmp_path):
+    pdf = write_pdf(tmp_path / "cv.pdf", [FULL_PAGE, ["References available on request"]])
+
+    text = read_text_layer(pdf)
+
+    assert text is not None
+    assert "Experience line 0" in text
+    assert "References available on request" in text
+
+
+def test_blank_trailing_page_keeps_the_text_path(tmp_path):
+    pdf = write_pdf(tmp_path / "cv.pdf", [FULL_PAGE, FULL_PAGE, []])
+
+    text = read_text_layer(pdf)
+
+    assert text is not None
+    assert text.count("Experience line 0") == 2
+
+
+def test_mostly_image_pages_fall_back_to_the_file(tmp_path):
+    pdf = write_pdf(tmp_path / "cv.pdf", [FULL_PAGE, [], []])
+
+    assert read_text_layer(pdf) is None
+
+
+def test_sparse_document_falls_back_to_the_file(tmp_path):
+    pdf = write_pdf(tmp_path / "cv.pdf", [["Scan"], ["Scan"]])
+
+    assert read_text_layer(pdf) is None
@@ -0,0 +1,93 @@
+import asyncio
+import io
+import zipfile
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+pytest.importorskip("google.genai")
+pytest.importorskip("pydantic_settings")
+
+from bson.objectid import ObjectId
+from fastapi import HTTPException, UploadFile
+
+from api.api_v1.endpoints import pdf as pdf_endpoint
+from utils.upload_storage import UploadTooLarge, store_zip_member
+
+
+class StubPdfModel:
+    def __init__(self):
+        self.records = {}
+
+    async def create_pdf(self, request, pdf):
+        pdf_id = ObjectId()
+        self.records[pdf_id] = dict(pdf)
+        return pdf_id
+
+    async def update(self, request, field, value, data):
+        self.records[value].update(data)
+        return self.records[value]
+
+    async def delete_many(self, request, pdf_ids):
+        for pdf_id in pdf_ids:
+            self.records.pop(pdf_id, None)
+        return len(pdf_ids)
+
+
+class StubExtractor:
+    async def extract_and_structure_pdf(self, pdf_file_name, links=None):
+        if "gemini_down" in pdf_file_name:
+            raise RuntimeError("503 UNAVAILABLE")
+        return {"personal_info": {"name": pdf_file_name}}
+
+
+def zip_upload(names):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name in names:
+            archive.writestr(name, b"%PDF-1.4 " + name.encode())
+    buffer.seek(0)
+    return UploadFile(file=buffer, filename="cvs.zip")
+
+
+@pytest.fixture
+def records(monkeypatch, tmp_path):
+    records = StubPdfModel()
+    monkeypatch.setattr(pdf_endpoint, "pdf_model", records)
+    monkeypatch.setattr(pdf_endpoint, "GeminiPDFExtractor", StubExtractor)
+    monkeypatch.setattr(pdf_endpoint, "UPLOAD_DIR", tmp_path)
+    return records
+
+
+def test_failed_members_are_reported_without_discarding_the_others(records, monkeypatch, tmp_path):
+    async def store_or_reject(zip_ref, member, target_path):
+        if member.filename == "too_big.pdf":
+            target_path.write_bytes(b"partial")
+            raise UploadTooLarge("too_big.pdf exceeds 10 bytes")
+        return await store_zip_member(zip_ref, member, target_path)
+
+    monkeypatch.setattr(pdf_endpoint, "store_zip_member", store_or_reject)
+
+    response = asyncio.run(pdf_endpoint.upload_file(None, zip_upload(["first.pdf", "too_big.pdf", "gemini_down.pdf"])))
+
+    assert response["failed"] == [
+        {"filename": "too_big.pdf", "error": "too_big.pdf exceeds 10 bytes"},
+        {"filename": "gemini_down.pdf", "error": "Stored but could not be extracted"}
+    ]
+    # Every returned path exists; the extraction failure keeps its file for a retry
+    assert len(response["saved_paths"]) == 2
+    assert all((tmp_path / path).exists() for path in response["saved_paths"])
+    assert sorted(path.name.split("_", 1)[1] for path in tmp_path.iterdir()) == ["first.pdf", "gemini_down.pdf"]
+    assert sorted(record["pdfName"] for record in records.records.values()) == ["first.pdf", "gemini_down.pdf"]
+
+
+def test_extraction_failure_keeps_the_stored_pdf(records, tmp_path):
+    upload = UploadFile(file=io.BytesIO(b"%PDF-1.4"), filename="gemini_down.pdf")
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(pdf_endpoint.upload_file(None, upload))
+
+    assert error.value.status_code == 502
+    assert len(records.records) == 1
+    assert [path.name.split("_", 1)[1] for path in tmp_path.iterdir()] == ["gemini_down.pdf"]
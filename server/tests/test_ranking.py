@@ -0,0 +1,187 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("pydantic_settings")
+
+from models import cv as cv_module
+from models import ranking
+from models.cv import CvModel
+from models.ranking import JobRankingModel
+
+
+class StubCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def to_list(self, length=None):
+        return self.documents
+
+
+class StubCollection:
+    def __init__(self, documents=None, totals=None):
+        self.documents = {document["_id"]: document for document in documents or []}
+        self.totals = totals or []
+        self.updates = []
+
+    async def find_one(self, filter_dict):
+        document = self.documents.get(filter_dict["_id"])
+        if document is None:
+            return None
+        fresh_after = filter_dict.get("rebuiltAt", {}).get("$gte")
+        if fresh_after and document["rebuiltAt"] < fresh_after:
+            return None
+        return document
+
+    async def update_one(self, filter_dict, update, upsert=False):
+        self.updates.append((filter_dict, update, upsert))
+
+    def aggregate(self, pipeline):
+        return StubCursor(self.totals)
+
+
+def stub_request(summaries, cvs):
+    return SimpleNamespace(app=SimpleNamespace(db={"job_rankings": summaries, "cvs": cvs}))
+
+
+def scored_cv(job_id="job-1", mark=72.5, selected=True, **fields):
+    return {"jobId": job_id, "isDeleted": False, "markGenerated": True, "finalMark": mark, "selectedForInterview": selected, **fields}
+
+
+def test_new_marks_increment_the_job_summary():
+    summaries = StubCollection()
+    unscored = {"jobId": "job-1", "isDeleted": False, "markGenerated": False, "finalMark": 0.0}
+
+    asyncio.run(JobRankingModel().apply_change(stub_request(summaries, None), unscored, scored_cv()))
+
+    [(filter_dict, update, upsert)] = summaries.updates
+    assert filter_dict == {"_id": "job-1"}
+    assert update["$inc"] == {"scored": 1, "markSum": 72.5, "selected": 1}
+    # A missing summary is recounted on read instead of being started from a partial $inc
+    assert upsert is False
+
+
+def test_rescoring_moves_only_the_difference():
+    summaries = StubCollection()
+
+    asyncio.run(JobRankingModel().apply_change(stub_request(summaries, None), scored_cv(mark=70.0), scored_cv(mark=40.0, selected=False)))
+
+    [(_, update, _)] = summaries.updates
+    assert update["$inc"] == {"scored": 0, "markSum": -30.0, "selected": -1}
+
+
+def test_deleting_a_scored_cv_removes_its_contribution():
+    summaries = StubCollection()
+
+    asyncio.run(JobRankingModel().apply_change(stub_request(summaries, None), scored_cv(), scored_cv(isDeleted=True)))
+
+    [(_, update, _)] = summaries.updates
+    assert update["$inc"] == {"scored": -1, "markSum": -72.5, "selected": -1}
+
+
+def test_unrelated_updates_leave_the_summary_alone():
+    summaries = StubCollection()
+    cv = {"jobId": "job-1", "isDeleted": False, "markGenerated": False, "finalMark": 0.0}
+
+    asyncio.run(JobRankingModel().apply_change(stub_request(summaries, None), cv, dict(cv, candidateName="Candidate")))
+
+    assert summaries.updates == []
+
+
+def test_missing_summary_is_recounted_from_the_cvs():
+    summaries = StubCollection()
+    cvs = StubCollection(totals=[{"_id": None, "scored": 3, "markSum": 180.0, "selected": 2}])
+
+    summary = asyncio.run(JobRankingModel().get_summary(stub_request(summaries, cvs), "job-1"))
+
+    assert (summary["scored"], summary["markSum"], summary["selected"]) == (3, 180.0, 2)
+    [(filter_dict, update, upsert)] = summaries.updates
+    assert filter_dict == {"_id": "job-1"} and upsert is True
+    assert update["$set"]["rebuiltAt"] is not None
+
+
+def test_stale_summary_is_recounted(monkeypatch):
+    monkeypatch.setattr(ranking.settings, "RANKING_SUMMARY_MAX_AGE", 60)
+    stale = {"_id": "job-1", "scored": 9, "markSum": 900.0, "selected": 9, "rebuiltAt": datetime.now(timezone.utc) - timedelta(minutes=5)}
+    summaries = StubCollection([stale])
+    cvs = StubCollection(totals=[{"_id": None, "scored": 2, "markSum": 130.0, "selected": 1}])
+
+    summary = asyncio.run(JobRankingModel().get_summary(stub_request(summaries, cvs), "job-1"))
+
+    assert summary["scored"] == 2
+
+
+class StubCvCollection:
+    """A cvs collection with equality filters, where None also matches a missing field"""
+
+    def __init__(self, documents, before_write=None):
+        self.documents = documents
+        self.before_write = before_write
+        self.writes = 0
+
+    def _match(self, filter_dict):
+        for document in self.documents:
+            if all(document.get(field) == expected for field, expected in filter_dict.items()):
+                return document
+        return None
+
+    async def find_one(self, filter_dict, projection=None):
+        document = self._match(filter_dict)
+        if document is None:
+            return None
+        return {field: value for field, value in document.items() if not projection or field == "_id" or field in projection}
+
+    async def find_one_and_update(self, filter_dict, update, return_document=None):
+        if self.before_write:
+            self.before_write(self)
+        self.writes += 1
+        document = self._match(filter_dict)
+        if document is None:
+            return None
+        document.update(update["$set"])
+        return dict(document)
+
+
+class RecordingRankingModel:
+    def __init__(self):
+        self.changes = []
+
+    async def apply_change(self, request, before, after):
+        self.changes.append((before, after))
+
+
+def test_cv_update_returns_the_stored_document(monkeypatch):
+    rankings = RecordingRankingModel()
+    monkeypatch.setattr(cv_module, "job_ranking_model", rankings)
+    stored = {"_id": "cv-1", "jobId": "job-1", "isDeleted": False, "markGenerated": False, "finalMark": 0.0, "cvName": "cv.pdf"}
+    cvs = StubCvCollection([stored])
+
+    updated = asyncio.run(CvModel().update(stub_request(None, cvs), "_id", "cv-1", {"finalMark": 72.5, "markGenerated": True}))
+
+    assert updated["cvName"] == "cv.pdf" and updated["finalMark"] == 72.5 and updated["id"] == "cv-1"
+    [(before, after)] = rankings.changes
+    assert (before["finalMark"], before["markGenerated"]) == (0.0, False)
+    assert "cvName" not in before
+    assert after["finalMark"] == 72.5
+
+
+def test_cv_update_rereads_marks_changed_concurrently(monkeypatch):
+    rankings = RecordingRankingModel()
+    monkeypatch.setattr(cv_module, "job_ranking_model", rankings)
+    stored = {"_id": "cv-1", "jobId": "job-1", "isDeleted": False, "markGenerated": True, "finalMark": 50.0}
+
+    def concurrent_rescore(collection):
+        if collection.writes == 0:
+            stored["finalMark"] = 60.0
+
+    cvs = StubCvCollection([stored], before_write=concurrent_rescore)
+
+    asyncio.run(CvModel().update(stub_request(None, cvs), "_id", "cv-1", {"finalMark": 80.0}))
+
+    # The write retried against 60.0, so the summary moves from the concurrent mark and not the stale one
+    [(before, after)] = rankings.changes
+    assert (before["finalMark"], after["finalMark"]) == (60.0, 80.0)
+    assert cvs.writes == 2
@@ -0,0 +1,76 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+pytest.importorskip("google.genai")
+pytest.importorskip("pydantic_settings")
+
+from bson.objectid import ObjectId
+
+from utils import upload_worker as worker_module
+from utils.upload_worker import UploadWorker
+
+
+class StubBatchModel:
+    def __init__(self, batch):
+        self.batch = batch
+        self.statuses = []
+
+    async def find(self, request, field, value):
+        return self.batch
+
+    async def set_status(self, request, batch_id, status, data=None):
+        self.statuses.append(status)
+
+    async def set_file_stage(self, request, batch_id, index, stage, error=None):
+        self.batch["files"][index]["stage"] = stage
+        self.batch["files"][index]["error"] = error
+
+
+class StubPipeline:
+    def __init__(self):
+        self.resumed = []
+        self.processed = []
+
+    async def resume_received_email(self, request, cv_id, job_name):
+        self.resumed.append(cv_id)
+        return True
+
+    async def run(self, request, items, job_name, job_id, on_stage):
+        self.processed.extend(filename for filename, _, _ in items)
+        for index in range(len(items)):
+            await on_stage(index, "mailed", None)
+
+
+def batch_file(filename, stage):
+    return {"filename": filename, "cvId": str(ObjectId()), "storedPath": f"/tmp/{filename}", "stage": stage, "error": None}
+
+
+def test_resumed_batch_queues_the_received_email_of_scored_cvs(monkeypatch):
+    batch = {
+        "_id": ObjectId(),
+        "jobName": "Intern Software Engineer",
+        "jobId": str(ObjectId()),
+        "files": [
+            batch_file("scored.pdf", "scored"),
+            batch_file("mailed.pdf", "mailed"),
+            batch_file("stored.pdf", "stored")
+        ]
+    }
+    batches = StubBatchModel(batch)
+    pipeline = StubPipeline()
+    monkeypatch.setattr(worker_module, "batch_model", batches)
+    monkeypatch.setattr(worker_module, "cv_pipeline", pipeline)
+
+    worker = UploadWorker()
+    worker.context = SimpleNamespace(app=None)
+    asyncio.run(worker.process_batch(str(batch["_id"])))
+
+    assert pipeline.resumed == [ObjectId(batch["files"][0]["cvId"])]
+    # Scored CVs are not extracted and scored again
+    assert pipeline.processed == ["stored.pdf"]
+    assert [file["stage"] for file in batch["files"]] == ["mailed", "mailed", "mailed"]
+    assert batches.statuses == ["processing", "completed"]
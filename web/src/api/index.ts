@@ -19,6 +19,16 @@ export const uploadCv = async (formData: FormData) => {
   }
 };
 
+export const fetchUploadStatus = async (batchId: string) => {
+  try {
+    const response = await axios.get(`${API_BASE_URL}/api_v1/cv/upload_status/${batchId}`);
+    return response.data;
+  } catch (error) {
+    console.error("Upload status failed", error);
+    throw error;
+  }
+};
+
 export const fetchCvs = async (division?: string, jobName?: string, candidateName?: string) => {
   try {
     const response = await axios.get(`${API_BASE_URL}/api_v1/cv/fetch_cvs`, {
@@ -2,7 +2,7 @@ import React from "react";
 import { Upload, Button, Form, Flex, Select, Spin } from "antd";
 import { UploadOutlined } from "@ant-design/icons";
 import type { RcFile } from "antd/lib/upload";
-import { fetchJob, uploadCv } from "../api";
+import { fetchJob, fetchUploadStatus, uploadCv } from "../api";
 import { useAtomValue } from "jotai";
 import { notificationApiAtom } from "../atoms";
 import { useQuery, useQueryClient } from "@tanstack/react-query";
@@ -12,6 +12,9 @@ import type { GetProp, UploadFile, UploadProps, FormProps } from 'antd';
 
 type FileType = Parameters<GetProp<UploadProps, 'beforeUpload'>>[0];
 
+// How often a queued upload batch is checked until the worker completes it
+const UPLOAD_STATUS_POLL_MS = 3000;
+
 type FieldType = {
   jobName: string;
   cvFiles: string
@@ -36,6 +39,30 @@ const CVForm: React.FC<{setOpen?: (open:string | null)=>void, open: string | nul
   },[open])
   const notification = useAtomValue(notificationApiAtom);
 
+  // Batch being processed in the background, polled until the worker completes it
+  const [pollBatchId, setPollBatchId] = React.useState<string | null>(null);
+  React.useEffect(()=>{
+    if(!pollBatchId) return;
+    const timer = setInterval(async () => {
+      try {
+        const status = await fetchUploadStatus(pollBatchId);
+        queryClient.invalidateQueries({queryKey: ['allCVs']});
+        if(status?.status !== "completed") return;
+        setPollBatchId(null);
+        if(status.total_failed > 0){
+          notification?.warning({message:`${status.total_processed} of ${status.total_files} CV/s processed, ${status.total_failed} failed`});
+        }else{
+          notification?.success({message:`${status.total_processed} CV/s processed successfully`});
+        }
+      } catch (error:AxiosError | any) {
+        setPollBatchId(null);
+        notification?.error({message: error?.response?.data?.detail || "Could not check the CV/s processing status"});
+      }
+    }, UPLOAD_STATUS_POLL_MS);
+    // Stops polling when the batch finishes, fails or the form unmounts
+    return () => clearInterval(timer);
+  },[pollBatchId])
+
   const onFinish: FormProps<FieldType>['onFinish'] = async (values) => {
     const formData = new FormData();
     if(fileList.length === 0){
@@ -52,9 +79,10 @@ const CVForm: React.FC<{setOpen?: (open:string | null)=>void, open: string | nul
     try {
       setLoading(true)
       const res = await uploadCv(formData);
-      if(res?.statusCode === 200){
+      if(res?.statusCode === 202 && res?.batchId){
         queryClient.invalidateQueries({queryKey: ['allCVs']});
-        notification?.success({message:`CV/s uploaded successfully`});
+        notification?.success({message:`${res.total_files} CV/s uploaded, processing in the background`});
+        setPollBatchId(res.batchId);
       }else{
         notification?.error({message: res?.detail || "CV/s upload failed!"});
       }